@@ -79,6 +79,26 @@ if DATABASE_URL:
         conn_health_checks=True,
     )
 
+# Önbellek
+# Takım üyeliği, oturum takım kontrolü, sürüm damgaları (ETag), Idempotency-Key yanıtları
+# ve gösterge paneli görüntüsü önbellekte tutulur. Birden fazla süreçle (ör. gunicorn
+# işçileri) çalışırken önbellek tüm süreçler arasında paylaşılmalıdır; REDIS_URL
+# verilmezse yalnızca tek süreçli geliştirme ve testler için yerel bellek kullanılır.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -120,6 +140,27 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'production:home'
 LOGOUT_REDIRECT_URL = 'login'
 
+# Stok defteri: True ise stok artışları yalnızca bekleyen stok hareketi olarak eklenir
+# ve `manage.py compact_stock_ledger` ile periyodik olarak Part.stock'a katlanır.
+# Varsayılan False: her stok değişikliği Part satırında bir UPDATE ve bir StockMovement
+# INSERT'idir; sıkıştırma komutu zamanlanmadan da Part.stock her zaman güncel kalır.
+# Aynı parçaya yoğun eşzamanlı üretim yazılan kurulumlarda True yapılıp
+# compact_stock_ledger periyodik çalıştırılmalıdır (bkz. docs/technical_documentation.md)
+STOCK_LEDGER_DEFER_INCREMENTS = os.environ.get('STOCK_LEDGER_DEFER_INCREMENTS', 'False') == 'True'
+
+# Idempotency-Key ile saklanan yanıtların önbellek takma adı ve saklama süresi (saniye)
+IDEMPOTENCY_CACHE = os.environ.get('IDEMPOTENCY_CACHE', 'default')
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+# Düşük stok uyarıları: aynı parça için uyarılar arası en kısa süre (saniye) ve gönderim modu ('immediate' ya da 'digest')
+LOW_STOCK_ALERT_COOLDOWN = int(os.environ.get('LOW_STOCK_ALERT_COOLDOWN', 6 * 60 * 60))
+LOW_STOCK_ALERT_MODE = os.environ.get('LOW_STOCK_ALERT_MODE', 'immediate')
+
+# Gösterge paneli görüntüsünün önbellek takma adı ve en uzun saklama süresi (saniye);
+# görüntü ayrıca üretim, parça ve uçak yazımlarında commit sonrası bayatlatılır
+DASHBOARD_CACHE = os.environ.get('DASHBOARD_CACHE', 'default')
+DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 5 * 60))
+
 # DRF Settings
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
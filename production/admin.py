@@ -2,9 +2,13 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 from django.utils.html import format_html
+from django.utils import timezone
+from django.db import transaction
 from django.db.models import Count, Sum, Q
-from .models import Team, Part, Aircraft, Production, AircraftPart
+from .models import Team, Part, Aircraft, Production, ProductionDailyRollup, AircraftPart, StockMovement, OutboxEmail
 from .models.constants import TEAM_TYPES
+from .services.assembly import disassemble
+from .services.membership import get_user_team
 
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'get_team')
@@ -68,14 +72,19 @@ class TeamAdmin(admin.ModelAdmin):
     inlines = [TeamMemberInline]
     exclude = ('members',)
     
+    def get_queryset(self, request):
+        # Sayılar satır başına sorgu yerine liste sorgusunda alt sorgularla hesaplanır
+        return super().get_queryset(request).with_stats()
+    
     def get_member_count(self, obj):
-        return obj.members.count()
+        return obj.member_count
     get_member_count.short_description = 'Üye Sayısı'
+    get_member_count.admin_order_field = 'member_count'
     
     def get_total_production(self, obj):
-        total = Production.objects.filter(team=obj).aggregate(Sum('quantity'))
-        return total['quantity__sum'] or 0
+        return obj.total_production
     get_total_production.short_description = 'Toplam Üretim'
+    get_total_production.admin_order_field = 'total_production'
     
     def save_model(self, request, obj, form, change):
         """
@@ -128,7 +137,7 @@ class PartAdmin(admin.ModelAdmin):
             'description': 'Parça adı, takım tipi ve uçak tipine göre otomatik olarak oluşturulur. Takım tipi, parçayı üretecek takımın tipini belirtir (örn: "Gövde" parçası için "Gövde" takım tipi).'
         }),
         ('Stok Bilgileri', {
-            'fields': ('stock', 'minimum_stock', 'is_low_stock')
+            'fields': ('stock', 'minimum_stock', 'is_low_stock', 'stock_shards')
         }),
     )
     
@@ -138,6 +147,13 @@ class PartAdmin(admin.ModelAdmin):
         return format_html('<span style="color: green;">Yeterli Stok</span>')
     get_stock_status.short_description = 'Stok Durumu'
     
+    def get_object(self, request, object_id, from_field=None):
+        obj = super().get_object(request, object_id, from_field)
+        if obj is not None:
+            # Formda sayaçlar ve bekleyen hareketler dahil anlık stok gösterilir
+            obj.load_live_stock()
+        return obj
+    
     def get_readonly_fields(self, request, obj=None):
         if obj:  # Düzenleme durumunda
             return self.readonly_fields + ('team_type', 'aircraft_type')
@@ -155,7 +171,7 @@ class PartAdmin(admin.ModelAdmin):
             return True
             
         # Kullanıcının bir takımı var mı kontrol et
-        user_team = Team.objects.filter(members=request.user).first()
+        user_team = get_user_team(request)
         if not user_team:
             return False
             
@@ -225,6 +241,12 @@ class AircraftAdmin(admin.ModelAdmin):
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
     
+    def delete_queryset(self, request, queryset):
+        # Toplu silme model delete() metodunu çağırmaz; parçalar burada tek seferde stoğa döndürülür
+        with transaction.atomic():
+            disassemble(list(queryset.values_list('id', flat=True)))
+            super().delete_queryset(request, queryset)
+    
     def save_formset(self, request, form, formset, change):
         instances = formset.save(commit=False)
         for instance in instances:
@@ -239,7 +261,7 @@ class AircraftAdmin(admin.ModelAdmin):
             return True
             
         # Kullanıcının bir takımı var mı kontrol et
-        user_team = Team.objects.filter(members=request.user).first()
+        user_team = get_user_team(request)
         if not user_team:
             return False
             
@@ -258,7 +280,7 @@ class ProductionAdmin(admin.ModelAdmin):
         
         # Takım seçimini kullanıcının takımıyla sınırla
         if not request.user.is_superuser:
-            user_team = Team.objects.filter(members=request.user).first()
+            user_team = get_user_team(request)
             if user_team:
                 form.base_fields['team'].initial = user_team
                 form.base_fields['team'].queryset = Team.objects.filter(id=user_team.id)
@@ -279,7 +301,7 @@ class ProductionAdmin(admin.ModelAdmin):
                 part_field.queryset = Part.objects.all()
             else:
                 # Normal kullanıcı için takımına uygun parçaları göster
-                user_team = Team.objects.filter(members=request.user).first()
+                user_team = get_user_team(request)
                 if user_team and user_team.team_type != 'ASSEMBLY':
                     part_field.queryset = Part.objects.filter(team_type=user_team.team_type)
                 else:
@@ -295,7 +317,7 @@ class ProductionAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         # Montaj takımı üyeleri parça üretemez
         if not request.user.is_superuser:
-            user_team = Team.objects.filter(members=request.user).first()
+            user_team = get_user_team(request)
             if user_team and user_team.team_type == 'ASSEMBLY':
                 return False
         return super().has_add_permission(request)
@@ -330,7 +352,58 @@ class AircraftPartAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         # Montaj takımı üyeleri dışındakiler parça ekleyemez
         if not request.user.is_superuser:
-            user_team = Team.objects.filter(members=request.user).first()
+            user_team = get_user_team(request)
             if not user_team or user_team.team_type != 'ASSEMBLY':
                 return False
-        return super().has_add_permission(request) 
\ No newline at end of file
+        return super().has_add_permission(request) 
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('part', 'delta', 'reason', 'applied', 'created_at')
+    list_filter = ('reason', 'applied', 'part__team_type', 'part__aircraft_type')
+    date_hierarchy = 'created_at'
+    
+    def has_add_permission(self, request):
+        # Stok hareketleri yalnızca stok servisi tarafından eklenir
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        # Defter yalnızca eklemeye açıktır
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(ProductionDailyRollup)
+class ProductionDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'team', 'part', 'quantity')
+    list_filter = ('team', 'part__aircraft_type')
+    date_hierarchy = 'day'
+    
+    def has_add_permission(self, request):
+        # Özet yalnızca üretim yazma yolunda ve backfill komutuyla güncellenir
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    readonly_fields = ('subject', 'body', 'from_email', 'recipients', 'attempts', 'last_error', 'created_at', 'sent_at')
+    actions = ['retry_failed']
+    
+    def retry_failed(self, request, queryset):
+        """Başarısız bildirimleri yeniden kuyruğa al"""
+        updated = queryset.filter(status='FAILED').update(status='PENDING', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f'{updated} bildirim yeniden kuyruğa alındı.')
+    retry_failed.short_description = 'Seçili başarısız bildirimleri yeniden dene'
+    
+    def has_add_permission(self, request):
+        # Bildirimler yalnızca sinyaller tarafından kuyruğa eklenir
+        return False
@@ -6,4 +6,5 @@ class ProductionConfig(AppConfig):
     verbose_name = 'Üretim Yönetimi'
 
     def ready(self):
+        import production.checks
         import production.signals 
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""
+Uygulamanın dağıtım kontrolleri.
+
+Takım üyeliği, oturum takım kontrolü, sürüm damgaları ve Idempotency-Key
+yanıtları süreçler arasında paylaşılan bir önbellek gerektirir. Süreç başına
+yerel bellek önbelleğinde bir işçideki geçersiz kılma diğer işçilere ulaşmaz;
+işçiler eski üyeliği ya da eski damgayı bir saate kadar kullanmaya devam eder
+ve başka bir işçiye düşen yeniden deneme ikinci kez işlenir.
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def shared_cache_aliases():
+    """Süreçler arasında paylaşılması gereken önbellek takma adları"""
+    return ['default', getattr(settings, 'IDEMPOTENCY_CACHE', 'default')]
+
+
+@register(deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Paylaşılması gereken önbelleklerin süreç başına yerel bir arka uç kullanmadığını denetler"""
+    errors = []
+    for alias in dict.fromkeys(shared_cache_aliases()):
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in LOCAL_CACHE_BACKENDS:
+            errors.append(Warning(
+                f"'{alias}' önbelleği süreç başına yerel bir arka uç kullanıyor ({backend}).",
+                hint='Birden fazla süreçle çalışırken REDIS_URL ile paylaşılan bir önbellek yapılandırın.',
+                id='production.W001',
+            ))
+    return errors
@@ -0,0 +1,76 @@
+"""
+Sürüm damgalı koşullu GET desteği.
+
+``conditional`` ile sarılan görünümler ``ETag`` başlığını
+``services.versions`` damgalarından üretir. İstemcinin ``If-None-Match``
+başlığı güncelse görünüm hiç çalıştırılmaz ve ``304 Not Modified`` döner; bu
+yolun maliyeti tek bir önbellek okumasıdır (damgalar ve kullanıcının takım
+üyeliği birlikte okunur).
+
+``Last-Modified`` gönderilmez: HTTP tarihleri saniye çözünürlüklüdür ve
+istemcinin gördüğü yazımla aynı saniyedeki ikinci bir yazım
+``If-Modified-Since`` ile yanlışlıkla 304 alırdı. Damgalar paylaşılan
+önbellekte tutulmalıdır (bkz. ``production.checks``); süreç başına önbellekte
+bir işçi diğerinin yazımını görmeden 304 döndürebilir.
+
+ETag; damgalara, isteğin tam yoluna, ``Accept`` başlığına, kullanıcıya ve
+kullanıcının takımına bağlıdır. Böylece farklı filtreler, biçimler ya da
+yetkiler aynı doğrulayıcıyı paylaşmaz.
+"""
+import hashlib
+from functools import wraps
+
+from django.http import HttpRequest
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .services.membership import MEMBERSHIP_CACHE_KEY, team_membership
+from .services.versions import ALL_AIRCRAFT, aircraft_scope, read_versions
+
+
+def _etag(request, versions, membership):
+    raw = '|'.join([
+        request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''),
+        str(request.user.pk),
+        repr(tuple(membership)),
+        *[f'{scope}={version}' for scope, version in sorted(versions.items())],
+    ])
+    return quote_etag(hashlib.sha256(raw.encode()).hexdigest())
+
+
+def conditional(*scopes, aircraft_kwarg=None):
+    """
+    Görünümü sürüm damgalı koşullu GET'e duyarlı hale getirir.
+
+    ``scopes`` görünümün bağlı olduğu damgalardır; ``aircraft_kwarg``
+    verilirse URL'deki uçak ID'sinin damgası da eklenir. Hem fonksiyon
+    görünümlerinde hem de ViewSet aksiyonlarında kullanılabilir.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Fonksiyon görünümünde ilk argüman, ViewSet aksiyonunda ikinci argüman istektir
+            api = not isinstance(args[0], HttpRequest)
+            request = args[1] if api else args[0]
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            view_scopes = list(scopes)
+            if aircraft_kwarg:
+                view_scopes += [ALL_AIRCRAFT, aircraft_scope(kwargs[aircraft_kwarg])]
+            membership_key = MEMBERSHIP_CACHE_KEY.format(request.user.pk)
+            versions, extra = read_versions(view_scopes, [membership_key])
+            membership = extra[membership_key] or team_membership(request.user)
+
+            etag = _etag(request, versions, membership)
+            response = get_conditional_response(getattr(request, '_request', request), etag=etag)
+            if response is None:
+                response = view(*args, **kwargs)
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                # Yanıt kullanıcıya özeldir; tarayıcı her kullanımda doğrulayıcıyla yeniden sorar
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
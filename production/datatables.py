@@ -0,0 +1,109 @@
+"""
+DataTables sunucu tarafı işleme (server-side processing) desteği.
+
+``DataTablesMixin`` bir ViewSet'e ``datatable`` aksiyonu ekler. Aksiyon
+DataTables'ın ``draw/start/length/search/order`` protokolünü ViewSet'in
+``get_queryset`` sonucu üzerinde uygular: arama ``datatables_search_fields``
+alanlarında yapılır, sıralama yalnızca ``datatables_order_fields`` içinde
+listelenen (indeksli) alanlarla yapılır ve yalnızca istenen sayfa okunur.
+Satırlar ViewSet'in serializer'ı ile döndürülür.
+"""
+import operator
+from functools import reduce
+
+from django.db.models import Q
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+# Tek istekte döndürülen en fazla satır sayısı
+DATATABLES_MAX_LENGTH = 100
+
+DATATABLES_PARAMETERS = [
+    OpenApiParameter(name='draw', type=int, description='DataTables istek sayacı; yanıtta aynen döndürülür'),
+    OpenApiParameter(name='start', type=int, description='İlk satırın sırası'),
+    OpenApiParameter(name='length', type=int, description=f'Sayfadaki satır sayısı (en fazla {DATATABLES_MAX_LENGTH})'),
+    OpenApiParameter(name='search[value]', type=str, description='Arama metni'),
+    OpenApiParameter(name='order[0][column]', type=int, description='Sıralama sütununun sırası'),
+    OpenApiParameter(name='order[0][dir]', type=str, description='Sıralama yönü (asc, desc)'),
+]
+
+
+def _int_param(params, name, default):
+    """Sorgu parametresini negatif olmayan tam sayıya çevirir; geçersizse varsayılanı döndürür"""
+    try:
+        value = int(params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value >= 0 else default
+
+
+class DataTablesMixin:
+    """
+    ViewSet'lere DataTables sunucu tarafı işleme aksiyonu ekler.
+
+    ``datatables_order_fields`` sütun adını (``columns[i][data]``) sıralama
+    alanına eşler; ``datatables_search_fields`` ``icontains`` ile aranacak
+    alanlardır. Sıralama her zaman ``id`` ile tamamlanır, böylece sayfalar
+    kararlıdır.
+    """
+    datatables_order_fields = {}
+    datatables_search_fields = ()
+    datatables_default_order = ('-id',)
+
+    def datatables_queryset(self):
+        """Aranacak ve sayfalanacak temel sorgu; varsayılan olarak ``get_queryset``"""
+        return self.get_queryset()
+
+    def _datatables_ordering(self, params):
+        ordering = []
+        index = 0
+        while f'order[{index}][column]' in params:
+            column = params.get(f'order[{index}][column]')
+            field = self.datatables_order_fields.get(params.get(f'columns[{column}][data]'))
+            if field:
+                prefix = '-' if params.get(f'order[{index}][dir]') == 'desc' else ''
+                ordering.append(prefix + field)
+            index += 1
+        if not ordering:
+            ordering = list(self.datatables_default_order)
+        if not any(field.lstrip('-') == 'id' for field in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
+
+    @extend_schema(
+        summary="DataTables sunucu tarafı sayfası",
+        description="DataTables draw/start/length/search/order protokolüne göre tek bir sayfa döndürür.",
+        parameters=DATATABLES_PARAMETERS
+    )
+    @action(detail=False, methods=['get'])
+    def datatable(self, request):
+        """
+        DataTables sunucu tarafı işleme.
+
+        ``recordsTotal`` filtrelenmiş temel sorgunun, ``recordsFiltered``
+        arama sonrası kayıtların sayısıdır; ``data`` yalnızca istenen sayfadır.
+        """
+        params = request.query_params
+        queryset = self.datatables_queryset()
+        records_total = queryset.count()
+
+        search = params.get('search[value]', '').strip()
+        if search and self.datatables_search_fields:
+            queryset = queryset.filter(reduce(operator.or_, [
+                Q(**{f'{field}__icontains': search}) for field in self.datatables_search_fields
+            ]))
+            records_filtered = queryset.count()
+        else:
+            records_filtered = records_total
+
+        start = _int_param(params, 'start', 0)
+        length = min(_int_param(params, 'length', 10) or 10, DATATABLES_MAX_LENGTH)
+        page = queryset.order_by(*self._datatables_ordering(params))[start:start + length]
+
+        return Response({
+            'draw': _int_param(params, 'draw', 0),
+            'recordsTotal': records_total,
+            'recordsFiltered': records_filtered,
+            'data': self.get_serializer(page, many=True).data,
+        })
@@ -0,0 +1,134 @@
+"""
+Stok değiştiren endpoint'ler için ``Idempotency-Key`` desteği.
+
+İstemci aynı isteği aynı anahtarla tekrar gönderirse, ilk isteğin yanıtı
+önbellekten döndürülür ve görünüm hiç çalıştırılmaz; böylece yeniden
+denemeler ikinci bir üretim kaydı ya da uçak parçası oluşturmaz.
+
+Anahtarlar Django önbelleğinde (``IDEMPOTENCY_CACHE``) ``IDEMPOTENCY_KEY_TTL``
+saniye boyunca tutulur. Kullanıcı ve endpoint ile birlikte saklandığından
+farklı kullanıcıların anahtarları çakışmaz. Yanıtla birlikte isteğin parmak
+izi (metot, tam yol ve gövde özeti) saklanır; aynı anahtar farklı bir istekle
+kullanılırsa eski yanıt döndürülmez, 422 döner.
+
+Tekrarların süreçler arasında yakalanması için önbellek paylaşılmalıdır
+(bkz. ``production.checks``).
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.http.request import RawPostDataException
+from django.utils.http import urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+
+# İlk istek işlenirken aynı anahtarla gelen isteklere 409 döner
+IN_PROGRESS = 'in-progress'
+IN_PROGRESS_TTL = 60
+
+
+def _store():
+    return caches[getattr(settings, 'IDEMPOTENCY_CACHE', 'default')]
+
+
+def _cache_key(request, key):
+    """Kullanıcı, metot ve yol ile sınırlandırılmış kısa önbellek anahtarı"""
+    raw = f'{request.user.pk}:{request.method}:{request.path}:{key}'
+    return 'idempotency:' + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _fingerprint(request):
+    """İsteğin metot, tam yol ve gövdesinden oluşan özeti"""
+    request = getattr(request, '_request', request)
+    try:
+        body = request.body
+    except RawPostDataException:
+        # Multipart gövde CSRF kontrolünde akıştan okunmuştur; ayrıştırılmış alanlar kullanılır
+        body = urlencode(sorted(request.POST.lists()), doseq=True).encode()
+    digest = hashlib.sha256(f'{request.method}\n{request.get_full_path()}\n'.encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _serialize(response):
+    """Yanıtı önbellekte tutulacak küçük bir demete çevirir"""
+    if isinstance(response, Response):
+        return ('api', response.status_code, response.data)
+    return ('raw', response.status_code, response.content, response['Content-Type'])
+
+
+def _replay(stored):
+    """Önbellekteki yanıtı yeniden oluşturur"""
+    if stored[0] == 'api':
+        response = Response(stored[2], status=stored[1])
+    else:
+        response = HttpResponse(stored[2], status=stored[1], content_type=stored[3])
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _error(api, message, status_code):
+    if api:
+        return Response({'detail': message}, status=status_code)
+    return JsonResponse({'error': message}, status=status_code)
+
+
+def idempotent(view):
+    """
+    Görünümü ``Idempotency-Key`` başlığına duyarlı hale getirir.
+
+    Hem fonksiyon görünümlerinde hem de ViewSet aksiyonlarında kullanılabilir.
+    Başlık yoksa görünüm olduğu gibi çalışır. 5xx yanıtları saklanmaz; bu
+    durumda istemci aynı anahtarla yeniden deneyebilir.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Fonksiyon görünümünde ilk argüman, ViewSet aksiyonunda ikinci argüman istektir
+        api = not isinstance(args[0], HttpRequest)
+        request = args[1] if api else args[0]
+
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return _error(api, 'Idempotency-Key çok uzun.', status.HTTP_400_BAD_REQUEST)
+
+        store = _store()
+        cache_key = _cache_key(request, key)
+        fingerprint = _fingerprint(request)
+
+        # Anahtarı atomik olarak rezerve et; başka bir istek aldıysa saklanan yanıtı kullan
+        if not store.add(cache_key, IN_PROGRESS, IN_PROGRESS_TTL):
+            stored = store.get(cache_key)
+            if stored == IN_PROGRESS:
+                return _error(api, 'Bu Idempotency-Key ile gönderilen istek hâlâ işleniyor.', status.HTTP_409_CONFLICT)
+            if stored is not None:
+                stored_fingerprint, stored_response = stored
+                if stored_fingerprint != fingerprint:
+                    return _error(
+                        api, 'Bu Idempotency-Key farklı bir istekle kullanılmış.',
+                        status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                return _replay(stored_response)
+
+        try:
+            response = view(*args, **kwargs)
+        except Exception:
+            store.delete(cache_key)
+            raise
+
+        if response.status_code >= 500:
+            store.delete(cache_key)
+        else:
+            store.set(
+                cache_key, (fingerprint, _serialize(response)), getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+            )
+        return response
+
+    return wrapper
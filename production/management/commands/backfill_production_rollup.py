@@ -0,0 +1,23 @@
+"""
+Günlük üretim özetini (ProductionDailyRollup) Production kayıtlarından yeniden oluşturur.
+
+Özet tablosu üretim yazma yolunda artımlı güncellenir; bu komut ilk
+kurulumda, veri aktarımından ya da elle yapılan düzeltmelerden sonra
+çalıştırılır:
+
+    python manage.py backfill_production_rollup
+"""
+from django.core.management.base import BaseCommand
+
+from production.services.rollup import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = 'Günlük üretim özetini üretim kayıtlarından yeniden oluşturur.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tek INSERT ile yazılacak özet satırı sayısı')
+
+    def handle(self, *args, **options):
+        created = rebuild_rollup(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{created} günlük özet satırı oluşturuldu.'))
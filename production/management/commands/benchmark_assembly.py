@@ -0,0 +1,109 @@
+"""
+Montaj servisi için verim benchmark'ı.
+
+Her iş parçacığı kendi uçaklarına gerekli tüm parçaları ekler; tüm iş
+parçacıkları aynı parça satırlarından stok düşer. Sonunda stok düşümü,
+eklenen parça sayısı ve tamamlanan uçak sayısının tutarlı olduğu doğrulanır.
+
+Eşzamanlı yazma desteklemeyen SQLite yerine PostgreSQL üzerinde
+çalıştırılması önerilir:
+
+    python manage.py benchmark_assembly --workers 50 --aircraft 10
+"""
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from production.models import Aircraft, AircraftPart, Part, Team, REQUIRED_PARTS
+from production.services.assembly import add_part_to_aircraft
+from production.services.stock import live_stock
+
+
+class Command(BaseCommand):
+    help = 'Eşzamanlı uçak montajında verimi ölçer ve stok tutarlılığını doğrular.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=50, help='Eşzamanlı iş parçacığı sayısı')
+        parser.add_argument('--aircraft', type=int, default=10, help='İş parçacığı başına monte edilecek uçak sayısı')
+        parser.add_argument('--aircraft-type', default='TB2', help='Monte edilecek uçak tipi')
+        parser.add_argument('--keep', action='store_true', help='Benchmark verilerini silme')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        per_worker = options['aircraft']
+        aircraft_type = options['aircraft_type']
+        required = REQUIRED_PARTS[aircraft_type]
+        total_aircraft = workers * per_worker
+
+        user = User.objects.create_user(username=f'benchmark-{time.time_ns()}')
+        team = Team.objects.create(name=f'Benchmark {user.username}', team_type='ASSEMBLY')
+        team.members.add(user)
+        parts = {
+            team_type: Part.objects.create(
+                team_type=team_type, aircraft_type=aircraft_type,
+                stock=count * total_aircraft, minimum_stock=0
+            )
+            for team_type, count in required.items()
+        }
+        aircraft_ids = [
+            Aircraft.objects.create(aircraft_type=aircraft_type, assembly_team=team, created_by=user).pk
+            for _ in range(total_aircraft)
+        ]
+
+        barrier = threading.Barrier(workers)
+        lock = threading.Lock()
+        results = {'added': 0, 'errors': 0}
+
+        def worker(ids):
+            added = errors = 0
+            try:
+                barrier.wait()
+                for aircraft in Aircraft.objects.filter(pk__in=ids):
+                    for part in parts.values():
+                        try:
+                            add_part_to_aircraft(aircraft, part, user)
+                            added += 1
+                        except Exception:
+                            errors += 1
+            finally:
+                connection.close()
+                with lock:
+                    results['added'] += added
+                    results['errors'] += errors
+
+        threads = [
+            threading.Thread(target=worker, args=(aircraft_ids[i * per_worker:(i + 1) * per_worker],))
+            for i in range(workers)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        consumed = sum(count * total_aircraft - live_stock(part) for part, count in zip(parts.values(), required.values()))
+        recorded = AircraftPart.objects.filter(aircraft_id__in=aircraft_ids).count()
+        completed = Aircraft.objects.filter(pk__in=aircraft_ids, completed_at__isnull=False).count()
+
+        self.stdout.write(
+            f"{workers} iş parçacığı x {per_worker} uçak: {results['added']} parça eklendi, "
+            f"{results['errors']} hatalı, {elapsed:.2f} sn, "
+            f"{results['added'] / elapsed if elapsed else 0:.0f} ekleme/sn"
+        )
+        self.stdout.write(f"Stok düşümü: {consumed}, eklenen parça: {recorded}, tamamlanan uçak: {completed}")
+
+        if not options['keep']:
+            AircraftPart.objects.filter(aircraft_id__in=aircraft_ids).delete()
+            Aircraft.objects.filter(pk__in=aircraft_ids).delete()
+            for part in parts.values():
+                part.delete()
+            team.delete()
+            user.delete()
+
+        if consumed != recorded or recorded != results['added']:
+            raise CommandError('Stok tutarsızlığı: düşülen stok ile eklenen parça sayısı farklı.')
+        self.stdout.write(self.style.SUCCESS('Stok ve montaj kayıtları tutarlı.'))
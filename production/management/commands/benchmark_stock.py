@@ -0,0 +1,123 @@
+"""
+Stok servisi için eşzamanlılık benchmark'ı.
+
+Çok sayıda iş parçacığı aynı parça için aynı anda üretim kaydı oluşturur;
+``--assemblers`` verilirse iş parçacıklarının bir kısmı aynı anda montaj
+için stoktan düşer. Sonunda parça stoğunun başarılı işlemlerle tam olarak
+tutarlı olduğu (kayıp veya çift değişiklik olmadığı) doğrulanır.
+
+``--compare`` tek satırlı stok ile ``--shards`` kadar sayaçlı stok
+modunu aynı yük altında art arda çalıştırıp verimi karşılaştırır.
+Eşzamanlı yazma desteklemeyen SQLite yerine PostgreSQL üzerinde
+çalıştırılması önerilir:
+
+    python manage.py benchmark_stock --workers 50 --requests 20 --assemblers 10 --compare
+"""
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from production.models import Part, Production, Team
+from production.services.stock import decrease_stock, live_stock, record_production
+
+
+class Command(BaseCommand):
+    help = 'Eşzamanlı üretim ve montajda stok değişikliklerinin kaybolmadığını ölçer ve doğrular.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=50, help='Eşzamanlı iş parçacığı sayısı')
+        parser.add_argument('--requests', type=int, default=20, help='İş parçacığı başına işlem sayısı')
+        parser.add_argument('--quantity', type=int, default=1, help='Her üretim kaydının miktarı')
+        parser.add_argument('--assemblers', type=int, default=0, help='Montaj için stoktan düşen iş parçacığı sayısı')
+        parser.add_argument('--shards', type=int, default=0, help='Stok sayacı sayısı (0: tek satır)')
+        parser.add_argument('--compare', action='store_true', help='Tek satır ve sayaçlı modu karşılaştır')
+        parser.add_argument('--keep', action='store_true', help='Benchmark verilerini silme')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            shards = options['shards'] or 16
+            single = self.run(options, shards=0)
+            sharded = self.run(options, shards=shards)
+            self.stdout.write(
+                f"Tek satır: {single:.0f} işlem/sn, {shards} sayaç: {sharded:.0f} işlem/sn "
+                f"({sharded / single if single else 0:.2f}x)"
+            )
+        else:
+            self.run(options, shards=options['shards'])
+
+    def run(self, options, shards):
+        """Tek bir benchmark turu çalıştırır ve saniyedeki başarılı işlem sayısını döndürür"""
+        workers = options['workers']
+        assemblers = min(options['assemblers'], workers)
+        per_worker = options['requests']
+        quantity = options['quantity']
+
+        user = User.objects.create_user(username=f'benchmark-{time.time_ns()}')
+        team = Team.objects.create(name=f'Benchmark {user.username}', team_type='BODY')
+        team.members.add(user)
+        # Montajcıların hiç beklemeden stok bulabilmesi için başlangıç stoğu
+        opening = assemblers * per_worker
+        part = Part.objects.create(
+            team_type='BODY', aircraft_type='TB2', stock=opening, minimum_stock=0, stock_shards=shards
+        )
+
+        barrier = threading.Barrier(workers)
+        lock = threading.Lock()
+        results = {'produced': 0, 'assembled': 0, 'errors': 0}
+
+        def worker(assembler):
+            produced = assembled = errors = 0
+            try:
+                barrier.wait()
+                for _ in range(per_worker):
+                    try:
+                        if assembler:
+                            decrease_stock(Part(pk=part.pk, stock_shards=shards), 1)
+                            assembled += 1
+                        else:
+                            record_production(Team(pk=team.pk), Part(pk=part.pk, stock_shards=shards), quantity, user)
+                            produced += 1
+                    except Exception:
+                        errors += 1
+            finally:
+                connection.close()
+                with lock:
+                    results['produced'] += produced
+                    results['assembled'] += assembled
+                    results['errors'] += errors
+
+        threads = [threading.Thread(target=worker, args=(i < assemblers,)) for i in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        stock = live_stock(part)
+        recorded = Production.objects.filter(part=part).aggregate(total=Sum('quantity'))['total'] or 0
+        expected = opening + results['produced'] * quantity - results['assembled']
+        throughput = (results['produced'] + results['assembled']) / elapsed if elapsed else 0
+
+        mode = f'{shards} sayaç' if shards else 'tek satır'
+        self.stdout.write(
+            f"[{mode}] {workers} iş parçacığı ({assemblers} montaj) x {per_worker} istek: "
+            f"{results['produced']} üretim, {results['assembled']} montaj, "
+            f"{results['errors']} hatalı, {elapsed:.2f} sn, {throughput:.0f} işlem/sn"
+        )
+        self.stdout.write(f"Beklenen stok: {expected}, gerçek stok: {stock}, üretim toplamı: {recorded}")
+
+        if not options['keep']:
+            Production.objects.filter(part=part).delete()
+            part.delete()
+            team.delete()
+            user.delete()
+
+        if stock != expected or recorded != results['produced'] * quantity:
+            raise CommandError('Stok tutarsızlığı: kayıp veya çift değişiklik tespit edildi.')
+        self.stdout.write(self.style.SUCCESS('Kayıp veya çift değişiklik yok.'))
+        return throughput
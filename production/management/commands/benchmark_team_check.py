@@ -0,0 +1,80 @@
+"""
+TeamCheckMiddleware için istek başına sorgu sayısı benchmark'ı.
+
+Aynı kullanıcı ve oturumla middleware iki durumda çağrılır:
+
+- ``before``: eski davranış; her istekte takım üyeliği veritabanından okunur.
+- ``after``: oturumdaki imzalı takım kontrolü bayrağı ve üyelik sürüm damgası.
+
+Her iki durum için istek başına sorgu sayısı ve süre yazdırılır:
+
+    python manage.py benchmark_team_check --requests 1000
+"""
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from production.models import Team
+from production.services.membership import refresh_team_check
+from production.views import TeamCheckMiddleware
+
+
+class LegacyTeamCheckMiddleware(TeamCheckMiddleware):
+    """Karşılaştırma için her istekte takım sorgusu çalıştıran eski kontrol"""
+
+    def __call__(self, request):
+        if request.user.is_authenticated and not request.user.is_superuser:
+            if not request.path.startswith('/admin/'):
+                if not Team.objects.filter(members=request.user).first():
+                    return HttpResponse(status=302)
+        return self.get_response(request)
+
+
+class Command(BaseCommand):
+    help = 'TeamCheckMiddleware için istek başına sorgu sayısını eski kontrolle karşılaştırır.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='Her durum için istek sayısı')
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        user = User.objects.create_user(username=f'benchmark-{time.time_ns()}')
+        team = Team.objects.create(name=f'Benchmark {user.username}', team_type='ASSEMBLY')
+        team.members.add(user)
+
+        # Gerçek isteklerde oturum kimlik doğrulama middleware'inde zaten yüklenmiştir
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        factory = RequestFactory()
+
+        def make_request():
+            request = factory.get('/api/aircraft/')
+            request.user = user
+            request.session = session
+            return request
+
+        refresh_team_check(make_request())
+        session.save()
+
+        try:
+            for label, middleware_class in (('before', LegacyTeamCheckMiddleware), ('after', TeamCheckMiddleware)):
+                middleware = middleware_class(lambda request: HttpResponse())
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for _ in range(count):
+                        middleware(make_request())
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{label}: {len(queries) / count:.2f} sorgu/istek, '
+                    f'{elapsed / count * 1_000_000:.1f} µs/istek ({count} istek)'
+                )
+        finally:
+            session.delete()
+            team.delete()
+            user.delete()
@@ -0,0 +1,23 @@
+"""
+Bekleyen stok hareketlerini ve stok sayaçlarını Part.stock anlık görüntüsüne katlar.
+
+Periyodik olarak (ör. cron ile her dakika) çalıştırılması amaçlanmıştır:
+
+    python manage.py compact_stock_ledger
+"""
+from django.core.management.base import BaseCommand
+
+from production.services.stock import compact_stock, fold_shards
+
+
+class Command(BaseCommand):
+    help = 'Bekleyen stok hareketlerini ve stok sayaçlarını parça stoklarına katlar.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--part', type=int, action='append', dest='parts', help='Sadece bu parça(lar)ı sıkıştır')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Tek işlemde katlanacak en fazla hareket sayısı')
+
+    def handle(self, *args, **options):
+        folded = compact_stock(part_ids=options['parts'], batch_size=options['batch_size'])
+        shards = fold_shards(part_ids=options['parts'])
+        self.stdout.write(self.style.SUCCESS(f'{folded} stok hareketi ve {shards} stok sayacı stoğa katlandı.'))
@@ -0,0 +1,22 @@
+"""
+Uçakların parça sayaçlarını ve tamamlanma durumunu AircraftPart kayıtlarından yeniden hesaplar.
+
+Veri aktarımından ya da elle yapılan veritabanı düzeltmelerinden sonra
+çalıştırılması amaçlanmıştır:
+
+    python manage.py rebuild_aircraft_part_counts
+"""
+from django.core.management.base import BaseCommand
+
+from production.services.assembly import rebuild_part_counts
+
+
+class Command(BaseCommand):
+    help = 'Uçakların takım tipine göre parça sayaçlarını toplu olarak yeniden hesaplar.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--aircraft', type=int, action='append', dest='aircraft', help='Sadece bu uçak(lar)ı yeniden hesapla')
+
+    def handle(self, *args, **options):
+        updated = rebuild_part_counts(options['aircraft'])
+        self.stdout.write(self.style.SUCCESS(f'{updated} uçağın parça sayaçları yeniden hesaplandı.'))
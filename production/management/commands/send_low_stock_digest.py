@@ -0,0 +1,19 @@
+"""
+Düşük stok özetini takım tipi başına tek e-posta olarak kuyruğa ekler.
+
+``LOW_STOCK_ALERT_MODE = 'digest'`` ayarında periyodik olarak (ör. saatlik)
+çalıştırılması amaçlanmıştır:
+
+    python manage.py send_low_stock_digest
+"""
+from django.core.management.base import BaseCommand
+
+from production.services.alerts import send_low_stock_digest
+
+
+class Command(BaseCommand):
+    help = 'Düşük stoğa geçen parçaların özetini takım tipi başına tek e-posta olarak kuyruğa ekler.'
+
+    def handle(self, *args, **options):
+        sent = send_low_stock_digest()
+        self.stdout.write(self.style.SUCCESS(f'{sent} düşük stok özeti kuyruğa eklendi.'))
@@ -0,0 +1,48 @@
+"""
+Bildirim kuyruğundaki e-postaları gönderir.
+
+Tek seferlik çalıştırma (ör. cron ile her dakika):
+
+    python manage.py send_outbox
+
+Sürekli çalışan işçi olarak:
+
+    python manage.py send_outbox --loop --interval 5
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from production.services.outbox import send_pending
+
+
+class Command(BaseCommand):
+    help = 'Bildirim kuyruğundaki e-postaları toplu olarak ve tek SMTP bağlantısıyla gönderir.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Tek bağlantıda gönderilecek en fazla e-posta')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Başarısız sayılmadan önceki deneme sayısı')
+        parser.add_argument('--backoff', type=int, default=60, help='İlk yeniden deneme gecikmesi (saniye), her denemede iki katına çıkar')
+        parser.add_argument('--loop', action='store_true', help='Kuyruğu sürekli izle')
+        parser.add_argument('--interval', type=float, default=5, help='Kuyruk boşken bekleme süresi (saniye)')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_pending(
+                batch_size=options['batch_size'],
+                max_attempts=options['max_attempts'],
+                backoff=options['backoff'],
+            )
+            total_sent += sent
+            total_failed += failed
+
+            # Parti doluysa kuyrukta daha fazlası olabilir; beklemeden devam et.
+            # Hiçbiri gönderilemediyse (ör. SMTP kesintisi) sonraki partiye geçmeden beklenir.
+            if sent and sent + failed >= options['batch_size']:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'{total_sent} e-posta gönderildi, {total_failed} gönderim başarısız.'))
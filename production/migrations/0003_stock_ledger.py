@@ -0,0 +1,47 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_opening_balances(apps, schema_editor):
+    """Mevcut stokları açılış düzeltmesi olarak deftere yaz"""
+    Part = apps.get_model('production', 'Part')
+    StockMovement = apps.get_model('production', 'StockMovement')
+    StockMovement.objects.bulk_create([
+        StockMovement(part_id=part_id, delta=stock, reason='ADJUSTMENT', applied=True)
+        for part_id, stock in Part.objects.filter(stock__gt=0).values_list('id', 'stock')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0002_aircraftpart_production__aircraf_e787d2_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='part',
+            name='stock_snapshot_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Stok Anlık Görüntü Tarihi'),
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField(verbose_name='Miktar Değişimi')),
+                ('reason', models.CharField(choices=[('PRODUCTION', 'Üretim'), ('ASSEMBLY', 'Montaj'), ('DISASSEMBLY', 'Söküm'), ('ADJUSTMENT', 'Düzeltme')], max_length=20, verbose_name='Neden')),
+                ('applied', models.BooleanField(default=False, verbose_name='Stoğa İşlendi mi?')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='production.part', verbose_name='Parça')),
+            ],
+            options={
+                'verbose_name': 'Stok Hareketi',
+                'verbose_name_plural': 'Stok Hareketleri',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['part', 'created_at'], name='production__part_id_1537fb_idx'), models.Index(condition=models.Q(('applied', False)), fields=['part'], name='stockmovement_pending_idx')],
+            },
+        ),
+        migrations.RunPython(create_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0003_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='part',
+            name='stock_shards',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Yoğun yazılan parçalar için stok bu kadar sayaç satırına dağıtılır (0: kapalı).', verbose_name='Stok Sayacı Sayısı'),
+        ),
+        migrations.CreateModel(
+            name='StockShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField(verbose_name='Sayaç No')),
+                ('count', models.IntegerField(default=0, verbose_name='Miktar')),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='production.part', verbose_name='Parça')),
+            ],
+            options={
+                'verbose_name': 'Stok Sayacı',
+                'verbose_name_plural': 'Stok Sayaçları',
+                'unique_together': {('part', 'index')},
+            },
+        ),
+    ]
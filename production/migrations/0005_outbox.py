@@ -0,0 +1,36 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0004_stock_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='Konu')),
+                ('body', models.TextField(verbose_name='İçerik')),
+                ('from_email', models.CharField(max_length=255, verbose_name='Gönderen')),
+                ('recipients', models.JSONField(default=list, verbose_name='Alıcılar')),
+                ('status', models.CharField(choices=[('PENDING', 'Bekliyor'), ('SENT', 'Gönderildi'), ('FAILED', 'Başarısız')], default='PENDING', max_length=20, verbose_name='Durum')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Deneme Sayısı')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Sonraki Deneme')),
+                ('last_error', models.TextField(blank=True, verbose_name='Son Hata')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Gönderilme Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Bildirim',
+                'verbose_name_plural': 'Bildirim Kuyruğu',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='production__status_faf8c1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:47
+
+from django.db import migrations, models
+
+
+def mark_current_low_stock_alerted(apps, schema_editor):
+    """Zaten düşük stokta olan parçalar için geçiş olmadığından uyarı tekrar gönderilmez"""
+    Part = apps.get_model('production', 'Part')
+    Part.objects.filter(is_low_stock=True).update(low_stock_alerted=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0005_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='part',
+            name='low_stock_alerted',
+            field=models.BooleanField(default=False, verbose_name='Düşük Stok Uyarısı Verildi mi?'),
+        ),
+        migrations.AddField(
+            model_name='part',
+            name='low_stock_alerted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Son Düşük Stok Uyarısı'),
+        ),
+        migrations.AddField(
+            model_name='part',
+            name='low_stock_digest_pending',
+            field=models.BooleanField(default=False, verbose_name='Özette Bildirilecek mi?'),
+        ),
+        migrations.RunPython(mark_current_low_stock_alerted, migrations.RunPython.noop),
+    ]
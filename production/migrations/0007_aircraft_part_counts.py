@@ -0,0 +1,47 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:52
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_part_counts(apps, schema_editor):
+    """Mevcut uçakların parça sayaçlarını AircraftPart kayıtlarından doldur"""
+    Aircraft = apps.get_model('production', 'Aircraft')
+    AircraftPart = apps.get_model('production', 'AircraftPart')
+    fields = {'BODY': 'body_count', 'WING': 'wing_count', 'TAIL': 'tail_count', 'AVIONICS': 'avionics_count'}
+    rows = AircraftPart.objects.values('aircraft_id', 'part__team_type').annotate(count=Count('id')).order_by()
+    for row in rows:
+        field = fields.get(row['part__team_type'])
+        if field:
+            Aircraft.objects.filter(pk=row['aircraft_id']).update(**{field: row['count']})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0006_low_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aircraft',
+            name='avionics_count',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Aviyonik Parça Sayısı'),
+        ),
+        migrations.AddField(
+            model_name='aircraft',
+            name='body_count',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Gövde Parça Sayısı'),
+        ),
+        migrations.AddField(
+            model_name='aircraft',
+            name='tail_count',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Kuyruk Parça Sayısı'),
+        ),
+        migrations.AddField(
+            model_name='aircraft',
+            name='wing_count',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Kanat Parça Sayısı'),
+        ),
+        migrations.RunPython(fill_part_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0007_aircraft_part_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aircraft',
+            index=models.Index(fields=['created_at'], name='production__created_7d8d1e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aircraft',
+            index=models.Index(fields=['completed_at'], name='production__complet_a7f73a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aircraft',
+            index=models.Index(fields=['aircraft_type'], name='production__aircraf_fb3bfd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['name'], name='production__name_a71835_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['team_type'], name='production__team_ty_d7d8e1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['created_at'], name='production__created_d92d7d_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0008_datatables_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aircraftpart',
+            index=models.Index(fields=['aircraft', 'added_at', 'id'], name='production__aircraf_dcba6a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='production',
+            index=models.Index(fields=['team', 'created_at', 'id'], name='production__team_id_f509bd_idx'),
+        ),
+    ]
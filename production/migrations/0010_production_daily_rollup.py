@@ -0,0 +1,53 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+
+
+def fill_rollup(apps, schema_editor):
+    """Mevcut üretim kayıtlarından günlük özeti oluştur"""
+    Production = apps.get_model('production', 'Production')
+    ProductionDailyRollup = apps.get_model('production', 'ProductionDailyRollup')
+    rows = (
+        Production.objects.annotate(day=TruncDate('created_at'))
+        .values('team_id', 'part_id', 'day')
+        .annotate(total=Sum('quantity'))
+        .order_by()
+    )
+    ProductionDailyRollup.objects.bulk_create(
+        [
+            ProductionDailyRollup(team_id=row['team_id'], part_id=row['part_id'], day=row['day'], quantity=row['total'])
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0009_history_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductionDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Gün')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Miktar')),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='production.part', verbose_name='Üretilen Parça')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='production.team', verbose_name='Üretici Takım')),
+            ],
+            options={
+                'verbose_name': 'Günlük Üretim Özeti',
+                'verbose_name_plural': 'Günlük Üretim Özetleri',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day'], name='production__day_14f147_idx'), models.Index(fields=['team', 'day'], name='production__team_id_6c9247_idx')],
+                'unique_together': {('team', 'part', 'day')},
+            },
+        ),
+        migrations.RunPython(fill_rollup, migrations.RunPython.noop),
+    ]
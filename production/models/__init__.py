@@ -1,7 +1,9 @@
 from .team import Team
 from .part import Part
 from .aircraft import Aircraft, AircraftPart
-from .production import Production
-from .constants import TEAM_TYPES, AIRCRAFT_TYPES, REQUIRED_PARTS
+from .production import Production, ProductionDailyRollup
+from .stock import StockMovement, StockShard
+from .outbox import OutboxEmail
+from .constants import TEAM_TYPES, AIRCRAFT_TYPES, REQUIRED_PARTS, STOCK_MOVEMENT_REASONS, OUTBOX_STATUSES, PART_COUNT_FIELDS
 
-__all__ = ['Team', 'Part', 'Aircraft', 'AircraftPart', 'Production', 'TEAM_TYPES', 'AIRCRAFT_TYPES', 'REQUIRED_PARTS'] 
\ No newline at end of file
+__all__ = ['Team', 'Part', 'Aircraft', 'AircraftPart', 'Production', 'ProductionDailyRollup', 'StockMovement', 'StockShard', 'OutboxEmail', 'TEAM_TYPES', 'AIRCRAFT_TYPES', 'REQUIRED_PARTS', 'STOCK_MOVEMENT_REASONS', 'OUTBOX_STATUSES', 'PART_COUNT_FIELDS'] 
\ No newline at end of file
@@ -1,11 +1,58 @@
-from django.db import models
+import operator
+from functools import reduce
+
+from django.db import models, transaction
+from django.db.models import Case, ExpressionWrapper, F, Q, Value, When
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from .constants import AIRCRAFT_TYPES, TEAM_TYPES, REQUIRED_PARTS
+from .constants import AIRCRAFT_TYPES, TEAM_TYPES, REQUIRED_PARTS, PART_COUNT_FIELDS
 from .team import Team
 from .part import Part
 
+class AircraftQuerySet(models.QuerySet):
+    def with_completion(self):
+        """
+        Tamamlanma yüzdesini tek sorguda hesaplar.
+
+        ``current_parts_total`` uçak satırındaki parça sayaçlarının toplamı,
+        ``required_parts_total`` uçak tipinin ``REQUIRED_PARTS`` toplamıdır;
+        ``completion_percentage`` ikisinin yüzde oranıdır.
+        """
+        current = reduce(operator.add, [F(field) for field in PART_COUNT_FIELDS.values()])
+        required = Case(
+            *[
+                When(aircraft_type=aircraft_type, then=Value(sum(parts.values())))
+                for aircraft_type, parts in REQUIRED_PARTS.items()
+            ],
+            default=Value(0),
+            output_field=models.IntegerField(),
+        )
+        return self.annotate(
+            current_parts_total=ExpressionWrapper(current, output_field=models.IntegerField()),
+            required_parts_total=required,
+        ).annotate(
+            completion_percentage=Case(
+                When(required_parts_total__gt=0, then=F('current_parts_total') * 100 / F('required_parts_total')),
+                default=Value(0),
+                output_field=models.IntegerField(),
+            )
+        )
+
+    def visible_to(self, user, team):
+        """
+        Kullanıcının görebileceği uçaklarla sınırlar.
+
+        Süper kullanıcı ve personel tüm uçakları görür; montaj takımı üyeleri
+        kendi uçaklarını ve henüz bir takıma atanmamış uçakları görür. Uçak
+        listesi sayfası ile ``AircraftViewSet`` aynı kuralı buradan kullanır.
+        """
+        if user.is_superuser or user.is_staff:
+            return self
+        if team and team.team_type == 'ASSEMBLY':
+            return self.filter(Q(assembly_team=team) | Q(assembly_team__isnull=True))
+        return self
+
 class Aircraft(models.Model):
     aircraft_type = models.CharField(max_length=20, choices=AIRCRAFT_TYPES, verbose_name='Hava Aracı Tipi')
     assembly_team = models.ForeignKey(Team, on_delete=models.PROTECT, limit_choices_to={'team_type': 'ASSEMBLY'}, verbose_name='Montaj Takımı', null=True, blank=True)
@@ -14,11 +61,24 @@ class Aircraft(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')
     completed_at = models.DateTimeField(null=True, blank=True, verbose_name='Tamamlanma Tarihi')
     created_by = models.ForeignKey(User, on_delete=models.PROTECT, related_name='created_aircrafts', verbose_name='Oluşturan', null=True, blank=True)
+    # Takım tipine göre eklenmiş parça sayaçları; montaj ve söküm yollarında F() ile güncellenir
+    body_count = models.PositiveSmallIntegerField(default=0, verbose_name='Gövde Parça Sayısı')
+    wing_count = models.PositiveSmallIntegerField(default=0, verbose_name='Kanat Parça Sayısı')
+    tail_count = models.PositiveSmallIntegerField(default=0, verbose_name='Kuyruk Parça Sayısı')
+    avionics_count = models.PositiveSmallIntegerField(default=0, verbose_name='Aviyonik Parça Sayısı')
+
+    objects = AircraftQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Hava Aracı'
         verbose_name_plural = 'Hava Araçları'
         ordering = ['-created_at']
+        # Sunucu tarafı tablo sıralamasında kullanılan alanlar
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['completed_at']),
+            models.Index(fields=['aircraft_type']),
+        ]
 
     def __str__(self):
         created_at_str = self.created_at.strftime('%d.%m.%Y') if self.created_at else "Tarih Yok"
@@ -32,20 +92,42 @@ class Aircraft(models.Model):
     def save(self, *args, **kwargs):
         # Yeni kayıt mı kontrol et
         is_new = self.pk is None
+        update_fields = kwargs.get('update_fields')
         
-        # Tamamlanma durumunu kontrol et
-        self.is_complete = self.check_completion_status()
-        
-        # Önce kaydet
-        super().save(*args, **kwargs)
-        
-        # Tamamlanma durumunu kontrol et ve completed_at alanını güncelle
-        if self.is_complete and not self.completed_at:
-            self.completed_at = timezone.now()
-            super().save(update_fields=['completed_at'])
-        elif not self.is_complete and self.completed_at:
-            self.completed_at = None
-            super().save(update_fields=['completed_at'])
+        with transaction.atomic(savepoint=False):
+            # Bellekteki sayaçlar bayat olabilir (ör. parçalar eklenmeden önce yüklenmiş bir form);
+            # tamamlanma alanları yazılacaksa sayaçlar ve completed_at veritabanından kilitlenerek okunur
+            if not is_new and (update_fields is None or {'is_complete', 'completed_at'} & set(update_fields)):
+                current = Aircraft.objects.select_for_update().filter(pk=self.pk).values(
+                    'completed_at', *PART_COUNT_FIELDS.values()
+                ).first()
+                for field, value in (current or {}).items():
+                    setattr(self, field, value)
+            
+            # Tamamlanma durumunu sayaçlardan hesapla ve completed_at alanını aynı kayıtta güncelle
+            self.is_complete = self.check_completion_status()
+            if self.is_complete and not self.completed_at:
+                self.completed_at = timezone.now()
+            elif not self.is_complete and self.completed_at:
+                self.completed_at = None
+            
+            # Parça sayaçları yalnızca F() UPDATE'leriyle yazılır
+            if not is_new and update_fields is None:
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in PART_COUNT_FIELDS.values()
+                ]
+            
+            super().save(*args, **kwargs)
+
+    def part_count(self, team_type):
+        """Verilen takım tipinden eklenmiş parça sayısını döndürür"""
+        return getattr(self, PART_COUNT_FIELDS[team_type])
+
+    @property
+    def part_counts(self):
+        """Takım tipine göre eklenmiş parça sayılarını döndürür (sorgu çalıştırmaz)"""
+        return {team_type: self.part_count(team_type) for team_type in REQUIRED_PARTS[self.aircraft_type]}
 
     def check_completion_status(self):
         """Tüm gerekli parçalar eklenmiş mi kontrol et"""
@@ -53,14 +135,10 @@ class Aircraft(models.Model):
             return False
         
         # Her parça tipi için gereken sayıda parça var mı kontrol et
-        required_parts = REQUIRED_PARTS[self.aircraft_type]
-        
-        for team_type, required_count in required_parts.items():
-            current_count = self.parts.filter(team_type=team_type).count()
-            if current_count < required_count:
-                return False
-        
-        return True
+        return all(
+            self.part_count(team_type) >= required_count
+            for team_type, required_count in REQUIRED_PARTS[self.aircraft_type].items()
+        )
 
     @property
     def required_parts(self):
@@ -74,7 +152,7 @@ class Aircraft(models.Model):
         required_parts = REQUIRED_PARTS[self.aircraft_type]
         
         for team_type, required_count in required_parts.items():
-            current_count = self.parts.filter(team_type=team_type).count()
+            current_count = self.part_count(team_type)
             if current_count < required_count:
                 missing_count = required_count - current_count
                 part_type = dict(TEAM_TYPES).get(team_type)
@@ -93,11 +171,7 @@ class Aircraft(models.Model):
         
         """Eksik parçaların takım tipine göre sözlüğünü döndür"""
         required = REQUIRED_PARTS[self.aircraft_type]
-        current = {team_type: 0 for team_type in required}
-        
-        for part in self.parts.all():
-            if part.team_type in current:
-                current[part.team_type] += 1
+        current = self.part_counts
         
         missing = {}
         for team_type, required_count in required.items():
@@ -107,52 +181,22 @@ class Aircraft(models.Model):
         
         return missing
 
-    def can_add_part(self, part):
-        """Bir parçanın bu uçağa eklenip eklenemeyeceğini kontrol eder"""
-        # Parça uçak tipiyle uyumlu mu?
-        if not part.is_compatible_with_aircraft(self):
-            return False, f'Bu parça {self.get_aircraft_type_display()} tipi ile uyumlu değil.'
-        
-        # Parçanın stoku var mı?
-        if part.stock <= 0:
-            return False, f'Bu parçanın stokta yeterli miktarı yok.'
-        
-        # Bu tipte daha fazla parça eklenebilir mi?
-        required = REQUIRED_PARTS[self.aircraft_type][part.team_type]
-        current = self.parts.filter(team_type=part.team_type).count()
-        
-        if current >= required:
-            return False, f'Bu uçak için yeterli sayıda {part.get_team_type_display()} parçası zaten eklenmiş.'
-        
-        return True, None
-
     def add_part(self, part, added_by):
         """Validasyon ile uçağa parça ekler"""
-        can_add, error = self.can_add_part(part)
-        if not can_add:
-            raise ValidationError(error)
-        
-        # Uçak parçası oluştur ve stoktan düş
-        aircraft_part = AircraftPart.objects.create(
-            aircraft=self,
-            part=part,
-            added_by=added_by
-        )
-        
-        # Uçağın tamamlanma durumunu kontrol et
-        self.is_complete = self.check_completion_status()
-        if self.is_complete and not self.completed_at:
-            self.completed_at = timezone.now()
-            self.save()
-        
-        return aircraft_part
+        # Kilitleme, stok düşümü ve tamamlanma kontrolü tek işlemde montaj servisinde yapılır
+        from ..services.assembly import add_part_to_aircraft
+        return add_part_to_aircraft(self, part, added_by)
+
+    def save_completion(self):
+        """Tamamlanma alanlarını yeniden sayım yapmadan tek UPDATE ile yazar"""
+        super().save(update_fields=['is_complete', 'completed_at'])
 
     def delete(self, *args, **kwargs):
-        # Silmeden önce tüm parçaları stoğa geri döndür
-        for aircraft_part in self.aircraft_parts.all():
-            # AircraftPart.delete metodu parçayı stoğa geri döndürecek
-            aircraft_part.delete()
-        super().delete(*args, **kwargs)
+        # Silmeden önce tüm parçaları tek seferde stoğa geri döndür
+        from ..services.assembly import disassemble
+        with transaction.atomic():
+            disassemble([self.pk])
+            return super().delete(*args, **kwargs)
 
 
 class AircraftPart(models.Model):
@@ -169,6 +213,8 @@ class AircraftPart(models.Model):
         indexes = [
             models.Index(fields=['aircraft', 'part']),
             models.Index(fields=['added_at']),
+            # Uçak üretim geçmişinin (added_at, id) imleç sayfalaması için
+            models.Index(fields=['aircraft', 'added_at', 'id']),
         ]
 
     def __str__(self):
@@ -179,8 +225,8 @@ class AircraftPart(models.Model):
         if self.part and self.aircraft and self.part.aircraft_type != self.aircraft.aircraft_type:
             raise ValidationError({'part': f'Bu parça {self.aircraft.get_aircraft_type_display()} tipi için uygun değil.'})
         
-        # Stok kontrolü
-        if self.part and self.part.stock <= 0:
+        # Stok kontrolü: sayaçlar ve bekleyen hareketler dahil anlık stok
+        if self.part and self.part.available_stock <= 0:
             raise ValidationError({'part': f'{self.part.name} parçasının stokta yeterli miktarı yok.'})
 
     def save(self, *args, **kwargs):
@@ -190,16 +236,22 @@ class AircraftPart(models.Model):
         # Kaydet
         super().save(*args, **kwargs)
         
-        # Yeni kayıtsa stoktan düş
-        if is_new:
+        # Yeni kayıtsa stoktan düş (montaj servisi stoğu ve sayacı önceden güncellemişse atla)
+        if is_new and not getattr(self, '_stock_reserved', False):
             try:
-                self.part.decrease_stock(1)
+                self.part.decrease_stock(1, reason='ASSEMBLY')
             except ValidationError as e:
                 # Stok hatası durumunda kaydı sil ve hatayı yeniden yükselt
-                self.delete()
+                super().delete()
                 raise e
+            
+            from ..services.assembly import adjust_part_count
+            adjust_part_count(self.aircraft, self.part.team_type, 1)
 
     def delete(self, *args, **kwargs):
-        # Parça silindiğinde stoğu artır
-        self.part.increase_stock(1)
-        super().delete(*args, **kwargs) 
\ No newline at end of file
+        # Parça silindiğinde stoğu artır ve uçağın parça sayacını düş
+        self.part.increase_stock(1, reason='DISASSEMBLY')
+        super().delete(*args, **kwargs)
+        
+        from ..services.assembly import adjust_part_count
+        adjust_part_count(self.aircraft, self.part.team_type, -1) 
\ No newline at end of file
@@ -20,4 +20,27 @@ REQUIRED_PARTS = {
     'TB3': {'AVIONICS': 1, 'BODY': 1, 'WING': 1, 'TAIL': 1},
     'AKINCI': {'AVIONICS': 1, 'BODY': 1, 'WING': 1, 'TAIL': 1},
     'KIZILELMA': {'AVIONICS': 1, 'BODY': 1, 'WING': 1, 'TAIL': 1},
-} 
\ No newline at end of file
+}
+
+# Stok hareketi nedenleri
+STOCK_MOVEMENT_REASONS = [
+    ('PRODUCTION', 'Üretim'),
+    ('ASSEMBLY', 'Montaj'),
+    ('DISASSEMBLY', 'Söküm'),
+    ('ADJUSTMENT', 'Düzeltme'),
+]
+
+# Bildirim kuyruğu (outbox) durumları
+OUTBOX_STATUSES = [
+    ('PENDING', 'Bekliyor'),
+    ('SENT', 'Gönderildi'),
+    ('FAILED', 'Başarısız'),
+]
+
+# Uçaktaki parça sayaçlarının takım tipine göre alan adları
+PART_COUNT_FIELDS = {
+    'BODY': 'body_count',
+    'WING': 'wing_count',
+    'TAIL': 'tail_count',
+    'AVIONICS': 'avionics_count',
+}
@@ -0,0 +1,33 @@
+from django.db import models
+from django.utils import timezone
+from .constants import OUTBOX_STATUSES
+
+class OutboxEmail(models.Model):
+    """
+    Gönderilmeyi bekleyen e-posta bildirimi.
+
+    Sinyaller e-postayı doğrudan göndermek yerine bu tabloya, tetikleyen
+    yazma ile aynı işlemde ekler. ``send_outbox`` komutu kuyruğu toplu
+    olarak ve tek SMTP bağlantısı üzerinden boşaltır.
+    """
+    subject = models.CharField(max_length=255, verbose_name='Konu')
+    body = models.TextField(verbose_name='İçerik')
+    from_email = models.CharField(max_length=255, verbose_name='Gönderen')
+    recipients = models.JSONField(default=list, verbose_name='Alıcılar')
+    status = models.CharField(max_length=20, choices=OUTBOX_STATUSES, default='PENDING', verbose_name='Durum')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Deneme Sayısı')
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='Sonraki Deneme')
+    last_error = models.TextField(blank=True, verbose_name='Son Hata')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Gönderilme Tarihi')
+
+    class Meta:
+        verbose_name = 'Bildirim'
+        verbose_name_plural = 'Bildirim Kuyruğu'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.get_status_display()})"
@@ -1,7 +1,37 @@
 from django.db import models
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from .constants import TEAM_TYPES, AIRCRAFT_TYPES, REQUIRED_PARTS
 
+# Mevcut parçalarda yalnızca stok servisinin (F() UPDATE'leriyle) yazdığı alanlar
+STOCK_SERVICE_FIELDS = ('stock', 'is_low_stock', 'low_stock_alerted')
+
+class PartQuerySet(models.QuerySet):
+    def with_live_stock(self):
+        """
+        Anlık stoğu tek sorguda hesaplar.
+
+        ``Part.stock`` son sıkıştırmadaki anlık görüntüdür; henüz katlanmamış
+        stok hareketleri ve stok sayaçları ``pending_stock`` olarak eklenir ve
+        ``live_stock`` ikisinin toplamıdır.
+        """
+        from .stock import StockMovement, StockShard
+        pending = StockMovement.objects.filter(
+            part=OuterRef('pk'), applied=False
+        ).order_by().values('part').annotate(total=Sum('delta')).values('total')
+        sharded = StockShard.objects.filter(
+            part=OuterRef('pk')
+        ).order_by().values('part').annotate(total=Sum('count')).values('total')
+        return self.annotate(
+            pending_stock=(
+                Coalesce(Subquery(pending, output_field=IntegerField()), 0)
+                + Coalesce(Subquery(sharded, output_field=IntegerField()), 0)
+            ),
+        ).annotate(live_stock=F('stock') + F('pending_stock'))
+
 class Part(models.Model):
     name = models.CharField(max_length=100, verbose_name='Parça Adı')
     team_type = models.CharField(max_length=20, choices=TEAM_TYPES, verbose_name='Üretici Takım Tipi')
@@ -11,6 +41,16 @@ class Part(models.Model):
     is_low_stock = models.BooleanField(default=False, verbose_name='Düşük Stok')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Güncellenme Tarihi')
+    stock_snapshot_at = models.DateTimeField(null=True, blank=True, verbose_name='Stok Anlık Görüntü Tarihi')
+    low_stock_alerted = models.BooleanField(default=False, verbose_name='Düşük Stok Uyarısı Verildi mi?')
+    low_stock_alerted_at = models.DateTimeField(null=True, blank=True, verbose_name='Son Düşük Stok Uyarısı')
+    low_stock_digest_pending = models.BooleanField(default=False, verbose_name='Özette Bildirilecek mi?')
+    stock_shards = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Stok Sayacı Sayısı',
+        help_text='Yoğun yazılan parçalar için stok bu kadar sayaç satırına dağıtılır (0: kapalı).'
+    )
+
+    objects = PartQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Parça'
@@ -40,37 +80,91 @@ class Part(models.Model):
         # Parça adı otomatik oluşturulacak
         self.name = self.expected_name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Elle yapılan stok değişikliklerini stok hareketi olarak kaydedebilmek için
+        instance._loaded_stock = instance.__dict__.get('stock')
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or 'stock' in fields:
+            self._loaded_stock = self.stock
+
     def save(self, *args, **kwargs):
-        # Stok durumunu kontrol et ve güncelle
-        if hasattr(self, 'stock') and hasattr(self, 'minimum_stock'):
-            self.is_low_stock = self.stock < self.minimum_stock
-        
         # Parça adını otomatik oluştur
         if hasattr(self, 'team_type') and hasattr(self, 'aircraft_type'):
             self.name = self.expected_name
+        
+        if self._state.adding:
+            # Stok durumunu kontrol et
+            self.is_low_stock = self.stock < self.minimum_stock
+            if not self.is_low_stock:
+                self.low_stock_alerted = False
             
-        super().save(*args, **kwargs)
+            with transaction.atomic(savepoint=False):
+                super().save(*args, **kwargs)
+                
+                # İlk stok da bir düzeltmedir
+                if self.stock:
+                    from .stock import StockMovement
+                    StockMovement.objects.create(part=self, delta=self.stock, reason='ADJUSTMENT', applied=True)
+            self._loaded_stock = self.stock
+            return
         
-    def increase_stock(self, quantity):
-        """Parça stoğunu artır"""
-        if quantity <= 0:
-            raise ValidationError("Artırılacak miktar pozitif olmalıdır.")
+        # Güncellemede stok alanları bellekten yazılmaz; eşzamanlı F() güncellemeleri ezilmesin
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+        kwargs['update_fields'] = [field for field in update_fields if field not in STOCK_SERVICE_FIELDS]
+        
+        # Elle girilen stok mutlak değerdir; fark stok servisinde kilit altında anlık stoğa göre hesaplanır
+        loaded_stock = getattr(self, '_loaded_stock', None)
+        stock_edited = loaded_stock is not None and self.stock != loaded_stock
         
-        # UYARI: Bu metod Production.save() tarafından otomatik çağrılmamalıdır!
-        # Üretim kaydı oluştururken, Production.save() metodu direkt SQL sorgusu ile stok artırır
-        # Bu metod sadece manuel stok artırımı için kullanılmalıdır
+        with transaction.atomic(savepoint=False):
+            if stock_edited:
+                from ..services.stock import set_stock
+                set_stock(self, self.stock)
+            
+            if 'minimum_stock' in kwargs['update_fields'] or stock_edited:
+                # Düşük stok durumu yeni minimuma ve veritabanındaki stoğa göre aynı UPDATE'te hesaplanır
+                low = Q(stock__lt=self.minimum_stock)
+                Part.objects.filter(pk=self.pk).update(
+                    is_low_stock=Case(When(low, then=Value(True)), default=Value(False), output_field=models.BooleanField()),
+                    low_stock_alerted=Case(
+                        When(low, then=F('low_stock_alerted')), default=Value(False), output_field=models.BooleanField()
+                    ),
+                )
+                # Kayıt sonrası sinyaller güncel stok değerlerini görmeli
+                self.refresh_from_db(fields=list(STOCK_SERVICE_FIELDS))
+            
+            super().save(*args, **kwargs)
         
-        self.stock += quantity
-        self.save()
+    def load_live_stock(self):
+        """Bellekteki stoğu anlık stokla değiştirir; düzenleme formları anlık stoğu göstermeli"""
+        self.stock = self._loaded_stock = Part.objects.with_live_stock().values_list('live_stock', flat=True).get(pk=self.pk)
 
-    def decrease_stock(self, quantity):
+    def increase_stock(self, quantity, reason='ADJUSTMENT'):
+        """Parça stoğunu artır"""
+        # Stok değişiklikleri yalnızca stok servisi üzerinden yapılır (tek atomik UPDATE)
+        from ..services.stock import increase_stock
+        increase_stock(self, quantity, reason=reason, refresh=True)
+
+    def decrease_stock(self, quantity, reason='ADJUSTMENT'):
         """Parça stoğunu azalt"""
-        if quantity <= 0:
-            raise ValidationError("Azaltılacak miktar pozitif olmalıdır.")
-        if self.stock < quantity:
-            raise ValidationError(f"Stokta yeterli {self.name} parçası yok. Mevcut: {self.stock}, İstenen: {quantity}")
-        self.stock -= quantity
-        self.save()
+        from ..services.stock import decrease_stock
+        decrease_stock(self, quantity, reason=reason, refresh=True)
+
+    @property
+    def available_stock(self):
+        """Anlık stok: anlık görüntü, henüz katlanmamış stok hareketleri ve stok sayaçları"""
+        if hasattr(self, 'live_stock'):
+            return self.live_stock
+        if not self.stock_shards and not getattr(settings, 'STOCK_LEDGER_DEFER_INCREMENTS', False):
+            return self.stock
+        return Part.objects.with_live_stock().values_list('live_stock', flat=True).get(pk=self.pk)
 
     def get_required_quantity(self):
         """Bu parça tipinin uçak tipinde gereken miktarını döndürür"""
@@ -1,9 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from .team import Team
 from .part import Part
 
+# Günlük üretim özetine katkıyı belirleyen alanlar
+ROLLUP_FIELDS = ('team_id', 'part_id', 'created_at', 'quantity')
+
 class Production(models.Model):
     team = models.ForeignKey(Team, on_delete=models.PROTECT, related_name='productions', verbose_name='Üretici Takım')
     part = models.ForeignKey(Part, on_delete=models.PROTECT, related_name='productions', verbose_name='Üretilen Parça')
@@ -19,6 +23,8 @@ class Production(models.Model):
             models.Index(fields=['team']),
             models.Index(fields=['part']),
             models.Index(fields=['created_at']),
+            # Takım üretim geçmişinin (created_at, id) imleç sayfalaması için
+            models.Index(fields=['team', 'created_at', 'id']),
         ]
 
     def __str__(self):
@@ -40,30 +46,58 @@ class Production(models.Model):
     def save(self, *args, **kwargs):
         # Yeni kayıt mı kontrol et
         is_new = self.pk is None
-        
-        # Üretim kaydını kaydet
-        super().save(*args, **kwargs)
-        
-        # Yeni kayıtsa stok artırma işlemi yap (sadece bir kez!)
-        if is_new:
-            # Django ORM yerine direkt SQL sorgusu kullanarak stok artışını sağla
-            from django.db import connection
-            cursor = connection.cursor()
-            
-            # Tablo adını doğrudan belirt
-            table_name = "production_part"
-            
-            # Stok artırıp low stock durumunu güncelleyen SQL sorgusu
-            query = f"""
-                UPDATE {table_name}
-                SET stock = stock + %s,
-                    is_low_stock = CASE WHEN (stock + %s) < minimum_stock THEN True ELSE False END
-                WHERE id = %s
-            """
-            cursor.execute(query, [self.quantity, self.quantity, self.part_id])
-            connection.commit()
-            
-            # Parça nesnesini yenile
-            if hasattr(self, 'part') and self.part:
-                # Nesneyi veritabanından yeniden yükle
-                self.part.refresh_from_db() 
\ No newline at end of file
+        update_fields = kwargs.get('update_fields')
+        saved = None
+        if update_fields is not None:
+            saved = {self._meta.get_field(name).attname for name in update_fields}
+
+        with transaction.atomic(savepoint=False):
+            # Güncellemede özetteki eski katkı veritabanından okunur; bellekteki nesne bayat olabilir
+            previous = None
+            if not is_new and (saved is None or saved & set(ROLLUP_FIELDS)):
+                previous = Production.objects.select_for_update().only(*ROLLUP_FIELDS).filter(pk=self.pk).first()
+
+            # Üretim kaydını kaydet
+            super().save(*args, **kwargs)
+
+            if previous is not None:
+                from ..services.rollup import replace_in_rollup
+                current = self
+                if saved is not None:
+                    # Kaydedilmeyen alanlar veritabanındaki değerlerini korur
+                    current = Production(**{
+                        field: getattr(self if field in saved else previous, field) for field in ROLLUP_FIELDS
+                    })
+                replace_in_rollup(previous, current)
+
+            # Yeni kayıtsa stoğu yalnızca stok servisi üzerinden, bir kez artır
+            if is_new:
+                from ..services.stock import increase_stock
+                # Parça yüklüyse sayaç ayarı için nesneyi, değilse yalnızca ID'yi ver
+                part = self.part if Production.part.is_cached(self) else self.part_id
+                increase_stock(part, self.quantity)
+
+                # Günlük üretim özetini aynı işlemde artır
+                from ..services.rollup import add_to_rollup
+                add_to_rollup([self])
+
+
+class ProductionDailyRollup(models.Model):
+    """Takım ve parça başına günlük toplam üretim; üretim yazma yolunda artımlı güncellenir"""
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='daily_rollups', verbose_name='Üretici Takım')
+    part = models.ForeignKey(Part, on_delete=models.CASCADE, related_name='daily_rollups', verbose_name='Üretilen Parça')
+    day = models.DateField(verbose_name='Gün')
+    quantity = models.PositiveIntegerField(default=0, verbose_name='Miktar')
+
+    class Meta:
+        verbose_name = 'Günlük Üretim Özeti'
+        verbose_name_plural = 'Günlük Üretim Özetleri'
+        ordering = ['-day']
+        unique_together = ['team', 'part', 'day']
+        indexes = [
+            models.Index(fields=['day']),
+            models.Index(fields=['team', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.team.name} - {self.part.name} ({self.day}: {self.quantity})"
@@ -0,0 +1,53 @@
+from django.db import models
+from django.db.models import Q
+from .constants import STOCK_MOVEMENT_REASONS
+from .part import Part
+
+class StockMovement(models.Model):
+    """
+    Parça stoğundaki her değişikliğin eklenerek tutulan (append-only) kaydı.
+
+    ``applied`` alanı hareketin ``Part.stock`` anlık görüntüsüne katlanıp
+    katlanmadığını gösterir. Katlanmamış hareketler "bekleyen kuyruk"tur;
+    anlık stok = ``Part.stock`` + bekleyen hareketlerin toplamı.
+    """
+    part = models.ForeignKey(Part, on_delete=models.CASCADE, related_name='movements', verbose_name='Parça')
+    delta = models.IntegerField(verbose_name='Miktar Değişimi')
+    reason = models.CharField(max_length=20, choices=STOCK_MOVEMENT_REASONS, verbose_name='Neden')
+    applied = models.BooleanField(default=False, verbose_name='Stoğa İşlendi mi?')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')
+
+    class Meta:
+        verbose_name = 'Stok Hareketi'
+        verbose_name_plural = 'Stok Hareketleri'
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['part', 'created_at']),
+            # Sadece bekleyen kuyruğu kapsayan kısmi indeks; okuma ve sıkıştırma bunu kullanır
+            models.Index(fields=['part'], condition=Q(applied=False), name='stockmovement_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.part} {self.delta:+d} ({self.get_reason_display()})"
+
+
+class StockShard(models.Model):
+    """
+    Yoğun yazılan parçalar için stok sayaç satırı.
+
+    ``Part.stock_shards`` sıfırdan büyükse yazanlar bu satırlardan rastgele
+    birini günceller; böylece eşzamanlı üretim ve montaj aynı ``Part``
+    satırını kilitlemez. Sayaçlar ``Part.stock`` üzerine eklenir ve
+    sıkıştırma sırasında anlık görüntüye katlanır.
+    """
+    part = models.ForeignKey(Part, on_delete=models.CASCADE, related_name='shards', verbose_name='Parça')
+    index = models.PositiveSmallIntegerField(verbose_name='Sayaç No')
+    count = models.IntegerField(default=0, verbose_name='Miktar')
+
+    class Meta:
+        verbose_name = 'Stok Sayacı'
+        verbose_name_plural = 'Stok Sayaçları'
+        unique_together = ['part', 'index']
+
+    def __str__(self):
+        return f"{self.part} #{self.index}: {self.count}"
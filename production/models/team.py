@@ -1,9 +1,40 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db.models import Sum
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from .constants import TEAM_TYPES
 
+class TeamQuerySet(models.QuerySet):
+    def with_stats(self):
+        """
+        Üye sayısı, toplam üretim ve uçak sayısını ilişkili alt sorgularla ekler.
+
+        Her değer kendi alt sorgusunda takım başına toplanır; üyeler ile
+        üretimler join edilmediğinden satırlar çoğalmaz ve sayfa başına tek
+        sorgu çalışır. Toplam üretim günlük üretim özetinden okunur.
+        """
+        from .aircraft import Aircraft
+        from .production import ProductionDailyRollup
+
+        members = (
+            Team.members.through.objects.filter(team=OuterRef('pk'))
+            .order_by().values('team').annotate(count=Count('id')).values('count')
+        )
+        produced = (
+            ProductionDailyRollup.objects.filter(team=OuterRef('pk'))
+            .order_by().values('team').annotate(total=Sum('quantity')).values('total')
+        )
+        assembled = (
+            Aircraft.objects.filter(assembly_team=OuterRef('pk'))
+            .order_by().values('assembly_team').annotate(count=Count('id')).values('count')
+        )
+        return self.annotate(
+            member_count=Coalesce(Subquery(members), 0),
+            total_production=Coalesce(Subquery(produced), 0),
+            aircraft_count=Coalesce(Subquery(assembled), 0),
+        )
+
 class Team(models.Model):
     name = models.CharField(max_length=100, verbose_name='Takım Adı')
     team_type = models.CharField(max_length=20, choices=TEAM_TYPES, verbose_name='Takım Tipi')
@@ -11,10 +42,18 @@ class Team(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Güncellenme Tarihi')
 
+    objects = TeamQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Takım'
         verbose_name_plural = 'Takımlar'
         ordering = ['name']
+        # Sunucu tarafı tablo sıralamasında kullanılan alanlar
+        indexes = [
+            models.Index(fields=['name']),
+            models.Index(fields=['team_type']),
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_team_type_display()})"
@@ -26,14 +65,21 @@ class Team(models.Model):
         return self.team_type == part.team_type
 
     def get_total_production(self):
-        """Takımın toplam üretim miktarını döndürür"""
-        result = self.productions.aggregate(total=Sum('quantity'))
+        """Takımın toplam üretim miktarını günlük üretim özetinden döndürür"""
+        result = self.daily_rollups.aggregate(total=Sum('quantity'))
         return result['total'] or 0
 
     @property
     def total_production(self):
+        # Sorguda annotate edilmişse yeniden hesaplama
+        if hasattr(self, '_total_production'):
+            return self._total_production
         return self.get_total_production()
 
+    @total_production.setter
+    def total_production(self, value):
+        self._total_production = value
+
     @property
     def productions(self):
         return self.production_set.all()
@@ -51,4 +97,12 @@ class Team(models.Model):
 
     @property
     def member_count(self):
-        return self.members.count() 
\ No newline at end of file
+        # Sorguda annotate edilmişse yeniden hesaplama
+        if hasattr(self, '_member_count'):
+            return self._member_count
+        return self.members.count()
+
+    @member_count.setter
+    def member_count(self, value):
+        self._member_count = value
+ 
\ No newline at end of file
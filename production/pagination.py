@@ -0,0 +1,122 @@
+"""
+Zaman sıralı geçmiş listeleri için anahtar kümesi (keyset) sayfalama.
+
+Sayfalar ``(zaman, id)`` çiftine göre azalan sırada döndürülür. İmleç
+(cursor) son satırın ``(zaman, id)`` değeridir; sonraki sayfa
+``zaman <= c AND (zaman < c OR (zaman = c AND id < i))`` koşuluyla okunur.
+Fazladan görünen ``zaman <= c`` sınırı sonucu değiştirmez; planlayıcı OR
+koşulunu indeks aralığı sınırı olarak kullanamadığından, bileşik
+``(…, zaman, id)`` indeksinde taramanın imleçten başlamasını bu sınır
+sağlar. OFFSET kullanılmadığından derin sayfalar ilk sayfa kadar ucuzdur.
+
+``since`` ve ``until`` sorgu parametreleri aynı zaman alanına uygulanır.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+KEYSET_PARAMETERS = [
+    OpenApiParameter(name='cursor', type=str, description='Bir önceki yanıttaki "next" bağlantısının imleci'),
+    OpenApiParameter(name='page_size', type=int, description='Sayfadaki kayıt sayısı (en fazla 200)'),
+    OpenApiParameter(name='since', type=str, description='Bu zamandan (dahil) sonraki kayıtlar (ISO 8601 tarih ya da zaman)'),
+    OpenApiParameter(name='until', type=str, description='Bu zamandan önceki kayıtlar (ISO 8601 tarih ya da zaman)'),
+]
+
+
+def parse_moment(value):
+    """ISO 8601 tarih ya da zaman değerini zaman dilimli datetime'a çevirir; geçersizse None"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class KeysetPagination(BasePagination):
+    """
+    ``(time_field, id)`` üzerinde azalan sıralı imleç sayfalaması.
+
+    Yanıt ``{'next': bağlantı ya da None, 'results': [...]}`` biçimindedir.
+    """
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, time_field='created_at'):
+        self.time_field = time_field
+
+    def _decode_cursor(self, value):
+        try:
+            moment, pk = json.loads(base64.urlsafe_b64decode(value.encode()).decode())
+            moment = parse_datetime(moment)
+            if moment is None:
+                raise ValueError
+            return moment, int(pk)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise ValidationError({'cursor': 'Geçersiz imleç.'})
+
+    def _encode_cursor(self, instance):
+        position = [getattr(instance, self.time_field).isoformat(), instance.pk]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def _page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def filter_range(self, queryset, request):
+        """``since`` (dahil) ve ``until`` (hariç) sınırlarını zaman alanına uygular"""
+        for param, lookup in (('since', 'gte'), ('until', 'lt')):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            moment = parse_moment(value)
+            if moment is None:
+                raise ValidationError({param: 'Geçersiz tarih.'})
+            queryset = queryset.filter(**{f'{self.time_field}__{lookup}': moment})
+        return queryset
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        queryset = self.filter_range(queryset, request).order_by(f'-{self.time_field}', '-id')
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            moment, pk = self._decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f'{self.time_field}__lt': moment}) | Q(**{self.time_field: moment, 'id__lt': pk}),
+                **{f'{self.time_field}__lte': moment},
+            )
+
+        size = self._page_size(request)
+        # Bir fazla satır okunarak sonraki sayfanın varlığı ek COUNT olmadan anlaşılır
+        rows = list(queryset[:size + 1])
+        self.has_next = len(rows) > size
+        self.page = rows[:size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self._encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Team, Part, Aircraft, AircraftPart, Production
+from .models import Team, Part, Aircraft, AircraftPart, Production, StockMovement
 from drf_spectacular.utils import extend_schema_field
 
 class UserSerializer(serializers.ModelSerializer):
@@ -25,12 +25,15 @@ class TeamSerializer(serializers.ModelSerializer):
     
     Takımın temel bilgilerini, üye sayısını ve toplam üretim miktarını içerir.
     """
+    get_team_type_display = serializers.CharField(read_only=True, help_text='Takım tipinin görüntülenen adı')
     member_count = serializers.IntegerField(read_only=True, help_text='Takımdaki üye sayısı')
     total_production = serializers.IntegerField(read_only=True, help_text='Takımın toplam üretim miktarı')
+    aircraft_count = serializers.IntegerField(read_only=True, help_text='Montaj takımına atanmış uçak sayısı')
     
     class Meta:
         model = Team
-        fields = ['id', 'name', 'team_type', 'member_count', 'total_production', 'created_at']
+        fields = ['id', 'name', 'team_type', 'get_team_type_display', 'member_count',
+                  'total_production', 'aircraft_count', 'created_at']
         extra_kwargs = {
             'name': {'help_text': 'Takım adı'},
             'team_type': {'help_text': 'Takım tipi (AVIONICS, BODY, WING, TAIL, ASSEMBLY)'},
@@ -60,6 +63,32 @@ class PartSerializer(serializers.ModelSerializer):
             'is_low_stock': {'help_text': 'Stok miktarı minimum seviyenin altında mı?'},
         }
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Anlık stok (anlık görüntü + bekleyen stok hareketleri) sorguda hesaplandıysa onu göster
+        live_stock = getattr(instance, 'live_stock', None)
+        if live_stock is not None:
+            data['stock'] = live_stock
+            data['is_low_stock'] = live_stock < instance.minimum_stock
+        return data
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    """
+    Stok hareketlerini serileştiren serializer.
+    
+    Parça stoğundaki her değişikliğin miktarını, nedenini ve zamanını içerir.
+    """
+    class Meta:
+        model = StockMovement
+        fields = ['id', 'part', 'delta', 'reason', 'applied', 'created_at']
+        extra_kwargs = {
+            'part': {'help_text': 'Parça ID\'si'},
+            'delta': {'help_text': 'Stok değişim miktarı (artış pozitif, azalış negatif)'},
+            'reason': {'help_text': 'Değişiklik nedeni (PRODUCTION, ASSEMBLY, DISASSEMBLY, ADJUSTMENT)'},
+            'applied': {'help_text': 'Hareket stok anlık görüntüsüne işlendi mi?'},
+            'created_at': {'help_text': 'Hareketin zamanı'},
+        }
+
 class AircraftSerializer(serializers.ModelSerializer):
     """
     Uçak bilgilerini serileştiren serializer.
@@ -68,12 +97,14 @@ class AircraftSerializer(serializers.ModelSerializer):
     """
     get_aircraft_type_display = serializers.CharField(read_only=True, help_text='Uçak tipinin görüntülenen adı')
     assembly_team_name = serializers.CharField(source='assembly_team.name', read_only=True, help_text='Montaj takımının adı')
+    missing_parts = serializers.DictField(source='get_missing_parts', child=serializers.IntegerField(), read_only=True, help_text='Takım tipine göre eksik parça sayıları')
+    completion_percentage = serializers.IntegerField(read_only=True, help_text='Tamamlanma yüzdesi')
     
     class Meta:
         model = Aircraft
         fields = ['id', 'aircraft_type', 'get_aircraft_type_display',
                  'assembly_team', 'assembly_team_name',
-                 'is_complete', 'created_at', 'completed_at']
+                 'is_complete', 'missing_parts', 'completion_percentage', 'created_at', 'completed_at']
         extra_kwargs = {
             'aircraft_type': {'help_text': 'Uçak tipi (TB2, TB3, AKINCI, KIZILELMA)'},
             'assembly_team': {'help_text': 'Montaj takımı ID\'si'},
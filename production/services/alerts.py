@@ -0,0 +1,158 @@
+"""
+Düşük stok uyarıları.
+
+Uyarı yalnızca parça "yeterli stok" durumundan "düşük stok" durumuna
+geçtiğinde bir kez tetiklenir. ``Part.low_stock_alerted`` bayrağı geçişi
+sahiplenmek için koşullu UPDATE ile set edilir; böylece eşzamanlı
+istekler arasında yalnızca biri uyarı gönderir. Bayrak, stok minimumun
+üzerine çıktığında stok servisinin UPDATE sorgusu içinde sıfırlanır.
+
+Aynı parça için ``LOW_STOCK_ALERT_COOLDOWN`` saniye içinde ikinci uyarı
+gönderilmez. ``LOW_STOCK_ALERT_MODE = 'digest'`` ayarında uyarılar hemen
+gönderilmez; ``send_low_stock_digest`` komutu takım tipi başına tek bir
+özet e-postası kuyruğa ekler.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Part, Team
+from ..models.constants import TEAM_TYPES
+from .outbox import enqueue_mail
+
+RECIPIENTS_CACHE_KEY = 'low_stock_recipients:{}'
+RECIPIENTS_CACHE_TTL = 60 * 60
+
+
+def low_stock_recipients(team_type):
+    """
+    Takım tipinin uyarı alıcılarını ``(takım adı, e-posta listesi)`` olarak döndürür.
+
+    Sonuç önbellekte tutulur ve takım üyeliği değiştiğinde silinir.
+    """
+    key = RECIPIENTS_CACHE_KEY.format(team_type)
+    recipients = cache.get(key)
+    if recipients is None:
+        team = Team.objects.filter(team_type=team_type).first()
+        if team:
+            recipients = (team.name, list(team.members.exclude(email='').values_list('email', flat=True)))
+        else:
+            recipients = (None, [])
+        cache.set(key, recipients, RECIPIENTS_CACHE_TTL)
+    return recipients
+
+
+def invalidate_low_stock_recipients(team_types=None):
+    """Verilen (ya da tüm) takım tiplerinin önbellekteki alıcı listesini geçerli işlem commit edildikten sonra siler"""
+    if team_types is None:
+        team_types = [team_type for team_type, _ in TEAM_TYPES]
+    keys = [RECIPIENTS_CACHE_KEY.format(team_type) for team_type in team_types]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _enqueue_alert(part):
+    """Parçayı üreten takıma düşük stok bildirimini kuyruğa ekler"""
+    team_name, recipient_list = low_stock_recipients(part.team_type)
+    if not team_name:
+        return
+    subject = f'Düşük Stok Uyarısı: {part.name}'
+    message = f'''
+    Sayın {team_name} üyeleri,
+
+    {part.name} parçasının stok seviyesi kritik seviyenin altına düştü.
+    Mevcut stok: {part.available_stock}
+
+    Lütfen en kısa sürede üretim planlaması yapınız.
+
+    Saygılarımızla,
+    Üretim Sistemi
+    '''
+    enqueue_mail(subject, message, recipient_list)
+
+
+def alert_low_stock(part):
+    """
+    Parça düşük stoğa yeni geçtiyse uyarıyı tetikler.
+
+    ``part.is_low_stock`` parçanın güncel durumunu yansıtmalıdır. Uyarı
+    gönderildiyse (ya da özet için işaretlendiyse) True döndürür.
+    """
+    if not part.is_low_stock:
+        if part.low_stock_alerted:
+            # Stok toparlandı; sonraki düşüş için uyarıyı yeniden kur
+            Part.objects.filter(pk=part.pk, low_stock_alerted=True).update(low_stock_alerted=False)
+            part.low_stock_alerted = False
+        return False
+
+    if part.low_stock_alerted:
+        # Bu düşük stok dönemi için uyarı zaten verildi; sorgu gerekmez
+        return False
+
+    # Geçişi yalnızca tek bir istek sahiplenebilir
+    if not Part.objects.filter(pk=part.pk, low_stock_alerted=False).update(low_stock_alerted=True):
+        part.low_stock_alerted = True
+        return False
+    part.low_stock_alerted = True
+
+    now = timezone.now()
+    cooldown = timedelta(seconds=getattr(settings, 'LOW_STOCK_ALERT_COOLDOWN', 0))
+    digest = getattr(settings, 'LOW_STOCK_ALERT_MODE', 'immediate') == 'digest'
+    outside_cooldown = Q(low_stock_alerted_at__isnull=True) | Q(low_stock_alerted_at__lte=now - cooldown)
+    if not Part.objects.filter(outside_cooldown, pk=part.pk).update(
+        low_stock_alerted_at=now, low_stock_digest_pending=digest
+    ):
+        return False
+
+    if not digest:
+        _enqueue_alert(part)
+    return True
+
+
+def send_low_stock_digest():
+    """
+    Özet için işaretlenmiş parçaları takım tipine göre gruplayıp kuyruğa ekler.
+
+    Takım tipi başına tek e-posta oluşturur; oluşturulan e-posta sayısını döndürür.
+    """
+    with transaction.atomic():
+        ids = list(
+            Part.objects.filter(low_stock_digest_pending=True)
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)
+        )
+        if not ids:
+            return 0
+
+        parts_by_type = defaultdict(list)
+        for part in Part.objects.with_live_stock().filter(id__in=ids).order_by('name'):
+            parts_by_type[part.team_type].append(part)
+
+        sent = 0
+        for team_type, parts in parts_by_type.items():
+            team_name, recipient_list = low_stock_recipients(team_type)
+            if not team_name:
+                continue
+            lines = '\n'.join(
+                f'    - {part.name}: {part.live_stock} (minimum {part.minimum_stock})' for part in parts
+            )
+            message = f'''
+    Sayın {team_name} üyeleri,
+
+    Aşağıdaki parçaların stok seviyesi kritik seviyenin altına düştü:
+{lines}
+
+    Lütfen en kısa sürede üretim planlaması yapınız.
+
+    Saygılarımızla,
+    Üretim Sistemi
+    '''
+            if enqueue_mail(f'Düşük Stok Özeti: {len(parts)} parça', message, recipient_list):
+                sent += 1
+
+        Part.objects.filter(id__in=ids).update(low_stock_digest_pending=False)
+    return sent
@@ -0,0 +1,359 @@
+"""
+Uçak montajı servisi.
+
+Uçağa parça ekleme tek bir veritabanı işleminde yapılır: uçak satırı
+kilitlenip parça sayaçları okunur, stok koşullu UPDATE ile düşülür (stok
+yetmezse hiçbir satır yazılmaz), ``AircraftPart`` eklenir ve uçağın parça
+sayacı ile tamamlanma durumu tek bir UPDATE ile yazılır.
+
+Uçaktaki takım tipi başına parça sayıları ``Aircraft`` satırındaki
+sayaç alanlarında tutulur; tamamlanma ve eksik parça bilgisi join
+olmadan satırdan okunur. ``rebuild_part_counts`` sayaçları
+``AircraftPart`` kayıtlarından toplu olarak yeniden hesaplar.
+
+``assemble_kit`` uçağın eksik tüm parçalarını tek istekte ve tek işlemde
+ekler; stok yetmezse takım tipi bazında eksik raporu döner. ``disassemble``
+silinen uçakların parçalarını parça başına tek UPDATE ile stoğa döndürür.
+"""
+import operator
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, DateTimeField, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from ..models import Aircraft, AircraftPart, Part, Team, PART_COUNT_FIELDS, REQUIRED_PARTS
+from .alerts import alert_low_stock
+from .dashboard import invalidate_dashboard
+from .outbox import enqueue_mail
+from .versions import invalidate_aircraft
+from .stock import _apply_deltas, decrease_stock
+
+
+def _completion(complete, now):
+    """Tamamlanma koşuluna göre ``is_complete`` ve ``completed_at`` güncelleme ifadeleri"""
+    return {
+        'is_complete': Case(When(complete, then=Value(True)), default=Value(False), output_field=BooleanField()),
+        'completed_at': Case(
+            When(complete, then=Coalesce(F('completed_at'), Value(now))),
+            default=Value(None),
+            output_field=DateTimeField(),
+        ),
+    }
+
+
+def _count_changes(aircraft_type, team_type, delta, now):
+    """Sayaç değişikliğini ve yeni tamamlanma durumunu tek UPDATE'te yazacak ifadeler"""
+    field = PART_COUNT_FIELDS[team_type]
+    # Koşullar UPDATE öncesi değerlere uygulanır; değişen sayaç için ``delta`` hesaba katılır
+    complete = Q()
+    for required_type, required_count in REQUIRED_PARTS[aircraft_type].items():
+        threshold = required_count - delta if required_type == team_type else required_count
+        complete &= Q(**{f'{PART_COUNT_FIELDS[required_type]}__gte': threshold})
+    return {field: Greatest(F(field) + delta, Value(0)), **_completion(complete, now)}
+
+
+def _sync_counts(aircraft, counts, now):
+    """Bellekteki uçak nesnesini yeni sayaçlarla eşitler"""
+    for team_type, count in counts.items():
+        setattr(aircraft, PART_COUNT_FIELDS[team_type], count)
+    aircraft.is_complete = aircraft.check_completion_status()
+    if not aircraft.is_complete:
+        aircraft.completed_at = None
+    elif not aircraft.completed_at:
+        aircraft.completed_at = now
+
+
+def adjust_part_count(aircraft, team_type, delta):
+    """Uçağın parça sayacını ``delta`` kadar değiştirir ve tamamlanma durumunu aynı UPDATE'te yazar"""
+    now = timezone.now()
+    Aircraft.objects.filter(pk=aircraft.pk).update(**_count_changes(aircraft.aircraft_type, team_type, delta, now))
+    invalidate_aircraft([aircraft.pk])
+    _sync_counts(aircraft, {team_type: max(0, aircraft.part_count(team_type) + delta)}, now)
+
+
+def add_part_to_aircraft(aircraft, part, added_by):
+    """
+    Parçayı uçağa ekler ve stoktan bir adet düşer.
+
+    ``aircraft`` bellekteki nesnedir; sayaçları ve tamamlanma alanları
+    yerinde güncellenir. Doğrulama ya da stok hatasında ValidationError
+    yükselir ve hiçbir değişiklik yazılmaz.
+    """
+    if not part.is_compatible_with_aircraft(aircraft):
+        raise ValidationError(f'Bu parça {aircraft.get_aircraft_type_display()} tipi ile uyumlu değil.')
+
+    required = REQUIRED_PARTS[aircraft.aircraft_type]
+
+    with transaction.atomic():
+        # Aynı uçağa eşzamanlı eklemeler sırayla işlenir; sayaçlar kilitli satırdan okunur
+        locked = Aircraft.objects.select_for_update().only(
+            'id', 'aircraft_type', 'completed_at', *PART_COUNT_FIELDS.values()
+        ).get(pk=aircraft.pk)
+        counts = locked.part_counts
+        if counts[part.team_type] >= required[part.team_type]:
+            raise ValidationError(
+                f'Bu uçak için yeterli sayıda {part.get_team_type_display()} parçası zaten eklenmiş.'
+            )
+
+        # Koşullu UPDATE: stok yoksa satır değişmez ve ValidationError yükselir.
+        # Parça satırının kilidi bu UPDATE ile alınır; sayaçlı parçalarda Part satırı hiç kilitlenmez.
+        decrease_stock(part, 1, reason='ASSEMBLY', refresh=True)
+
+        # Sayaç ve tamamlanma durumu tek UPDATE ile yazılır; AircraftPart sinyalleri güncel durumu görür
+        now = timezone.now()
+        Aircraft.objects.filter(pk=aircraft.pk).update(
+            **_count_changes(aircraft.aircraft_type, part.team_type, 1, now)
+        )
+        counts[part.team_type] += 1
+        aircraft.completed_at = locked.completed_at
+        _sync_counts(aircraft, counts, now)
+
+        aircraft_part = AircraftPart(aircraft=aircraft, part=part, added_by=added_by)
+        aircraft_part._stock_reserved = True
+        aircraft_part.save(force_insert=True)
+
+    return aircraft_part
+
+
+class PartShortage(ValidationError):
+    """
+    Kit montajında stoğu yetmeyen takım tipleri.
+
+    ``shortages`` ``{takım tipi: {'required': gereken, 'available': mevcut}}`` eşlemesidir.
+    """
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__(
+            'Stokta yeterli parça yok: ' + ', '.join(
+                f"{team_type} (gereken: {info['required']}, mevcut: {info['available']})"
+                for team_type, info in shortages.items()
+            )
+        )
+
+
+def _kit_allocation(aircraft, missing):
+    """
+    Eksik takım tipleri için stoğu olan parçaları seçer.
+
+    ``({takım tipi: [parça, ...]}, {takım tipi: eksik bilgisi})`` döndürür.
+    Aynı parça bir uçağa bir kez eklenebildiğinden her adet farklı bir parça
+    satırından karşılanır; en çok stoğu olan parçalar önce seçilir.
+    """
+    candidates = (
+        Part.objects.with_live_stock()
+        .filter(aircraft_type=aircraft.aircraft_type, team_type__in=missing, live_stock__gt=0)
+        .exclude(aircraft_parts__aircraft=aircraft)
+        .order_by('-live_stock', 'id')
+    )
+    allocation = {team_type: [] for team_type in missing}
+    for part in candidates:
+        if len(allocation[part.team_type]) < missing[part.team_type]:
+            allocation[part.team_type].append(part)
+
+    shortages = {
+        team_type: {'required': count, 'available': len(allocation[team_type])}
+        for team_type, count in missing.items()
+        if len(allocation[team_type]) < count
+    }
+    return allocation, shortages
+
+
+def notify_ready_for_assembly(aircraft):
+    """Uçağın tüm parçaları eklendiyse montaj takımına bildirimi kuyruğa ekler"""
+    if not aircraft.is_complete:
+        return
+    assembly_team = Team.objects.filter(team_type='ASSEMBLY').first()
+    if not assembly_team:
+        return
+    subject = f'Uçak Montaja Hazır: {aircraft.get_aircraft_type_display()}'
+    message = f'''
+            Sayın {assembly_team.name} üyeleri,
+
+            {aircraft.get_aircraft_type_display()} için gerekli tüm parçalar hazır.
+            Montaj işlemine başlayabilirsiniz.
+
+            Saygılarımızla,
+            Üretim Sistemi
+            '''
+    recipient_list = [
+        member.email for member in assembly_team.members.all()
+        if member.email
+    ]
+    enqueue_mail(subject, message, recipient_list)
+
+
+def assemble_kit(aircraft, added_by):
+    """
+    Uçağın eksik tüm parçalarını tek işlemde ekler ve uçağı tamamlar.
+
+    Gerekli parçalar ``REQUIRED_PARTS`` üzerinden belirlenir; stoklar
+    koşullu UPDATE'lerle düşülür, ``AircraftPart`` kayıtları ``bulk_create``
+    ile eklenir ve sayaçlarla tamamlanma durumu tek UPDATE ile yazılır.
+    Herhangi bir tipte stok yetmezse ``PartShortage`` yükselir ve hiçbir
+    değişiklik yazılmaz. Eklenen ``AircraftPart`` kayıtlarını döndürür.
+    """
+    required = REQUIRED_PARTS[aircraft.aircraft_type]
+
+    with transaction.atomic():
+        locked = Aircraft.objects.select_for_update().only(
+            'id', 'aircraft_type', 'completed_at', *PART_COUNT_FIELDS.values()
+        ).get(pk=aircraft.pk)
+        counts = locked.part_counts
+        missing = {
+            team_type: count - counts[team_type]
+            for team_type, count in required.items()
+            if counts[team_type] < count
+        }
+        if not missing:
+            raise ValidationError('Bu uçağın tüm parçaları zaten eklenmiş.')
+
+        allocation, shortages = _kit_allocation(aircraft, missing)
+        if shortages:
+            raise PartShortage(shortages)
+
+        parts = [part for team_parts in allocation.values() for part in team_parts]
+        # Seçim ile düşüm arasında stok tükendiyse hiçbir değişiklik yazılmaz
+        if _apply_deltas(
+            {part.pk: -1 for part in parts}, 'ASSEMBLY', {part.pk: part.stock_shards for part in parts}
+        ):
+            allocation, shortages = _kit_allocation(aircraft, missing)
+            raise PartShortage(shortages or {
+                team_type: {'required': count, 'available': 0} for team_type, count in missing.items()
+            })
+
+        now = timezone.now()
+        Aircraft.objects.filter(pk=aircraft.pk).update(
+            **{PART_COUNT_FIELDS[team_type]: count for team_type, count in required.items()},
+            is_complete=True,
+            completed_at=Coalesce(F('completed_at'), Value(now)),
+        )
+        aircraft.completed_at = locked.completed_at
+        _sync_counts(aircraft, required, now)
+
+        # bulk_create AircraftPart.save() ve sinyalleri çağırmaz; stok ve sayaçlar yukarıda güncellendi
+        aircraft_parts = AircraftPart.objects.bulk_create([
+            AircraftPart(aircraft=aircraft, part=part, added_by=added_by) for part in parts
+        ])
+        invalidate_aircraft([aircraft.pk])
+        # Montaja hazır bildirimi uçak başına bir kez kuyruğa eklenir
+        notify_ready_for_assembly(aircraft)
+
+    _evaluate_low_stock([part.pk for part in parts])
+    return aircraft_parts
+
+
+def available_parts(aircraft_list):
+    """
+    Uçaklara eklenebilecek stoktaki parçaları tek sorguda okur.
+
+    Bir takım tipinin dolu olup olmadığı uçak satırındaki sayaçlardan
+    belirlenir; yalnızca henüz dolmamış ``(uçak tipi, takım tipi)`` çiftleri
+    ve anlık stoğu sıfırdan büyük parçalar veritabanından döner.
+    ``{uçak ID: [parça satırı, ...]}`` döndürür; satırlar ``values()``
+    sözlükleridir ve ``live_stock`` içerir.
+    """
+    eligible = {}
+    for aircraft in aircraft_list:
+        counts = aircraft.part_counts
+        eligible[aircraft.pk] = {
+            (aircraft.aircraft_type, team_type)
+            for team_type, count in REQUIRED_PARTS[aircraft.aircraft_type].items()
+            if counts[team_type] < count
+        }
+
+    pairs = set().union(*eligible.values()) if eligible else set()
+    if not pairs:
+        return {aircraft_id: [] for aircraft_id in eligible}
+
+    condition = reduce(operator.or_, [
+        Q(aircraft_type=aircraft_type, team_type=team_type) for aircraft_type, team_type in sorted(pairs)
+    ])
+    rows = (
+        Part.objects.with_live_stock()
+        .filter(condition, live_stock__gt=0)
+        .order_by('team_type', 'name', 'id')
+        .values('id', 'name', 'team_type', 'aircraft_type', 'minimum_stock', 'live_stock')
+    )
+    by_pair = {}
+    for row in rows:
+        by_pair.setdefault((row['aircraft_type'], row['team_type']), []).append(row)
+
+    return {
+        aircraft_id: [row for pair in sorted(pairs_of_aircraft) for row in by_pair.get(pair, [])]
+        for aircraft_id, pairs_of_aircraft in eligible.items()
+    }
+
+
+def _evaluate_low_stock(part_ids):
+    """Stoğu değişen parçaların düşük stok durumunu tek sorguyla okuyup uyarıları değerlendirir"""
+    # Uyarı yalnızca yeterli stoktan düşük stoğa geçişte tetiklenir; toparlanan parçalarda yeniden kurulur
+    for part in Part.objects.with_live_stock().filter(pk__in=part_ids):
+        part.is_low_stock = part.live_stock < part.minimum_stock
+        alert_low_stock(part)
+
+
+def disassemble(aircraft_ids):
+    """
+    Uçakların tüm parçalarını küme tabanlı olarak stoğa geri döndürür.
+
+    Parça başına tek bir gruplu stok UPDATE'i, ``AircraftPart`` kayıtları
+    için tek bir DELETE ve tüm parçalar için tek bir düşük stok
+    değerlendirmesi yapılır. Uçak satırları silinmez; çağıran uçakları
+    aynı işlemde siler. Stoğa döndürülen parça adedini döndürür.
+    """
+    aircraft_parts = AircraftPart.objects.filter(aircraft_id__in=aircraft_ids)
+    invalidate_aircraft(aircraft_ids)
+
+    with transaction.atomic():
+        totals = dict(
+            aircraft_parts.order_by().values('part').annotate(count=Count('id')).values_list('part', 'count')
+        )
+        if not totals:
+            return 0
+
+        failed = _apply_deltas(totals, 'DISASSEMBLY')
+        if failed:
+            raise Part.DoesNotExist(f"Parça bulunamadı: {failed[0]}")
+        # QuerySet.delete() model delete() çağırmaz; stok yukarıda toplu olarak döndürüldü
+        aircraft_parts.delete()
+
+    _evaluate_low_stock(list(totals))
+    return sum(totals.values())
+
+
+def rebuild_part_counts(aircraft_ids=None):
+    """
+    Uçakların parça sayaçlarını ve tamamlanma durumunu ``AircraftPart`` kayıtlarından yeniden hesaplar.
+
+    Sayaçlar tek UPDATE (takım tipi başına bir alt sorgu) ile, tamamlanma
+    durumu ikinci bir UPDATE ile yazılır. Güncellenen uçak sayısını döndürür.
+    """
+    aircraft = Aircraft.objects.all()
+    if aircraft_ids is not None:
+        aircraft = aircraft.filter(pk__in=aircraft_ids)
+
+    counts = {}
+    for team_type, field in PART_COUNT_FIELDS.items():
+        per_type = (
+            AircraftPart.objects.filter(aircraft=OuterRef('pk'), part__team_type=team_type)
+            .order_by().values('aircraft').annotate(count=Count('id')).values('count')
+        )
+        counts[field] = Coalesce(Subquery(per_type), 0)
+
+    with transaction.atomic():
+        updated = aircraft.update(**counts)
+
+        complete = reduce(operator.or_, [
+            Q(aircraft_type=aircraft_type, **{
+                f'{PART_COUNT_FIELDS[team_type]}__gte': count for team_type, count in required.items()
+            })
+            for aircraft_type, required in REQUIRED_PARTS.items()
+        ])
+        aircraft.update(**_completion(complete, timezone.now()))
+        invalidate_dashboard()
+        invalidate_aircraft(aircraft_ids)
+    return updated
@@ -0,0 +1,143 @@
+"""
+Gösterge paneli anlık görüntüsü (snapshot).
+
+Ana sayfa ve dashboard'daki genel sayılar, düşük stoklu parçalar, son
+üretimler ve 30 günlük üretim grafiği tek bir sözlükte hesaplanır ve
+Django önbelleğinde (``DASHBOARD_CACHE``) saklanır.
+
+Geçerlilik bir sürüm damgasıyla izlenir: ``Production``, ``Part``,
+``Aircraft`` ve ``AircraftPart`` yazımları ``invalidate_dashboard`` çağırır
+ve damga işlem commit edildikten sonra yenilenir. Saklanan görüntünün
+damgası güncel damgadan farklıysa görüntü bayattır.
+
+Eşzamanlı ıskalamalar birleştirilir: yeniden hesaplamayı yalnızca
+``cache.add`` ile kilidi alan işçi yapar. Diğerleri varsa bayat görüntüyü
+döndürür, yoksa kısa bir süre yeni görüntüyü bekler.
+"""
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from ..models import Aircraft, Part, Production, ProductionDailyRollup, Team
+
+VERSION_KEY = 'dashboard:version'
+SNAPSHOT_KEY = 'dashboard:snapshot'
+LOCK_KEY = 'dashboard:snapshot:lock'
+
+# Kilidi alan işçi hesaplama sırasında düşerse kilit bu süre sonunda kendiliğinden açılır
+LOCK_TTL = 30
+
+# Bayat görüntü yoksa kilidi alamayan işçilerin yeni görüntüyü bekleme süresi ve aralığı (saniye)
+WAIT_TIMEOUT = 2
+WAIT_INTERVAL = 0.05
+
+
+def _store():
+    return caches[getattr(settings, 'DASHBOARD_CACHE', 'default')]
+
+
+def _bump_version():
+    _store().set(VERSION_KEY, time.time_ns(), None)
+
+
+def invalidate_dashboard():
+    """Gösterge paneli görüntüsünü geçerli işlem commit edildikten sonra bayatlatır"""
+    transaction.on_commit(_bump_version)
+
+
+def _current_version(store):
+    version = store.get(VERSION_KEY)
+    if version is None:
+        # Damga önbellekten düştüyse yeni bir damga oluşturulur; eşzamanlı oluşturmada ilk yazan kazanır
+        store.add(VERSION_KEY, time.time_ns(), None)
+        version = store.get(VERSION_KEY)
+    return version
+
+
+def _daily_production(today):
+    """Son 30 günün günlük üretim toplamlarını grafik için JSON olarak döndürür"""
+    start = today - timedelta(days=30)
+    totals = dict(
+        ProductionDailyRollup.objects.filter(day__gte=start)
+        .values_list('day')
+        .annotate(total=Sum('quantity'))
+        .order_by()
+    )
+    data = [
+        {'created_at__date': (start + timedelta(days=offset)).strftime('%Y-%m-%d'),
+         'total': totals.get(start + timedelta(days=offset), 0)}
+        for offset in range((today - start).days + 1)
+    ]
+    return json.dumps(data, cls=DjangoJSONEncoder)
+
+
+def compute_snapshot():
+    """Gösterge paneli verilerini veritabanından hesaplar"""
+    # Parça sütunları sayaç ve ertelenmiş defter modlarında gecikir; düşük stok anlık stoktan hesaplanır
+    low_stock_parts = Part.objects.with_live_stock().filter(live_stock__lt=F('minimum_stock'))
+    recent_productions = Production.objects.select_related('part', 'team').order_by('-created_at')[:5]
+    return {
+        'teams_count': Team.objects.count(),
+        'parts_count': Part.objects.count(),
+        'aircraft_count': Aircraft.objects.count(),
+        'completed_aircraft_count': Aircraft.objects.filter(is_complete=True).count(),
+        'production_count': Production.objects.count(),
+        'low_stock_count': low_stock_parts.count(),
+        'low_stock_parts': [
+            {'name': part.name, 'stock': part.live_stock, 'minimum_stock': part.minimum_stock}
+            for part in low_stock_parts.order_by('live_stock').only('name', 'stock', 'minimum_stock')[:5]
+        ],
+        'recent_productions': [
+            {
+                'part': {'name': production.part.name},
+                'team': {'name': production.team.name},
+                'quantity': production.quantity,
+                'created_at': production.created_at,
+            }
+            for production in recent_productions
+        ],
+        'daily_production': _daily_production(timezone.localdate()),
+    }
+
+
+def dashboard_snapshot():
+    """
+    Güncel gösterge paneli görüntüsünü döndürür.
+
+    Görüntü, sürüm damgası ve gün değişmediği sürece önbellekten okunur.
+    Iskalamada yalnızca kilidi alan işçi yeniden hesaplar.
+    """
+    store = _store()
+    version = _current_version(store)
+    today = timezone.localdate()
+    cached = store.get(SNAPSHOT_KEY)
+    if cached is not None and cached[0] == version and cached[1] == today:
+        return cached[2]
+
+    if not store.add(LOCK_KEY, 1, LOCK_TTL):
+        # Başka bir işçi hesaplıyor; aynı gündeki bayat görüntü yeterince iyidir
+        if cached is not None and cached[1] == today:
+            return cached[2]
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            cached = store.get(SNAPSHOT_KEY)
+            if cached is not None and cached[1] == today:
+                return cached[2]
+        # Kilit sahibi zamanında bitiremedi; önbelleğe yazmadan hesapla
+        return compute_snapshot()
+
+    try:
+        snapshot = compute_snapshot()
+        # Hesaplama sırasında gelen yazımlar damgayı değiştirir; görüntü okunan damgayla saklanır
+        store.set(SNAPSHOT_KEY, (version, today, snapshot), getattr(settings, 'DASHBOARD_CACHE_TTL', 300))
+    finally:
+        store.delete(LOCK_KEY)
+    return snapshot
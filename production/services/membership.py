@@ -0,0 +1,125 @@
+"""
+Kullanıcının takım üyeliği çözümleyicisi.
+
+``team_membership`` kullanıcının takımını ``(takım ID, takım tipi)`` olarak
+döndürür; sonuç istekler arası önbellekte (``MEMBERSHIP_CACHE_KEY``) tutulur
+ve ``Team.members`` ilişkisi değiştiğinde ``invalidate_membership`` ile commit
+sonrası silinir. Önbellek tüm işçiler arasında paylaşılmalıdır (bkz.
+``settings.CACHES``); süreç başına yerel bellek önbelleğinde bir işçideki
+silme diğerlerini etkilemez.
+
+``get_user_team`` aynı bilgiyi istek nesnesi üzerinde bir kez çözümler;
+middleware, izin sınıfları ve görünüm gövdesi aynı sonucu paylaşır. Böylece
+bir istekte en fazla bir, sıcak önbellekte sıfır takım sorgusu çalışır.
+
+``TeamCheckMiddleware`` için oturumda imzalı bir takım kontrolü bayrağı
+tutulur. Bayrak girişte yazılır ve üyelik sürüm damgasını taşır. Damga
+her üyelik değişikliğinde yenilenir; damga değişmediği sürece kontrol
+oturumdan okunur ve veritabanına gidilmez.
+"""
+import time
+
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+
+from ..models import Team
+
+MEMBERSHIP_CACHE_KEY = 'team_membership:{}'
+MEMBERSHIP_CACHE_TTL = 60 * 60
+
+# Takımı olmayan kullanıcılar da önbelleğe alınır
+NO_TEAM = (None, None)
+
+MEMBERSHIP_VERSION_KEY = 'team_membership:version'
+
+TEAM_CHECK_SESSION_KEY = '_team_check'
+TEAM_CHECK_SALT = 'production.team_check'
+
+_REQUEST_ATTR = '_user_team'
+
+
+def team_membership(user):
+    """Kullanıcının takımını ``(takım ID, takım tipi)`` olarak döndürür; takımı yoksa ``(None, None)``"""
+    key = MEMBERSHIP_CACHE_KEY.format(user.pk)
+    membership = cache.get(key)
+    if membership is None:
+        membership = Team.objects.filter(members=user).values_list('id', 'team_type').first() or NO_TEAM
+        cache.set(key, tuple(membership), MEMBERSHIP_CACHE_TTL)
+    return tuple(membership)
+
+
+def membership_version():
+    """Üyelik sürüm damgasını döndürür; damga önbellekte yoksa oluşturulur"""
+    version = cache.get(MEMBERSHIP_VERSION_KEY)
+    if version is None:
+        cache.add(MEMBERSHIP_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(MEMBERSHIP_VERSION_KEY)
+    return version
+
+
+def invalidate_membership(user_ids):
+    """
+    Verilen kullanıcıların önbellekteki takım üyeliğini siler ve üyelik sürüm damgasını yeniler.
+
+    Silme geçerli işlem commit edildikten sonra yapılır; aksi halde eşzamanlı
+    bir istek commit öncesi eski üyeliği okuyup yeniden önbelleğe yazabilir.
+    """
+    keys = [MEMBERSHIP_CACHE_KEY.format(user_id) for user_id in user_ids]
+
+    def invalidate():
+        cache.delete_many(keys)
+        cache.set(MEMBERSHIP_VERSION_KEY, time.time_ns(), None)
+
+    transaction.on_commit(invalidate)
+
+
+def refresh_team_check(request, version=None):
+    """Kullanıcının takım durumunu çözümler ve oturumdaki imzalı bayrağa yazar; takımı varsa True"""
+    if version is None:
+        version = membership_version()
+    has_team = team_membership(request.user)[0] is not None
+    request.session[TEAM_CHECK_SESSION_KEY] = signing.dumps(
+        [request.user.pk, has_team, version], salt=TEAM_CHECK_SALT
+    )
+    return has_team
+
+
+def session_has_team(request):
+    """
+    Kullanıcının bir takımı olup olmadığını oturumdaki bayraktan okur.
+
+    Bayrak yoksa, imzası geçersizse, başka bir kullanıcıya aitse ya da
+    üyelik sürüm damgası değiştiyse durum yeniden çözümlenip bayrak yenilenir.
+    """
+    # Damga çözümlemeden önce okunur; çözümleme sırasında gelen değişiklik sonraki istekte yakalanır
+    version = membership_version()
+    flag = request.session.get(TEAM_CHECK_SESSION_KEY)
+    if flag:
+        try:
+            user_id, has_team, flag_version = signing.loads(flag, salt=TEAM_CHECK_SALT)
+        except (signing.BadSignature, TypeError, ValueError):
+            pass
+        else:
+            if user_id == request.user.pk and flag_version == version:
+                return has_team
+    return refresh_team_check(request, version)
+
+
+def get_user_team(request):
+    """
+    İsteği yapan kullanıcının takımını döndürür; takımı yoksa None.
+
+    Sonuç istek üzerinde saklanır. Dönen ``Team`` nesnesinde yalnızca ``id``
+    ve ``team_type`` yüklüdür; diğer alanlar ilk erişimde okunur.
+    """
+    # DRF isteği asıl HttpRequest'i sarar; middleware ile görünüm aynı nesneyi paylaşmalı
+    request = getattr(request, '_request', request)
+    if not hasattr(request, _REQUEST_ATTR):
+        team = None
+        if request.user.is_authenticated:
+            team_id, team_type = team_membership(request.user)
+            if team_id is not None:
+                team = Team.from_db(Team.objects.db, ['id', 'team_type'], [team_id, team_type])
+        setattr(request, _REQUEST_ATTR, team)
+    return getattr(request, _REQUEST_ATTR)
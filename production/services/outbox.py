@@ -0,0 +1,105 @@
+"""
+E-posta bildirim kuyruğu (transactional outbox).
+
+Sinyaller ``enqueue_mail`` ile kuyruğa yazar; kayıt, tetikleyen yazma ile
+aynı veritabanı işleminde oluşur ve işlem geri alınırsa bildirim de
+kaybolur. İstek süresi SMTP'ye bağlı değildir.
+
+``send_pending`` kuyruğu toplu olarak boşaltır: teslim zamanı gelmiş
+kayıtları kısa bir kira (lease) ile sahiplenir, tek bir SMTP bağlantısı
+açar ve her mesajı bu bağlantı üzerinden gönderir. Başarısız gönderimler
+üstel geri çekilme (backoff) ile yeniden denenir. Bağlantı hiç açılamazsa
+(SMTP kesintisi) partideki her kayıt için deneme ve hata kaydedilir; kira
+geri çekilme süresiyle değiştirilir ve işçi çalışmaya devam eder.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import OutboxEmail
+
+# Sahiplenilen kayıtlar bu süre boyunca başka bir işçiye verilmez
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def enqueue_mail(subject, message, recipient_list, from_email=None):
+    """E-postayı göndermek yerine kuyruğa ekler; alıcı yoksa hiçbir şey yapmaz"""
+    recipients = [email for email in recipient_list if email]
+    if not recipients:
+        return None
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=recipients,
+    )
+
+
+def _claim(batch_size):
+    """Teslim zamanı gelmiş kayıtları sahiplenir ve döndürür"""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxEmail.objects.filter(status='PENDING', next_attempt_at__lte=now)
+            .select_for_update(skip_locked=True)
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        OutboxEmail.objects.filter(id__in=ids).update(next_attempt_at=now + CLAIM_LEASE)
+    return list(OutboxEmail.objects.filter(id__in=ids).order_by('id'))
+
+
+def _record_failure(email, exc, max_attempts, backoff):
+    """Başarısız denemeyi kaydeder ve sonraki denemeyi geri çekilme süresi kadar erteler"""
+    email.attempts += 1
+    email.last_error = str(exc)
+    email.next_attempt_at = timezone.now() + timedelta(seconds=backoff * 2 ** (email.attempts - 1))
+    if email.attempts >= max_attempts:
+        email.status = 'FAILED'
+    return email
+
+
+def send_pending(batch_size=100, max_attempts=5, backoff=60, connection=None):
+    """
+    Kuyruktaki bir partiyi tek SMTP bağlantısıyla gönderir.
+
+    ``(gönderilen, başarısız)`` sayılarını döndürür. Başarısız mesajın
+    sonraki denemesi ``backoff * 2 ** (deneme - 1)`` saniye sonradır;
+    ``max_attempts`` denemeden sonra ``FAILED`` olarak işaretlenir.
+    """
+    emails = _claim(batch_size)
+    if not emails:
+        return 0, 0
+
+    connection = connection or get_connection()
+    sent_ids = []
+    failed = []
+    try:
+        connection.open()
+    except Exception as exc:
+        # Bağlantı açılamadı; kira bırakılır ve partinin tamamı geri çekilmeyle ertelenir
+        failed = [_record_failure(email, exc, max_attempts, backoff) for email in emails]
+        OutboxEmail.objects.bulk_update(failed, ['attempts', 'last_error', 'next_attempt_at', 'status'])
+        return 0, len(failed)
+
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, email.recipients, connection=connection
+            )
+            try:
+                message.send()
+            except Exception as exc:
+                failed.append(_record_failure(email, exc, max_attempts, backoff))
+            else:
+                sent_ids.append(email.id)
+    finally:
+        connection.close()
+
+    now = timezone.now()
+    OutboxEmail.objects.filter(id__in=sent_ids).update(status='SENT', sent_at=now, next_attempt_at=now)
+    OutboxEmail.objects.bulk_update(failed, ['attempts', 'last_error', 'next_attempt_at', 'status'])
+    return len(sent_ids), len(failed)
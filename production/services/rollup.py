@@ -0,0 +1,134 @@
+"""
+Günlük üretim özeti (rollup).
+
+``ProductionDailyRollup`` takım, parça ve gün başına toplam üretimi tutar.
+Üretim yazma yolu her kayıt için ``add_to_rollup`` çağırır; satırlar tek
+bir ``INSERT ... ON CONFLICT DO UPDATE`` (upsert) sorgusuyla oluşturulur ya
+da artırılır. Bunu desteklemeyen veritabanlarında satır ``F()`` UPDATE ile
+artırılır, yoksa sıfır miktarla oluşturulup aynı UPDATE ile artırılır.
+Gösterge paneli, profil ve takım toplamları bu tablodan okunur; maliyet üretim kaydı sayısına değil gün sayısına bağlıdır.
+
+Üretim kaydının takımı, parçası, zamanı ya da miktarı değiştiğinde
+``replace_in_rollup`` eski katkıyı düşüp yenisini ekler; silinen kayıtlar
+``remove_from_rollup`` ile düşülür. Sıfıra inen satırlar silinir.
+
+``rebuild_rollup`` tabloyu ``Production`` kayıtlarından yeniden oluşturur.
+"""
+from collections import defaultdict
+
+from functools import reduce
+from operator import or_
+
+from django.db import connection, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from ..models import Production, ProductionDailyRollup
+
+
+def _upsert(totals):
+    """Tüm özet satırlarını tek ``INSERT ... ON CONFLICT DO UPDATE`` sorgusuyla artırır"""
+    table = connection.ops.quote_name(ProductionDailyRollup._meta.db_table)
+    rows = ', '.join(['(%s, %s, %s, %s)'] * len(totals))
+    params = []
+    for (team_id, part_id, day), quantity in totals.items():
+        params.extend([team_id, part_id, connection.ops.adapt_datefield_value(day), quantity])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (team_id, part_id, day, quantity) VALUES {rows} '
+            f'ON CONFLICT (team_id, part_id, day) DO UPDATE SET quantity = {table}.quantity + EXCLUDED.quantity',
+            params,
+        )
+
+
+def _increment(key, quantity):
+    team_id, part_id, day = key
+    return ProductionDailyRollup.objects.filter(team_id=team_id, part_id=part_id, day=day).update(
+        quantity=F('quantity') + quantity
+    )
+
+
+def _totals(productions):
+    """Üretim kayıtlarını ``(takım ID, parça ID, gün)`` başına toplar"""
+    totals = defaultdict(int)
+    for production in productions:
+        day = timezone.localdate(production.created_at)
+        totals[(production.team_id, production.part_id, day)] += production.quantity
+    return totals
+
+
+def add_to_rollup(productions):
+    """
+    Üretim kayıtlarını günlük özete ekler.
+
+    Kayıtlar takım, parça ve gün başına toplanır ve tek upsert sorgusuyla
+    yazılır. Gün, kaydın ``created_at`` değerinin yerel tarihidir.
+    """
+    totals = _totals(productions)
+    if not totals:
+        return
+    if connection.features.supports_update_conflicts_with_target:
+        _upsert(totals)
+        return
+
+    # ON CONFLICT desteklemeyen veritabanlarında önce UPDATE, gerekirse INSERT
+    with transaction.atomic(savepoint=False):
+        missing = [key for key, quantity in totals.items() if not _increment(key, quantity)]
+        if missing:
+            # Satırlar ilk kullanımda oluşturulur; eşzamanlı oluşturma çakışmaları yok sayılır
+            ProductionDailyRollup.objects.bulk_create(
+                [ProductionDailyRollup(team_id=team_id, part_id=part_id, day=day) for team_id, part_id, day in missing],
+                ignore_conflicts=True,
+            )
+            for key in missing:
+                _increment(key, totals[key])
+
+
+def remove_from_rollup(productions):
+    """
+    Üretim kayıtlarının katkısını günlük özetten düşer.
+
+    Miktar sıfırın altına inmez; özet ``Production`` tablosundan sapmışsa
+    ``backfill_production_rollup`` ile yeniden oluşturulmalıdır. Sıfıra
+    inen satırlar silinir.
+    """
+    totals = _totals(productions)
+    if not totals:
+        return
+    with transaction.atomic(savepoint=False):
+        for (team_id, part_id, day), quantity in totals.items():
+            ProductionDailyRollup.objects.filter(team_id=team_id, part_id=part_id, day=day).update(
+                quantity=Greatest(F('quantity') - quantity, 0)
+            )
+        keys = [Q(team_id=team_id, part_id=part_id, day=day) for team_id, part_id, day in totals]
+        ProductionDailyRollup.objects.filter(reduce(or_, keys), quantity=0).delete()
+
+
+def replace_in_rollup(previous, current):
+    """Güncellenen üretim kaydının eski katkısını düşer ve yenisini ekler; katkı değişmediyse sorgu çalıştırmaz"""
+    before, after = _totals([previous]), _totals([current])
+    if before == after:
+        return
+    remove_from_rollup([previous])
+    add_to_rollup([current])
+
+
+def rebuild_rollup(batch_size=1000):
+    """Günlük özeti ``Production`` kayıtlarından yeniden oluşturur, oluşturulan satır sayısını döndürür"""
+    rows = (
+        Production.objects.annotate(day=TruncDate('created_at'))
+        .values('team_id', 'part_id', 'day')
+        .annotate(total=Sum('quantity'))
+        .order_by()
+    )
+    with transaction.atomic():
+        ProductionDailyRollup.objects.all().delete()
+        created = ProductionDailyRollup.objects.bulk_create(
+            [
+                ProductionDailyRollup(team_id=row['team_id'], part_id=row['part_id'], day=row['day'], quantity=row['total'])
+                for row in rows.iterator()
+            ],
+            batch_size=batch_size,
+        )
+    return len(created)
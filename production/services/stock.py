@@ -0,0 +1,410 @@
+"""
+Parça stoğu için tek yetkili değişiklik servisi.
+
+Üretim kayıtları, montaj ve söküm işlemleri stoğu yalnızca bu modül
+üzerinden değiştirir. Her değişiklik tek bir koşullu ``F()`` tabanlı
+UPDATE sorgusudur; ``is_low_stock`` alanı da aynı sorguda güncellenir.
+Böylece eşzamanlı isteklerde kayıp veya çift artış oluşmaz.
+
+Her değişiklik ayrıca ``StockMovement`` defterine eklenir. Ayarlarda
+``STOCK_LEDGER_DEFER_INCREMENTS`` açıksa stok artışları ``Part`` satırına
+hiç dokunmaz: yalnızca bekleyen bir hareket eklenir ve periyodik
+``compact_stock_ledger`` komutu bunları ``Part.stock`` anlık görüntüsüne
+katlar. Azaltmalar her zaman anlık görüntü üzerinde koşullu UPDATE ile
+yapılır; bekleyen hareketler yalnızca artış olduğundan bu güvenlidir.
+
+``Part.stock_shards`` sıfırdan büyük olan yoğun parçalarda artış ve
+azaltmalar ``StockShard`` sayaç satırlarından rastgele birine yazılır;
+toplam, sıkıştırma sırasında tembel olarak ``Part.stock`` üzerine katlanır.
+"""
+import random
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import BooleanField, Case, DateTimeField, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import Part, Production, StockMovement, StockShard
+from .alerts import alert_low_stock
+from .dashboard import invalidate_dashboard
+from .versions import invalidate_catalog
+from .rollup import add_to_rollup
+
+
+def _part_pk(part):
+    """Parça nesnesi ya da ID'si verildiğinde ID'yi döndürür"""
+    return getattr(part, 'pk', part)
+
+
+def _shard_count(part):
+    """Parça nesnesinin stok sayacı sayısını döndürür; yalnızca ID verilmişse 0"""
+    return part.stock_shards if isinstance(part, Part) else 0
+
+
+def ledger_deferred():
+    """Stok artışlarının bekleyen hareket olarak ertelenip ertelenmediğini döndürür"""
+    return getattr(settings, 'STOCK_LEDGER_DEFER_INCREMENTS', False)
+
+
+def _low_stock_after(delta):
+    """Stok ``delta`` kadar değiştikten sonraki düşük stok durumunu hesaplayan ifade"""
+    return Case(
+        When(minimum_stock__gt=F('stock') + delta, then=Value(True)),
+        default=Value(False),
+        output_field=BooleanField(),
+    )
+
+
+def _rearm_alert_after(delta):
+    """Stok minimumun üzerine çıkarsa düşük stok uyarısını yeniden kuran ifade"""
+    return Case(
+        When(minimum_stock__gt=F('stock') + delta, then=F('low_stock_alerted')),
+        default=Value(False),
+        output_field=BooleanField(),
+    )
+
+
+def _update_snapshot(part_id, delta):
+    """Stoğu tek bir UPDATE ile ``delta`` kadar değiştirir, etkilenen satır sayısını döndürür"""
+    queryset = Part.objects.filter(pk=part_id)
+    if delta < 0:
+        # Stok hiçbir zaman negatife düşmemeli: koşul sorgunun içinde
+        queryset = queryset.filter(stock__gte=-delta)
+    return queryset.update(
+        stock=F('stock') + delta,
+        is_low_stock=_low_stock_after(delta),
+        low_stock_alerted=_rearm_alert_after(delta),
+        updated_at=timezone.now(),
+    )
+
+
+def _update_shard(part_id, delta, shards):
+    """Rastgele seçilen bir stok sayacını ``delta`` kadar değiştirir, etkilenen satır sayısını döndürür"""
+    counters = StockShard.objects.filter(part_id=part_id)
+    index = random.randrange(shards)
+
+    if delta > 0:
+        updated = counters.filter(index=index).update(count=F('count') + delta)
+        if not updated:
+            # Sayaç satırları ilk kullanımda oluşturulur
+            StockShard.objects.bulk_create(
+                [StockShard(part_id=part_id, index=i) for i in range(shards)],
+                ignore_conflicts=True,
+            )
+            updated = counters.filter(index=index).update(count=F('count') + delta)
+        return updated
+
+    # Sayaçlar da negatife düşmemeli; seçilen sayaç yetmezse yeterli olan herhangi biri denenir
+    updated = counters.filter(index=index, count__gte=-delta).update(count=F('count') + delta)
+    if not updated:
+        candidate = counters.filter(count__gte=-delta).values('pk')[:1]
+        updated = StockShard.objects.filter(pk=Subquery(candidate), count__gte=-delta).update(
+            count=F('count') + delta
+        )
+    return updated
+
+
+def _fold(part_id):
+    """Parçanın sayaçlarını ve bekleyen hareketlerini anlık görüntüye katlar"""
+    folded = fold_shards([part_id])
+    if ledger_deferred():
+        folded += compact_stock([part_id], skip_locked=False)
+    return folded
+
+
+def _apply_deltas(deltas, reason, shards=None):
+    """
+    ``{part_id: delta}`` değişikliklerini uygular ve deftere yazar.
+
+    ``shards`` verilirse ``{part_id: sayaç sayısı}`` eşlemesidir; sayaçlı
+    parçalar ``Part`` satırı yerine sayaçlara yazılır. Başarısız olan (stoğu
+    yetmeyen ya da bulunamayan) parça ID'lerini döndürür; bu durumda hiçbir
+    değişiklik yazılmaz.
+    """
+    deferred = ledger_deferred()
+    shards = shards or {}
+    movements = []
+
+    # Birden fazla parça varsa kısmi değişiklikleri geri alabilmek için savepoint gerekir
+    with transaction.atomic(savepoint=len(deltas) > 1):
+        for part_id, delta in deltas.items():
+            if shards.get(part_id):
+                updated = _update_shard(part_id, delta, shards[part_id])
+            elif delta > 0 and deferred:
+                # Artış yalnızca bekleyen bir hareket olarak eklenir; Part satırı kilitlenmez
+                movements.append(StockMovement(part_id=part_id, delta=delta, reason=reason))
+                continue
+            else:
+                updated = _update_snapshot(part_id, delta)
+
+            if not updated and delta < 0 and (_fold(part_id) or shards.get(part_id)):
+                # Sayaçlar ya da anlık görüntü yetmiyorsa katlayıp anlık görüntüden bir kez daha dene
+                updated = _update_snapshot(part_id, delta)
+            if not updated:
+                failed = [part_id]
+                break
+            movements.append(StockMovement(part_id=part_id, delta=delta, reason=reason, applied=True))
+        else:
+            failed = []
+            StockMovement.objects.bulk_create(movements)
+            invalidate_dashboard()
+            invalidate_catalog()
+
+        if failed and len(deltas) > 1:
+            transaction.set_rollback(True)
+
+    return failed
+
+
+def _sync_instance(part):
+    """Bellekteki parça nesnesini veritabanındaki stok değerleriyle eşitler"""
+    if not isinstance(part, Part):
+        return
+    part.refresh_from_db(fields=['stock', 'is_low_stock', 'low_stock_alerted', 'updated_at'])
+    if part.stock_shards or ledger_deferred() or hasattr(part, 'pending_stock'):
+        part.pending_stock = Part.objects.with_live_stock().values_list('pending_stock', flat=True).get(pk=part.pk)
+        part.live_stock = part.stock + part.pending_stock
+        part.is_low_stock = part.live_stock < part.minimum_stock
+
+
+def increase_stock(part, quantity, reason='PRODUCTION', refresh=False):
+    """Parça stoğunu atomik olarak artırır"""
+    if quantity <= 0:
+        raise ValidationError("Artırılacak miktar pozitif olmalıdır.")
+
+    part_id = _part_pk(part)
+    if _apply_deltas({part_id: quantity}, reason, {part_id: _shard_count(part)}):
+        raise Part.DoesNotExist(f"Parça bulunamadı: {_part_pk(part)}")
+
+    if refresh:
+        _sync_instance(part)
+
+
+def decrease_stock(part, quantity, reason='ASSEMBLY', refresh=False):
+    """
+    Parça stoğunu atomik olarak azaltır.
+
+    Stok yetersizse hiçbir satır güncellenmez ve ValidationError yükseltilir.
+    """
+    if quantity <= 0:
+        raise ValidationError("Azaltılacak miktar pozitif olmalıdır.")
+
+    part_id = _part_pk(part)
+    if _apply_deltas({part_id: -quantity}, reason, {part_id: _shard_count(part)}):
+        current = Part.objects.with_live_stock().filter(pk=_part_pk(part)).values('name', 'live_stock').first()
+        if current is None:
+            raise Part.DoesNotExist(f"Parça bulunamadı: {_part_pk(part)}")
+        raise ValidationError(
+            f"Stokta yeterli {current['name']} parçası yok. "
+            f"Mevcut: {current['live_stock']}, İstenen: {quantity}"
+        )
+
+    if refresh:
+        _sync_instance(part)
+        # Uyarı yalnızca yeterli stoktan düşük stoğa geçişte tetiklenir
+        alert_low_stock(part)
+
+
+def lock_live_stock(part):
+    """
+    Parça satırını kilitler ve anlık stoğunu döndürür.
+
+    Mutlak stok yazımları (ör. API'de ``stock`` alanı) fark hesabını okumaların
+    gösterdiği anlık stoğa göre yapmalıdır. Sayaçlar ve bekleyen hareketler önce anlık
+    görüntüye katlanır; kilit sırası katlama yolları ile aynıdır (önce sayaç ve
+    hareket satırları, sonra parça satırı). Kilidin işe yaraması için açık bir işlem
+    içinde çağrılmalıdır.
+    """
+    part_id = _part_pk(part)
+    fold_shards([part_id])
+    compact_stock([part_id], skip_locked=False)
+    if not list(Part.objects.select_for_update().filter(pk=part_id).values_list('pk', flat=True)):
+        raise Part.DoesNotExist(f"Parça bulunamadı: {part_id}")
+    return live_stock(part_id)
+
+
+def set_stock(part, quantity, reason='ADJUSTMENT'):
+    """
+    Parçanın anlık stoğunu ``quantity`` değerine getirir ve uygulanan farkı döndürür.
+
+    Fark kilit altında anlık stoğa göre hesaplanır ve stok hareketi olarak yazılır.
+    """
+    if quantity < 0:
+        raise ValidationError({'stock': 'Stok miktarı negatif olamaz.'})
+
+    part_id = _part_pk(part)
+    with transaction.atomic():
+        delta = quantity - lock_live_stock(part_id)
+        if delta and _apply_deltas({part_id: delta}, reason):
+            raise ValidationError({'stock': 'Stok eşzamanlı olarak değişti, tekrar deneyin.'})
+    return delta
+
+
+def record_production(team, part, quantity, created_by=None):
+    """
+    Üretim kaydı oluşturur ve stoğu bir kez artırır.
+
+    Stok artışı ``Production.save()`` içinde bu servis üzerinden yapılır;
+    çağıranın ayrıca stok güncellemesi yapmasına gerek yoktur.
+    """
+    if quantity <= 0:
+        raise ValidationError({'quantity': 'Üretim miktarı pozitif olmalıdır.'})
+
+    with transaction.atomic():
+        production = Production.objects.create(
+            team=team,
+            part=part,
+            quantity=quantity,
+            created_by=created_by,
+        )
+
+    _sync_instance(part)
+    return production
+
+
+def record_productions(team, entries, created_by=None):
+    """
+    Birden fazla üretim kaydını tek seferde oluşturur.
+
+    ``entries`` her biri ``part``, ``quantity`` ve isteğe bağlı ``created_at``
+    anahtarlarını içeren sözlüklerin listesidir. Kayıtlar ``bulk_create`` ile
+    eklenir, stok ise her parça için toplanmış miktarla tek bir UPDATE ile
+    artırılır.
+    """
+    productions = [
+        Production(team=team, part=entry['part'], quantity=entry['quantity'], created_by=created_by)
+        for entry in entries
+    ]
+
+    totals = defaultdict(int)
+    shards = {}
+    for entry, production in zip(entries, productions):
+        if production.quantity <= 0:
+            raise ValidationError({'quantity': 'Üretim miktarı pozitif olmalıdır.'})
+        totals[production.part_id] += production.quantity
+        shards[production.part_id] = _shard_count(entry['part'])
+
+    with transaction.atomic():
+        # bulk_create Production.save() çağırmaz; stok aşağıda parça başına bir kez artırılır
+        Production.objects.bulk_create(productions)
+
+        # auto_now_add alanı istemci zamanını ezer; verilenleri tek UPDATE ile geri yaz
+        client_times = {
+            production.pk: entry['created_at']
+            for production, entry in zip(productions, entries)
+            if entry.get('created_at')
+        }
+        if client_times:
+            Production.objects.filter(pk__in=client_times).update(created_at=Case(
+                *[When(pk=pk, then=Value(created_at)) for pk, created_at in client_times.items()],
+                output_field=DateTimeField(),
+            ))
+            for production in productions:
+                production.created_at = client_times.get(production.pk, production.created_at)
+
+        failed = _apply_deltas(totals, 'PRODUCTION', shards)
+        if failed:
+            raise Part.DoesNotExist(f"Parça bulunamadı: {failed[0]}")
+
+        add_to_rollup(productions)
+
+    return productions
+
+
+def compact_stock(part_ids=None, batch_size=5000, skip_locked=True):
+    """
+    Bekleyen stok hareketlerini ``Part.stock`` anlık görüntüsüne katlar.
+
+    Her parti tek bir işlemde kilitlenir, parça başına toplanır ve her parça
+    için tek UPDATE ile uygulanır. ``skip_locked`` açıkken paralel çalışan
+    sıkıştırıcılar birbirini beklemez. Katlanan hareket sayısını döndürür.
+    """
+    folded = 0
+    while True:
+        with transaction.atomic():
+            pending = StockMovement.objects.filter(applied=False)
+            if part_ids is not None:
+                pending = pending.filter(part_id__in=part_ids)
+            rows = list(
+                pending.select_for_update(skip_locked=skip_locked)
+                .order_by('id')
+                .values_list('id', 'part_id', 'delta')[:batch_size]
+            )
+            if not rows:
+                break
+
+            totals = defaultdict(int)
+            for _, part_id, delta in rows:
+                totals[part_id] += delta
+
+            StockMovement.objects.filter(id__in=[row[0] for row in rows]).update(applied=True)
+            _fold_into_snapshot(totals)
+
+        folded += len(rows)
+        if len(rows) < batch_size:
+            break
+    return folded
+
+
+def fold_shards(part_ids=None):
+    """
+    Stok sayaçlarındaki miktarları ``Part.stock`` anlık görüntüsüne katlar.
+
+    Sayaçlar tek işlemde kilitlenip sıfırlanır; parça başına tek UPDATE
+    çalışır. Katlanan sayaç sayısını döndürür.
+    """
+    with transaction.atomic():
+        counters = StockShard.objects.exclude(count=0)
+        if part_ids is not None:
+            counters = counters.filter(part_id__in=part_ids)
+        rows = list(counters.select_for_update().values_list('id', 'part_id', 'count'))
+        if not rows:
+            return 0
+
+        totals = defaultdict(int)
+        for _, part_id, count in rows:
+            totals[part_id] += count
+
+        StockShard.objects.filter(id__in=[row[0] for row in rows]).update(count=0)
+        _fold_into_snapshot(totals)
+    return len(rows)
+
+
+def _fold_into_snapshot(totals):
+    """Parça başına toplanmış miktarları anlık görüntüye tek UPDATE ile ekler"""
+    now = timezone.now()
+    invalidate_dashboard()
+    invalidate_catalog()
+    for part_id, delta in totals.items():
+        Part.objects.filter(pk=part_id).update(
+            stock=F('stock') + delta,
+            is_low_stock=_low_stock_after(delta),
+            low_stock_alerted=_rearm_alert_after(delta),
+            stock_snapshot_at=now,
+            updated_at=now,
+        )
+
+
+def live_stock(part):
+    """Parçanın anlık stoğunu (anlık görüntü + bekleyen hareketler + sayaçlar) tek sorguda döndürür"""
+    return Part.objects.with_live_stock().values_list('live_stock', flat=True).get(pk=_part_pk(part))
+
+
+def stock_at(part, moment):
+    """
+    Parçanın verilen andaki stoğunu defterden tek sorguda hesaplar.
+
+    Anlık stoktan, o andan sonra eklenen hareketlerin toplamı çıkarılır.
+    """
+    later = StockMovement.objects.filter(
+        part=OuterRef('pk'), created_at__gt=moment
+    ).order_by().values('part').annotate(total=Sum('delta')).values('total')
+    return (
+        Part.objects.with_live_stock()
+        .annotate(later=Coalesce(Subquery(later, output_field=IntegerField()), 0))
+        .values_list(F('live_stock') - F('later'), flat=True)
+        .get(pk=_part_pk(part))
+    )
@@ -0,0 +1,72 @@
+"""
+Varlık başına sürüm damgaları.
+
+Koşullu GET (``ETag``) yanıtları bu damgalardan
+türetilir. ``catalog`` damgası parça kataloğunu ve stokları, ``aircraft:<id>``
+damgası tek bir uçağın parçalarını ve sayaçlarını, ``aircraft`` damgası ise
+tüm uçakları kapsar (toplu yeniden hesaplamalar için).
+
+Damgalar ``time.time_ns()`` değerleridir ve yazan işlem commit edildikten
+sonra yenilenir; geri alınan işlemler damgayı değiştirmez. Önbellekten
+düşen damga okunurken yeniden oluşturulur, bu da istemcilerin bir kez tam
+yanıt almasına yol açar.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'version:{}'
+
+CATALOG = 'catalog'
+ALL_AIRCRAFT = 'aircraft'
+
+
+def aircraft_scope(aircraft_id):
+    return f'aircraft:{aircraft_id}'
+
+
+def version_keys(scopes):
+    return [VERSION_KEY.format(scope) for scope in scopes]
+
+
+def _bump(scopes):
+    now = time.time_ns()
+    cache.set_many({key: now for key in version_keys(scopes)}, None)
+
+
+def bump_versions(*scopes):
+    """Verilen kapsamların damgalarını geçerli işlem commit edildikten sonra yeniler"""
+    if scopes:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def invalidate_catalog():
+    bump_versions(CATALOG)
+
+
+def invalidate_aircraft(aircraft_ids=None):
+    """Verilen uçakların (``None`` ise tüm uçakların) damgalarını yeniler"""
+    if aircraft_ids is None:
+        bump_versions(ALL_AIRCRAFT)
+    else:
+        bump_versions(*[aircraft_scope(aircraft_id) for aircraft_id in aircraft_ids])
+
+
+def read_versions(scopes, extra_keys=()):
+    """
+    Kapsamların damgalarını ve ek önbellek anahtarlarını tek ``get_many`` ile okur.
+
+    ``({kapsam: damga}, {ek anahtar: değer})`` döndürür; eksik damgalar
+    şimdiki zamanla oluşturulur.
+    """
+    keys = version_keys(scopes)
+    values = cache.get_many([*keys, *extra_keys])
+    versions = {}
+    for scope, key in zip(scopes, keys):
+        if key not in values:
+            # Eşzamanlı oluşturmada ilk yazan kazanır
+            cache.add(key, time.time_ns(), None)
+            values[key] = cache.get(key)
+        versions[scope] = values[key]
+    return versions, {key: values.get(key) for key in extra_keys}
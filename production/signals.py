@@ -1,48 +1,19 @@
-from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
-from django.conf import settings
-from .models import Part, Production, Aircraft, AircraftPart, Team
+from .models import Part, Production, Aircraft, AircraftPart, Team, PART_COUNT_FIELDS
+from .services.outbox import enqueue_mail
+from .services.alerts import alert_low_stock, invalidate_low_stock_recipients
+from .services.assembly import notify_ready_for_assembly, rebuild_part_counts
+from .services.dashboard import invalidate_dashboard
+from .services.membership import invalidate_membership
+from .services.rollup import remove_from_rollup
+from .services.versions import invalidate_aircraft, invalidate_catalog
 
 @receiver(post_save, sender=Part)
 def check_low_stock(sender, instance, **kwargs):
-    """Parça stoku düşük olduğunda ilgili takıma bildirim gönder"""
-    if instance.is_low_stock:
-        # Parçayı üreten takımı bul
-        team = Team.objects.filter(team_type=instance.team_type).first()
-        if team:
-            subject = f'Düşük Stok Uyarısı: {instance.name}'
-            message = f'''
-            Sayın {team.name} üyeleri,
-
-            {instance.name} parçasının stok seviyesi kritik seviyenin altına düştü.
-            Mevcut stok: {instance.stock}
-
-            Lütfen en kısa sürede üretim planlaması yapınız.
-
-            Saygılarımızla,
-            Üretim Sistemi
-            '''
-            recipient_list = [
-                member.email for member in team.members.all()
-                if member.email
-            ]
-            if recipient_list:
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    recipient_list,
-                    fail_silently=True
-                )
-
-@receiver(post_save, sender=Production)
-def update_part_stock(sender, instance, created, **kwargs):
-    """Üretim kaydedildiğinde parça stoğunu güncelle"""
-    if created:
-        instance.part.stock += instance.quantity
-        instance.part.save()
+    """Parça stoku düşüğe yeni geçtiğinde ilgili takıma bildirim gönder"""
+    alert_low_stock(instance)
 
 @receiver(post_save, sender=Aircraft)
 def notify_completion(sender, instance, created, **kwargs):
@@ -63,48 +34,18 @@ def notify_completion(sender, instance, created, **kwargs):
             user.email for user in User.objects.filter(is_staff=True)
             if user.email
         ]
-        if recipient_list:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                recipient_list,
-                fail_silently=True
-            )
+        enqueue_mail(subject, message, recipient_list)
 
 @receiver(post_save, sender=AircraftPart)
 def check_aircraft_completion(sender, instance, created, **kwargs):
     """Uçağa parça eklendiğinde tamamlanma durumunu kontrol et"""
-    if created and instance.aircraft.is_complete:
+    if created:
         # Montaj takımına bildirim gönder
-        assembly_team = Team.objects.filter(team_type='ASSEMBLY').first()
-        if assembly_team:
-            subject = f'Uçak Montaja Hazır: {instance.aircraft.get_aircraft_type_display()}'
-            message = f'''
-            Sayın {assembly_team.name} üyeleri,
-
-            {instance.aircraft.get_aircraft_type_display()} için gerekli tüm parçalar hazır.
-            Montaj işlemine başlayabilirsiniz.
-
-            Saygılarımızla,
-            Üretim Sistemi
-            '''
-            recipient_list = [
-                member.email for member in assembly_team.members.all()
-                if member.email
-            ]
-            if recipient_list:
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    recipient_list,
-                    fail_silently=True
-                )
+        notify_ready_for_assembly(instance.aircraft)
 
 @receiver(m2m_changed, sender=Team.members.through)
 def update_user_team(sender, instance, action, pk_set, **kwargs):
-    """Kullanıcı takıma eklendiğinde veya çıkarıldığında bildirim gönder"""
+    """Kullanıcı takıma eklendiğinde veya çıkarıldığında bildirimi kuyruğa ekle"""
     if action in ["post_add", "post_remove"]:
         users = User.objects.filter(pk__in=pk_set)
         for user in users:
@@ -131,10 +72,81 @@ def update_user_team(sender, instance, action, pk_set, **kwargs):
                     Üretim Sistemi
                     '''
                 
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [user.email],
-                    fail_silently=True
-                ) 
\ No newline at end of file
+                enqueue_mail(subject, message, [user.email]) 
+
+@receiver(m2m_changed, sender=Team.members.through)
+def invalidate_recipients_on_membership_change(sender, instance, action, reverse, **kwargs):
+    """Takım üyeliği değiştiğinde önbellekteki düşük stok alıcılarını commit sonrası sil"""
+    if action in ["post_add", "post_remove", "post_clear"]:
+        # Kullanıcı tarafından yapılan değişikliklerde hangi takımların etkilendiği bilinmez
+        invalidate_low_stock_recipients(None if reverse else [instance.team_type])
+
+@receiver([post_save, post_delete], sender=Team)
+def invalidate_recipients_on_team_change(sender, instance, **kwargs):
+    """Takım eklendiğinde, değiştiğinde veya silindiğinde alıcı önbelleğini commit sonrası sil"""
+    invalidate_low_stock_recipients()
+
+@receiver(m2m_changed, sender=Aircraft.parts.through)
+def rebuild_counts_on_parts_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Parçalar doğrudan ilişki üzerinden eklendiğinde veya çıkarıldığında uçak sayaçlarını yeniden hesapla"""
+    if action not in ["post_add", "post_remove", "post_clear"]:
+        return
+    if not reverse:
+        rebuild_part_counts([instance.pk])
+        instance.refresh_from_db(fields=['is_complete', 'completed_at', *PART_COUNT_FIELDS.values()])
+    else:
+        # Parça tarafından yapılan temizlemede etkilenen uçaklar bilinmez
+        rebuild_part_counts(pk_set if action != "post_clear" else None)
+
+@receiver(post_save, sender=Part)
+@receiver(post_save, sender=Production)
+@receiver(post_save, sender=Aircraft)
+@receiver(post_save, sender=AircraftPart)
+@receiver(post_delete, sender=Part)
+@receiver(post_delete, sender=Production)
+@receiver(post_delete, sender=Aircraft)
+def invalidate_dashboard_on_write(sender, **kwargs):
+    """Üretim, parça ve uçak yazımlarında gösterge paneli görüntüsünü commit sonrası bayatlat"""
+    # AircraftPart silmeleri stok servisinden geçer; post_delete alıcısı toplu silmeyi yavaşlatırdı
+    invalidate_dashboard()
+
+@receiver(m2m_changed, sender=Team.members.through)
+def invalidate_membership_on_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Takım üyeliği değiştiğinde etkilenen kullanıcıların önbellekteki takımını commit sonrası sil"""
+    if reverse:
+        # Kullanıcı tarafından yapılan değişiklik; etkilenen tek kullanıcı instance'tır
+        if action in ["post_add", "post_remove", "post_clear"]:
+            invalidate_membership([instance.pk])
+    elif action in ["post_add", "post_remove"]:
+        invalidate_membership(pk_set)
+    elif action == "pre_clear":
+        # Temizlemeden sonra üyeler bilinmez; silinecek üyeler önceden okunur
+        invalidate_membership(list(instance.members.values_list('pk', flat=True)))
+
+@receiver(post_save, sender=Team)
+@receiver(pre_delete, sender=Team)
+def invalidate_membership_on_team_change(sender, instance, **kwargs):
+    """Takım tipi değiştiğinde veya takım silindiğinde üyelerin önbellekteki takımını commit sonrası sil"""
+    if kwargs.get('created'):
+        return
+    invalidate_membership(list(instance.members.values_list('pk', flat=True)))
+
+@receiver([post_save, post_delete], sender=Part)
+def bump_catalog_version(sender, instance, **kwargs):
+    """Parça eklendiğinde, değiştiğinde veya silindiğinde katalog damgasını commit sonrası yenile"""
+    invalidate_catalog()
+
+@receiver([post_save, post_delete], sender=Aircraft)
+def bump_aircraft_version(sender, instance, **kwargs):
+    """Uçak değiştiğinde veya silindiğinde uçağın damgasını commit sonrası yenile"""
+    invalidate_aircraft([instance.pk])
+
+@receiver(post_save, sender=AircraftPart)
+def bump_aircraft_version_on_part_added(sender, instance, **kwargs):
+    """Uçağa parça eklendiğinde uçağın damgasını commit sonrası yenile"""
+    invalidate_aircraft([instance.aircraft_id])
+
+@receiver(post_delete, sender=Production)
+def remove_production_from_rollup(sender, instance, **kwargs):
+    """Üretim kaydı silindiğinde katkısını günlük üretim özetinden düş"""
+    remove_from_rollup([instance])
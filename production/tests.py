@@ -1,13 +1,69 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, RequestFactory, override_settings
+from django.db import connection
+from django.core.cache import cache
+from django.test.utils import CaptureQueriesContext
+from unittest import skipUnless
+from unittest.mock import patch
+import threading
 from django.contrib.auth.models import User
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
-from .models import Team, Part, Aircraft, Production, AircraftPart
+from .models import Team, Part, Aircraft, Production, ProductionDailyRollup, AircraftPart, StockMovement, OutboxEmail
 from .models.constants import TEAM_TYPES, AIRCRAFT_TYPES, REQUIRED_PARTS
+from .services import stock as stock_service
+from .services.stock import record_production
+from .services.assembly import add_part_to_aircraft, available_parts
+from .services import dashboard as dashboard_service
+from .services.dashboard import compute_snapshot, dashboard_snapshot
+from .services.membership import TEAM_CHECK_SESSION_KEY, get_user_team
+from .views import TeamCheckMiddleware
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.http import HttpResponse
+from .services.outbox import enqueue_mail, send_pending
+from .services.alerts import low_stock_recipients
+from django.core import mail
+from django.core.management import call_command
+from io import StringIO
+from django.core.exceptions import ValidationError
 from django.utils import timezone
+from datetime import timedelta
 import json
 
+
+class FixtureMixin:
+    """
+    Testlerde tekrarlanan kullanıcı, takım ve parça kurulumları.
+
+    ``setUp`` önbelleği temizler: sqlite kullanıcı ve takım ID'lerini testler
+    arasında yeniden kullandığından, önceki testten kalan üyelik kayıtları
+    yeni kullanıcılara eşleşebilir.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def create_user(self, username, superuser=False, **fields):
+        """Parolası kullanıcı adıyla aynı olan bir kullanıcı oluşturur"""
+        create = User.objects.create_superuser if superuser else User.objects.create_user
+        return create(username=username, password=username, **fields)
+
+    def create_member(self, team_name, team_type, username='producer', **fields):
+        """Bir takım ve ona üye bir kullanıcı oluşturur; (kullanıcı, takım) döndürür"""
+        user = self.create_user(username, **fields)
+        team = Team.objects.create(name=team_name, team_type=team_type)
+        team.members.add(user)
+        return user, team
+
+    def create_parts(self, aircraft_type='TB2', team_types=None, **fields):
+        """Verilen takım tipleri (varsayılan: uçak tipinin gerekli parçaları) için birer parça oluşturur"""
+        team_types = team_types or REQUIRED_PARTS[aircraft_type]
+        return {
+            team_type: Part.objects.create(team_type=team_type, aircraft_type=aircraft_type, **fields)
+            for team_type in team_types
+        }
+
 class ModelTests(TestCase):
     def setUp(self):
         """Test için gerekli verileri oluşturur."""
@@ -300,7 +356,7 @@ class APITests(APITestCase):
         # Test production history
         response = self.client.get(reverse('api:team-production-history', args=[self.avionics_team.id]))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
         
         # Test team members endpoint
         response = self.client.get(reverse('api:team-members', args=[self.avionics_team.id]))
@@ -602,4 +658,1437 @@ class IntegrationTests(APITestCase):
         self.assertEqual(self.avionics_part.stock, 10 - REQUIRED_PARTS['TB2']['AVIONICS'])
         self.assertEqual(self.body_part.stock, 15 - REQUIRED_PARTS['TB2']['BODY'])
         self.assertEqual(self.wing_part.stock, 8 - REQUIRED_PARTS['TB2']['WING'])
-        self.assertEqual(self.tail_part.stock, 5 - REQUIRED_PARTS['TB2']['TAIL']) 
\ No newline at end of file
+        self.assertEqual(self.tail_part.stock, 5 - REQUIRED_PARTS['TB2']['TAIL'])
+
+
+class StockServiceTests(FixtureMixin, TestCase):
+    """Stok servisinin atomik artırma/azaltma davranışını test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Body Team', 'BODY')
+        self.part = Part.objects.create(team_type='BODY', aircraft_type='TB2', stock=2, minimum_stock=5)
+
+    def test_record_production_increments_stock_once(self):
+        """Bir üretim kaydı stoğu yalnızca bir kez artırmalı"""
+        record_production(self.team, self.part, 4, self.user)
+        self.assertEqual(self.part.stock, 6)
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.stock, 6)
+        self.assertFalse(self.part.is_low_stock)
+
+    def test_production_save_uses_single_update(self):
+        """Üretim kaydı bir INSERT, tek bir stok UPDATE, bir defter INSERT'i ve bir özet upsert'i çalıştırmalı"""
+        with self.assertNumQueries(4):
+            Production.objects.create(team=self.team, part=self.part, quantity=1, created_by=self.user)
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.stock, 3)
+        self.assertTrue(self.part.is_low_stock)
+
+    def test_decrease_stock_never_goes_negative(self):
+        """Yetersiz stokta azaltma hiçbir satırı değiştirmemeli"""
+        with self.assertRaises(ValidationError):
+            stock_service.decrease_stock(self.part, 3)
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.stock, 2)
+
+        stock_service.decrease_stock(self.part, 2, refresh=True)
+        self.assertEqual(self.part.stock, 0)
+        self.assertTrue(self.part.is_low_stock)
+
+    def test_part_save_does_not_overwrite_concurrent_stock_change(self):
+        """Bayat parça nesnesinin kaydı eşzamanlı stok değişikliğini ezmemeli; düzeltme anlık stoğa göre fark olarak işlenmeli"""
+        stale = Part.objects.get(pk=self.part.pk)
+        stock_service.increase_stock(self.part, 4)
+
+        stale.minimum_stock = 1
+        stale.save()
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.stock, 6)
+        # Yalnızca ilk stok düzeltmesi kayıtlı olmalı
+        self.assertEqual(self.part.movements.filter(reason='ADJUSTMENT').count(), 1)
+
+        stale.stock = 7
+        stale.save()
+        self.part.refresh_from_db()
+        self.assertEqual((self.part.stock, stale.stock), (7, 7))
+        self.assertEqual(self.part.movements.filter(reason='ADJUSTMENT').latest('id').delta, 1)
+
+    def test_part_update_records_increase_once(self):
+        """Parça güncellemesindeki stok artışı üretim kaydı olarak bir kez işlenmeli"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.patch(reverse('api:part-detail', args=[self.part.id]), {'stock': 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock'], 10)
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.stock, 10)
+        self.assertEqual(Production.objects.get(part=self.part).quantity, 8)
+
+
+class StockLedgerTests(FixtureMixin, TestCase):
+    """Stok hareket defterini, ertelenmiş artışları ve geçmiş sorgusunu test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Avionics Team', 'AVIONICS')
+        self.part = Part.objects.create(team_type='AVIONICS', aircraft_type='TB2', stock=0, minimum_stock=0)
+
+    def test_every_change_is_recorded(self):
+        """Üretim ve montaj hareketleri deftere eklenmeli"""
+        record_production(self.team, self.part, 5, self.user)
+        stock_service.decrease_stock(self.part, 2)
+        self.assertEqual(
+            list(self.part.movements.order_by('id').values_list('delta', 'reason', 'applied')),
+            [(5, 'PRODUCTION', True), (-2, 'ASSEMBLY', True)]
+        )
+
+    @override_settings(STOCK_LEDGER_DEFER_INCREMENTS=True)
+    def test_deferred_increments_do_not_touch_part_row(self):
+        """Ertelenmiş modda artışlar yalnızca bekleyen hareket ve günlük özet yazmalı"""
+        with self.assertNumQueries(3) as queries:
+            Production.objects.create(team=self.team, part=self.part, quantity=3, created_by=self.user)
+        self.assertFalse(any('UPDATE "production_part"' in query['sql'] for query in queries.captured_queries))
+        record_production(self.team, self.part, 4, self.user)
+
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.stock, 0)
+        self.assertEqual(stock_service.live_stock(self.part), 7)
+
+        self.assertEqual(stock_service.compact_stock(), 2)
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.stock, 7)
+        self.assertIsNotNone(self.part.stock_snapshot_at)
+        self.assertFalse(self.part.movements.filter(applied=False).exists())
+
+    @override_settings(STOCK_LEDGER_DEFER_INCREMENTS=True)
+    def test_deferred_decrement_folds_pending_increments(self):
+        """Anlık görüntü yetmediğinde azaltma bekleyen artışları katlayıp başarmalı"""
+        record_production(self.team, self.part, 2, self.user)
+        stock_service.decrease_stock(self.part, 2)
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.stock, 0)
+        with self.assertRaises(ValidationError):
+            stock_service.decrease_stock(self.part, 1)
+
+    @override_settings(STOCK_LEDGER_DEFER_INCREMENTS=True)
+    def test_patch_stock_uses_live_stock(self):
+        """API'deki stok yazımı, yanıtta gösterilen anlık stoğa göre farka çevrilmeli"""
+        record_production(self.team, self.part, 30, self.user)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse('api:part-detail', args=[self.part.id])
+        self.assertEqual(client.get(url).data['stock'], 30)
+
+        response = client.patch(url, {'stock': 35})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock'], 35)
+        self.assertEqual(Production.objects.latest('id').quantity, 5)
+
+        response = client.patch(url, {'stock': 10})
+        self.assertEqual(response.data['stock'], 10)
+        self.assertEqual(Production.objects.count(), 2)
+        self.assertEqual(self.part.movements.latest('id').delta, -25)
+
+    def test_stock_history(self):
+        """Geçmişteki bir andaki stok defterden hesaplanmalı"""
+        record_production(self.team, self.part, 5, self.user)
+        StockMovement.objects.update(created_at=timezone.now() - timedelta(days=2))
+        record_production(self.team, self.part, 3, self.user)
+
+        moment = timezone.now() - timedelta(days=1)
+        self.assertEqual(stock_service.stock_at(self.part, moment), 5)
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get(
+            reverse('api:part-stock-history', args=[self.part.id]),
+            {'at': moment.isoformat()}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock'], 5)
+        self.assertEqual(len(response.data['movements']), 1)
+
+
+class StockShardTests(FixtureMixin, TestCase):
+    """Sayaçlı stok modunu test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Wing Team', 'WING')
+        self.part = Part.objects.create(team_type='WING', aircraft_type='TB2', stock=3, minimum_stock=5, stock_shards=4)
+
+    def test_sharded_writes_do_not_touch_part_row(self):
+        """Sayaçlı parçada artış ve azaltmalar Part satırını güncellememeli"""
+        for _ in range(5):
+            record_production(self.team, self.part, 2, self.user)
+        stock_service.decrease_stock(self.part, 1)
+
+        self.assertEqual(self.part.shards.count(), 4)
+        self.assertEqual(Part.objects.get(pk=self.part.pk).stock, 3)
+        self.assertEqual(stock_service.live_stock(self.part), 12)
+
+    def test_api_reports_stock_with_shards(self):
+        """API stok ve düşük stok durumunu sayaçlarla birlikte döndürmeli"""
+        for _ in range(5):
+            record_production(self.team, self.part, 2, self.user)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get(reverse('api:part-detail', args=[self.part.id]))
+        self.assertEqual(response.data['stock'], 13)
+        self.assertFalse(response.data['is_low_stock'])
+
+    def test_patch_stock_uses_live_stock(self):
+        """Sayaçlı parçada API stok yazımı anlık stoğa göre farka çevrilmeli"""
+        record_production(self.team, self.part, 27, self.user)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse('api:part-detail', args=[self.part.id])
+        self.assertEqual(client.get(url).data['stock'], 30)
+
+        response = client.patch(url, {'stock': 35})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock'], 35)
+        self.assertEqual(Production.objects.latest('id').quantity, 5)
+
+        # Anlık stoktan düşük ama anlık görüntüden yüksek değer azaltmadır
+        response = client.patch(url, {'stock': 32})
+        self.assertEqual(response.data['stock'], 32)
+        self.assertEqual(Production.objects.count(), 2)
+        self.assertEqual(self.part.movements.latest('id').delta, -3)
+
+    def test_part_save_uses_live_stock(self):
+        """Sayaçlı parçada elle girilen stok anlık stoğa göre düzeltme olarak işlenmeli"""
+        record_production(self.team, self.part, 27, self.user)
+        part = Part.objects.get(pk=self.part.pk)
+        part.stock = 35
+        part.save()
+        self.assertEqual(stock_service.live_stock(part), 35)
+        self.assertEqual(part.movements.latest('id').delta, 5)
+
+        # Düzenleme formu anlık stoğu gösterir; stok değişmeden kayıt düzeltme yazmaz
+        part = Part.objects.get(pk=self.part.pk)
+        part.load_live_stock()
+        self.assertEqual(part.stock, 35)
+        part.minimum_stock = 1
+        part.save()
+        self.assertEqual(stock_service.live_stock(part), 35)
+        self.assertEqual(part.movements.filter(reason='ADJUSTMENT').count(), 2)
+
+    def test_decrease_falls_back_to_snapshot(self):
+        """Sayaçlar yetmediğinde azaltma sayaçları katlayıp anlık görüntüden düşmeli"""
+        record_production(self.team, self.part, 1, self.user)
+        stock_service.decrease_stock(self.part, 4)
+        self.assertEqual(stock_service.live_stock(self.part), 0)
+        with self.assertRaises(ValidationError):
+            stock_service.decrease_stock(self.part, 1)
+
+    def test_fold_shards(self):
+        """Sayaçlar anlık görüntüye katlanınca toplam değişmemeli"""
+        record_production(self.team, self.part, 4, self.user)
+        self.assertEqual(stock_service.fold_shards(), 1)
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.stock, 7)
+        self.assertFalse(self.part.is_low_stock)
+        self.assertFalse(self.part.shards.exclude(count=0).exists())
+
+
+class AssemblyServiceTests(FixtureMixin, TestCase):
+    """Uçağa parça eklemenin tek işlemde ve sabit sayıda sorguyla yapıldığını test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Assembly Team', 'ASSEMBLY', username='assembler')
+        self.parts = self.create_parts(stock=3, minimum_stock=0)
+        self.aircraft = Aircraft.objects.create(aircraft_type='TB2', assembly_team=self.team)
+
+    def test_add_part_query_count(self):
+        """Parça ekleme sabit sayıda sorgu çalıştırmalı ve uçağı en fazla bir kez yazmalı"""
+        parts = list(self.parts.values())
+        for part in parts[:-1]:
+            self.aircraft.add_part(part, self.user)
+
+        # Savepoint, kilit (sayaçlarla), stok UPDATE, defter INSERT, stok okuma,
+        # sayaç ve tamamlanma UPDATE, AircraftPart INSERT, montaja hazır bildirimi
+        # için takım ve üye okuma, savepoint bırakma
+        with self.assertNumQueries(10):
+            self.aircraft.add_part(parts[-1], self.user)
+
+        self.aircraft.refresh_from_db()
+        self.assertTrue(self.aircraft.is_complete)
+        self.assertIsNotNone(self.aircraft.completed_at)
+        for part in parts:
+            part.refresh_from_db()
+            self.assertEqual(part.stock, 2)
+
+    def test_out_of_stock_writes_nothing(self):
+        """Stok yoksa ne AircraftPart ne de stok değişikliği yazılmalı"""
+        part = self.parts['WING']
+        Part.objects.filter(pk=part.pk).update(stock=0)
+        part.refresh_from_db()
+        with self.assertRaises(ValidationError):
+            self.aircraft.add_part(part, self.user)
+        self.assertFalse(AircraftPart.objects.exists())
+        self.assertFalse(part.movements.filter(reason='ASSEMBLY').exists())
+
+    def test_duplicate_team_type_is_rejected(self):
+        """Gereken sayıdan fazla aynı tip parça eklenememeli"""
+        self.aircraft.add_part(self.parts['BODY'], self.user)
+        extra = Part.objects.create(team_type='BODY', aircraft_type='TB2', stock=3)
+        with self.assertRaises(ValidationError):
+            self.aircraft.add_part(extra, self.user)
+        extra.refresh_from_db()
+        self.assertEqual(extra.stock, 3)
+
+    def test_part_counts_follow_assembly_and_removal(self):
+        """Parça sayaçları ekleme ve çıkarma ile güncellenmeli"""
+        for part in self.parts.values():
+            self.aircraft.add_part(part, self.user)
+        self.aircraft.refresh_from_db()
+        self.assertEqual(self.aircraft.part_counts, {team_type: 1 for team_type in REQUIRED_PARTS['TB2']})
+        self.assertTrue(self.aircraft.is_complete)
+
+        AircraftPart.objects.get(aircraft=self.aircraft, part=self.parts['WING']).delete()
+        self.aircraft.refresh_from_db()
+        self.assertEqual(self.aircraft.wing_count, 0)
+        self.assertFalse(self.aircraft.is_complete)
+        self.assertIsNone(self.aircraft.completed_at)
+        self.assertEqual(self.aircraft.get_missing_parts(), {'WING': 1})
+
+    def test_clean_checks_live_stock(self):
+        """Form doğrulaması anlık görüntüyü değil sayaçlar dahil anlık stoğu denetlemeli"""
+        part = self.parts['WING']
+        Part.objects.filter(pk=part.pk).update(stock=0, stock_shards=2)
+        part.refresh_from_db()
+        stock_service.increase_stock(part, 2)
+        self.assertEqual(Part.objects.get(pk=part.pk).stock, 0)
+        AircraftPart(aircraft=self.aircraft, part=part).clean()
+
+        stock_service.decrease_stock(part, 2)
+        with self.assertRaises(ValidationError):
+            AircraftPart(aircraft=self.aircraft, part=part).clean()
+
+    def test_stale_instance_save_keeps_completion(self):
+        """Parçalar eklenmeden önce yüklenmiş nesnenin kaydı tamamlanma durumunu ezmemeli"""
+        stale = Aircraft.objects.get(pk=self.aircraft.pk)
+        for part in self.parts.values():
+            self.aircraft.add_part(part, self.user)
+        self.aircraft.refresh_from_db()
+        completed_at = self.aircraft.completed_at
+
+        stale.assembly_team = None
+        stale.save()
+        stale.refresh_from_db()
+        self.assertIsNone(stale.assembly_team)
+        self.assertTrue(stale.is_complete)
+        self.assertEqual(stale.completed_at, completed_at)
+        self.assertEqual(stale.part_counts, {team_type: 1 for team_type in REQUIRED_PARTS['TB2']})
+
+    def test_rebuild_part_counts_command(self):
+        """Komut bozulmuş sayaçları AircraftPart kayıtlarından yeniden hesaplamalı"""
+        self.aircraft.add_part(self.parts['BODY'], self.user)
+        Aircraft.objects.filter(pk=self.aircraft.pk).update(body_count=0, wing_count=5)
+
+        out = StringIO()
+        call_command('rebuild_aircraft_part_counts', stdout=out)
+        self.aircraft.refresh_from_db()
+        self.assertEqual(self.aircraft.body_count, 1)
+        self.assertEqual(self.aircraft.wing_count, 0)
+        self.assertFalse(self.aircraft.is_complete)
+
+
+class AircraftListTests(FixtureMixin, TestCase):
+    """Uçak listesi sayfasının SQL'de hesaplanan yüzde ve sunucu tarafı sayfalama kullandığını test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('lister', superuser=True)
+        self.team = Team.objects.create(name='List Assembly', team_type='ASSEMBLY')
+        self.client.force_login(self.user)
+
+    def test_completion_percentage_is_annotated(self):
+        """Tamamlanma yüzdesi parça sayaçlarından hesaplanmalı"""
+        aircraft = Aircraft.objects.create(aircraft_type='TB2', assembly_team=self.team)
+        Aircraft.objects.filter(pk=aircraft.pk).update(body_count=1, wing_count=1, tail_count=1)
+        annotated = Aircraft.objects.with_completion().get(pk=aircraft.pk)
+        self.assertEqual(annotated.required_parts_total, 4)
+        self.assertEqual(annotated.current_parts_total, 3)
+        self.assertEqual(annotated.completion_percentage, 75)
+
+    def test_query_count_does_not_grow_with_fleet(self):
+        """Sayfa sorgu sayısı uçak sayısıyla artmamalı ve yalnızca bir sayfa göstermeli"""
+        Aircraft.objects.bulk_create([Aircraft(aircraft_type='TB2', assembly_team=self.team) for _ in range(5)])
+        # Takım üyeliği önbelleğini ısıt; iki ölçüm de aynı önbellek durumunda yapılmalı
+        self.client.get(reverse('production:aircraft_list'))
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('production:aircraft_list'))
+
+        Aircraft.objects.bulk_create([Aircraft(aircraft_type='AKINCI', assembly_team=self.team) for _ in range(60)])
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse('production:aircraft_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(len(response.context['aircraft']), 25)
+        self.assertEqual(response.context['page_obj'].paginator.count, 65)
+
+    def test_page_parameter_is_honored(self):
+        """?page= parametresi HTML ile gönderilen sayfayı seçmeli; DataTables o sayfadan başlamalı"""
+        Aircraft.objects.bulk_create([Aircraft(aircraft_type='TB2', assembly_team=self.team) for _ in range(30)])
+        response = self.client.get(reverse('production:aircraft_list'), {'page': 2})
+        self.assertEqual(response.context['page_obj'].number, 2)
+        self.assertEqual(len(response.context['aircraft']), 5)
+        self.assertContains(response, 'displayStart: 1 * 25')
+
+
+class DataTablesTests(FixtureMixin, APITestCase):
+    """DataTables sunucu tarafı işleme aksiyonunu test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('tables', superuser=True)
+        self.team = Team.objects.create(name='Table Assembly', team_type='ASSEMBLY')
+        Aircraft.objects.bulk_create([Aircraft(aircraft_type='TB2', assembly_team=self.team) for _ in range(30)])
+        Aircraft.objects.bulk_create([Aircraft(aircraft_type='AKINCI') for _ in range(5)])
+        self.client.force_authenticate(user=self.user)
+
+    def test_aircraft_page(self):
+        """Yalnızca istenen sayfa döndürülmeli ve sayılar protokole uymalı"""
+        response = self.client.get('/api/aircraft/datatable/', {
+            'draw': 3, 'start': 10, 'length': 10,
+            'columns[0][data]': 'created_at', 'order[0][column]': 0, 'order[0][dir]': 'desc',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['draw'], 3)
+        self.assertEqual(response.data['recordsTotal'], 35)
+        self.assertEqual(response.data['recordsFiltered'], 35)
+        self.assertEqual(len(response.data['data']), 10)
+        self.assertIn('completion_percentage', response.data['data'][0])
+
+    def test_aircraft_search_and_filter(self):
+        """Arama recordsFiltered sayısını, filtreler recordsTotal sayısını daraltmalı"""
+        response = self.client.get('/api/aircraft/datatable/', {'search[value]': 'akinci', 'length': 50})
+        self.assertEqual(response.data['recordsFiltered'], 5)
+        self.assertEqual(len(response.data['data']), 5)
+
+        response = self.client.get('/api/aircraft/datatable/', {'assembly_team': self.team.id})
+        self.assertEqual(response.data['recordsTotal'], 30)
+
+    def test_length_is_capped_and_unknown_columns_ignored(self):
+        """Sayfa boyutu sınırlanmalı, tanımsız sütunla sıralama yapılmamalı"""
+        response = self.client.get('/api/aircraft/datatable/', {
+            'length': 100000, 'columns[0][data]': 'assembly_team__members__password', 'order[0][column]': 0,
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['data']), 35)
+
+    def test_page_and_api_share_visibility(self):
+        """Uçak listesi sayfası ve datatable aksiyonu aynı uçakları göstermeli"""
+        other = Team.objects.create(name='Other Assembly', team_type='ASSEMBLY')
+        Aircraft.objects.bulk_create([Aircraft(aircraft_type='TB3', assembly_team=other) for _ in range(2)])
+        for is_staff in (False, True):
+            user = User.objects.create_user(username=f'member-{is_staff}', password='member', is_staff=is_staff)
+            self.team.members.add(user)
+            self.client.force_login(user)
+            self.client.force_authenticate(user=user)
+            page = self.client.get(reverse('production:aircraft_list'))
+            api = self.client.get('/api/aircraft/datatable/')
+            self.assertEqual(page.context['page_obj'].paginator.count, api.data['recordsTotal'])
+            self.assertEqual(api.data['recordsTotal'], 37 if is_staff else 35)
+
+    def test_team_page(self):
+        """Takım tablosu sayılarla birlikte sayfalanmalı"""
+        Team.objects.create(name='Wing Team', team_type='WING')
+        response = self.client.get('/api/teams/datatable/', {'search[value]': 'assembly'})
+        self.assertEqual(response.data['recordsTotal'], 2)
+        self.assertEqual(response.data['recordsFiltered'], 1)
+        self.assertEqual(response.data['data'][0]['aircraft_count'], 30)
+
+
+class ProductionHistoryPaginationTests(FixtureMixin, APITestCase):
+    """Üretim geçmişinin (created_at, id) imleç sayfalamasını test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('historian', superuser=True)
+        self.team = Team.objects.create(name='History Wing', team_type='WING')
+        part = Part.objects.create(team_type='WING', aircraft_type='TB2', stock=0)
+        Production.objects.bulk_create([
+            Production(team=self.team, part=part, quantity=1) for _ in range(7)
+        ])
+        # Aynı zaman damgalı kayıtlar id ile ayrışmalı
+        self.base = timezone.now() - timedelta(days=10)
+        ids = list(Production.objects.order_by('id').values_list('id', flat=True))
+        for index, production_id in enumerate(ids):
+            Production.objects.filter(pk=production_id).update(created_at=self.base + timedelta(days=index // 2))
+        self.url = reverse('api:team-production-history', args=[self.team.id])
+        self.client.force_authenticate(user=self.user)
+
+    def test_pages_cover_all_rows_in_order(self):
+        """İmleçle gezilen sayfalar tüm kayıtları tekrarsız ve sıralı döndürmeli"""
+        seen = []
+        url = self.url + '?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        expected = list(Production.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_cursor_adds_index_range_bound(self):
+        """İmleç koşulu OR'un yanında indeks aralığını sınırlayan created_at <= koşulunu içermeli"""
+        next_url = self.client.get(self.url, {'page_size': 3}).data['next']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(next_url)
+        history_sql = next(query['sql'] for query in queries if 'FROM "production_production"' in query['sql'])
+        self.assertIn('"production_production"."created_at" <=', history_sql)
+
+    def test_since_until_filters(self):
+        """since ve until zaman aralığını daraltmalı"""
+        response = self.client.get(self.url, {
+            'since': (self.base + timedelta(days=1)).isoformat(),
+            'until': (self.base + timedelta(days=3)).isoformat(),
+        })
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor_is_rejected(self):
+        """Geçersiz imleç 400 döndürmeli"""
+        response = self.client.get(self.url, {'cursor': 'bozuk'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProductionRollupTests(FixtureMixin, TestCase):
+    """Günlük üretim özetinin yazma yolunda artımlı güncellendiğini test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Rollup Wing', 'WING', username='roller')
+        self.part = Part.objects.create(team_type='WING', aircraft_type='TB2', stock=0)
+
+    def test_single_and_batch_writes_upsert_rollup(self):
+        """Tekil ve toplu üretimler aynı gün satırını artırmalı"""
+        record_production(self.team, self.part, 3, self.user)
+        stock_service.record_productions(self.team, [
+            {'part': self.part, 'quantity': 2},
+            {'part': self.part, 'quantity': 4, 'created_at': timezone.now() - timedelta(days=2)},
+        ], self.user)
+
+        today = ProductionDailyRollup.objects.get(team=self.team, part=self.part, day=timezone.localdate())
+        self.assertEqual(today.quantity, 5)
+        earlier = ProductionDailyRollup.objects.get(
+            team=self.team, part=self.part, day=timezone.localdate(timezone.now() - timedelta(days=2))
+        )
+        self.assertEqual(earlier.quantity, 4)
+        self.assertEqual(self.team.get_total_production(), 9)
+
+    def test_backfill_matches_production_rows(self):
+        """Backfill komutu özeti üretim kayıtlarıyla aynı toplamlara getirmeli"""
+        record_production(self.team, self.part, 3, self.user)
+        record_production(self.team, self.part, 1, self.user)
+        ProductionDailyRollup.objects.update(quantity=100)
+
+        out = StringIO()
+        call_command('backfill_production_rollup', stdout=out)
+        self.assertEqual(ProductionDailyRollup.objects.get().quantity, 4)
+
+    def test_edits_and_deletes_keep_rollup_in_sync(self):
+        """Üretim kaydı düzenlendiğinde veya silindiğinde özet Production tablosuyla aynı kalmalı"""
+        production = record_production(self.team, self.part, 3, self.user)
+        other_team = Team.objects.create(name='Rollup Wing 2', team_type='WING')
+
+        production.quantity = 5
+        production.save()
+        self.assertEqual(self.team.get_total_production(), 5)
+
+        # Bayat nesne: eski katkı veritabanından okunmalı
+        stale = Production.objects.get(pk=production.pk)
+        production.created_at = timezone.now() - timedelta(days=3)
+        production.save()
+        stale.team = other_team
+        stale.save(update_fields=['team'])
+        row = ProductionDailyRollup.objects.get()
+        self.assertEqual((row.team_id, row.day, row.quantity), (other_team.id, timezone.localdate(production.created_at), 5))
+
+        record_production(other_team, self.part, 2, self.user)
+        Production.objects.filter(pk=production.pk).delete()
+        self.assertEqual(other_team.get_total_production(), 2)
+        self.assertEqual(ProductionDailyRollup.objects.count(), 1)
+
+    def test_team_totals_read_rollup(self):
+        """Takım API'sindeki toplam üretim özetten okunmalı"""
+        record_production(self.team, self.part, 6, self.user)
+        self.user.is_superuser = True
+        self.user.save()
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get(f'/api/teams/{self.team.id}/')
+        self.assertEqual(response.data['total_production'], 6)
+
+
+class DashboardSnapshotTests(FixtureMixin, TestCase):
+    """Gösterge paneli görüntüsünün önbelleklenmesini ve commit sonrası bayatlatılmasını test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Dashboard Wing', 'WING', username='viewer')
+        self.part = Part.objects.create(team_type='WING', aircraft_type='TB2', stock=0, minimum_stock=5)
+        self.client.login(username='viewer', password='viewer')
+
+    def test_snapshot_is_served_from_cache(self):
+        """İkinci istek sayıları veritabanından yeniden hesaplamamalı"""
+        first = dashboard_snapshot()
+        self.assertEqual(first['parts_count'], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(dashboard_snapshot(), first)
+
+    def test_write_invalidates_after_commit(self):
+        """Üretim kaydı commit edildikten sonra görüntü yeniden hesaplanmalı"""
+        self.assertEqual(dashboard_snapshot()['production_count'], 0)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            record_production(self.team, self.part, 2, self.user)
+        # Commit edilmemiş yazım görüntüyü değiştirmemeli
+        self.assertEqual(dashboard_snapshot()['production_count'], 0)
+
+        for callback in callbacks:
+            callback()
+        snapshot = dashboard_snapshot()
+        self.assertEqual(snapshot['production_count'], 1)
+        self.assertEqual(json.loads(snapshot['daily_production'])[-1]['total'], 2)
+
+    def test_low_stock_uses_live_stock(self):
+        """Düşük stok listesi ve sayısı katlanmamış hareketleri ve sayaçları içermeli"""
+        with override_settings(STOCK_LEDGER_DEFER_INCREMENTS=True):
+            record_production(self.team, self.part, 10, self.user)
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.stock, 0)
+
+        snapshot = compute_snapshot()
+        self.assertEqual(snapshot['low_stock_count'], 0)
+        self.assertEqual(snapshot['low_stock_parts'], [])
+
+        other = Part.objects.create(team_type='TAIL', aircraft_type='TB2', stock=1, minimum_stock=5)
+        snapshot = compute_snapshot()
+        self.assertEqual(snapshot['low_stock_count'], 1)
+        self.assertEqual(snapshot['low_stock_parts'], [{'name': other.name, 'stock': 1, 'minimum_stock': 5}])
+
+    def test_concurrent_miss_serves_stale_snapshot(self):
+        """Başka bir işçi yeniden hesaplarken bayat görüntü sorgusuz döndürülmeli"""
+        stale = dashboard_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            Part.objects.create(team_type='TAIL', aircraft_type='TB2', stock=0)
+        cache.add(dashboard_service.LOCK_KEY, 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(dashboard_snapshot(), stale)
+
+        cache.delete(dashboard_service.LOCK_KEY)
+        self.assertEqual(dashboard_snapshot()['parts_count'], 2)
+
+    def test_home_renders_snapshot(self):
+        """Ana sayfa sayıları ve düşük stoklu parçaları görüntüden göstermeli"""
+        response = self.client.get(reverse('production:home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['parts_count'], 1)
+        self.assertEqual(response.context['low_stock_parts'][0]['name'], self.part.name)
+
+
+class TeamMembershipTests(FixtureMixin, TestCase):
+    """Takım üyeliği çözümleyicisinin istek ve istekler arası önbelleğini test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Membership Assembly', 'ASSEMBLY', username='member')
+        self.factory = RequestFactory()
+
+    def make_request(self):
+        request = self.factory.get('/')
+        request.user = self.user
+        return request
+
+    def test_resolver_memoizes_on_request_and_cache(self):
+        """Soğuk önbellekte tek sorgu, sıcak önbellekte sorgusuz çözümlenmeli"""
+        request = self.make_request()
+        with self.assertNumQueries(1):
+            team = get_user_team(request)
+            self.assertIs(get_user_team(request), team)
+        self.assertEqual(team.pk, self.team.pk)
+        self.assertEqual(team.team_type, 'ASSEMBLY')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_team(self.make_request()), self.team)
+
+    def test_membership_change_invalidates_cache(self):
+        """Üyelik değiştiğinde önbellekteki takım silinmeli"""
+        self.assertEqual(get_user_team(self.make_request()), self.team)
+
+        # Silme commit'e kadar ertelenir; commit öncesi okuyan istek eski değeri yeniden önbelleğe yazamaz
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.members.remove(self.user)
+            self.assertEqual(get_user_team(self.make_request()), self.team)
+        self.assertIsNone(get_user_team(self.make_request()))
+
+        other = Team.objects.create(name='Membership Wing', team_type='WING')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.team_members.add(other)
+        self.assertEqual(get_user_team(self.make_request()).team_type, 'WING')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.members.clear()
+        self.assertIsNone(get_user_team(self.make_request()))
+
+    def test_api_request_skips_team_lookup_on_warm_cache(self):
+        """Sıcak önbellekte API isteği takım üyeliği sorgusu çalıştırmamalı"""
+        self.client.login(username='member', password='member')
+        self.client.get('/api/aircraft/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/aircraft/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('production_team_members' in query['sql'] for query in queries.captured_queries))
+
+    def test_team_check_middleware_reads_session_flag(self):
+        """Girişte yazılan bayrakla middleware sorgu çalıştırmamalı; üyelik değişince yenilemeli"""
+        self.client.post(reverse('login'), {'username': 'member', 'password': 'member'})
+        session = self.client.session
+        self.assertIn(TEAM_CHECK_SESSION_KEY, session)
+        middleware = TeamCheckMiddleware(lambda request: HttpResponse())
+
+        request = self.factory.get('/api/aircraft/')
+        request.user = self.user
+        request.session = session
+        with self.assertNumQueries(0):
+            self.assertEqual(middleware(request).status_code, 200)
+
+        # Üyelik değişince damga commit sonrası yenilenir; bayrak bir kez yeniden çözümlenir
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.members.remove(self.user)
+        request = self.factory.get('/api/aircraft/')
+        request.user = self.user
+        request.session = session
+        request._messages = FallbackStorage(request)
+        with patch('django.contrib.auth.logout') as logout:
+            response = middleware(request)
+        self.assertEqual(response.status_code, 302)
+        logout.assert_called_once()
+
+    def test_team_check_benchmark_command(self):
+        """Benchmark komutu önceki ve sonraki istek başına sorgu sayısını yazdırmalı"""
+        out = StringIO()
+        call_command('benchmark_team_check', requests=20, stdout=out)
+        output = out.getvalue()
+        self.assertIn('before: 1.00 sorgu/istek', output)
+        self.assertIn('after: 0.00 sorgu/istek', output)
+
+
+class TeamStatsTests(FixtureMixin, APITestCase):
+    """Takım istatistiklerinin satır çoğaltmadan tek sorguda hesaplandığını test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.create_user('stats', superuser=True)
+        self.team = Team.objects.create(name='Stats Wing', team_type='WING')
+        self.members = [User.objects.create_user(username=f'stats-{index}') for index in range(3)]
+        self.team.members.add(*self.members)
+        part = Part.objects.create(team_type='WING', aircraft_type='TB2', stock=0)
+        for quantity in (2, 5):
+            record_production(self.team, part, quantity, self.members[0])
+
+    def test_with_stats_does_not_multiply_rows(self):
+        """Üye ve üretim sayısı birbirini çarpmamalı"""
+        team = Team.objects.with_stats().get(pk=self.team.pk)
+        self.assertEqual(team.member_count, 3)
+        self.assertEqual(team.total_production, 7)
+        self.assertEqual(team.aircraft_count, 0)
+
+    def test_api_list_uses_one_query_regardless_of_team_size(self):
+        """Takım listesi takım büyüklüğünden bağımsız sabit sayıda sorgu çalıştırmalı"""
+        self.client.force_authenticate(user=self.admin)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/teams/')
+        self.team.members.add(*[User.objects.create_user(username=f'extra-{index}') for index in range(10)])
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/teams/')
+        self.assertEqual(len(large), len(small))
+        data = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual(data[0]['member_count'], 13)
+        self.assertEqual(data[0]['total_production'], 7)
+
+    def test_admin_changelist_reads_annotations(self):
+        """Admin listesi üye sayısı ve toplam üretim için satır başına sorgu çalıştırmamalı"""
+        Team.objects.create(name='Stats Tail', team_type='TAIL')
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as two_teams:
+            response = self.client.get(reverse('admin:production_team_changelist'))
+        self.assertEqual(response.status_code, 200)
+        Team.objects.create(name='Stats Body', team_type='BODY')
+        with CaptureQueriesContext(connection) as three_teams:
+            self.client.get(reverse('admin:production_team_changelist'))
+        self.assertEqual(len(three_teams), len(two_teams))
+
+
+class ConditionalGetTests(FixtureMixin, APITestCase):
+    """Sürüm damgalı ETag ve 304 yanıtlarını test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Poll Assembly', 'ASSEMBLY', username='poller')
+        self.client.force_authenticate(user=self.user)
+        self.part = Part.objects.create(team_type='WING', aircraft_type='TB2', stock=3)
+        self.aircraft = Aircraft.objects.create(aircraft_type='TB2', assembly_team=self.team, created_by=self.user)
+
+    def test_unchanged_catalog_returns_304_without_queries(self):
+        """Katalog değişmediyse parça listesi sorgusuz 304 dönmeli"""
+        response = self.client.get('/api/parts/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/parts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        # Farklı filtre farklı doğrulayıcı almalı
+        response = self.client.get('/api/parts/?aircraft_type=TB2', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since_alone_does_not_validate(self):
+        """Yalnızca If-Modified-Since gönderen istemci 304 almamalı; aynı saniyedeki yazımlar ayırt edilemez"""
+        response = self.client.get('/api/parts/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_committed_stock_change_invalidates_etag(self):
+        """Commit edilen stok değişikliği katalog doğrulayıcısını değiştirmeli"""
+        etag = self.client.get('/api/parts/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            stock_service.decrease_stock(self.part, 1)
+        response = self.client.get('/api/parts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_aircraft_endpoints_follow_aircraft_version(self):
+        """Uçağa parça eklenince uçak özeti yeniden hesaplanmalı, diğer uçaklar etkilenmemeli"""
+        other = Aircraft.objects.create(aircraft_type='TB2', assembly_team=self.team, created_by=self.user)
+        summary_url = reverse('api:aircraft-parts-summary', args=[self.aircraft.id])
+        other_url = reverse('api:aircraft-parts-summary', args=[other.id])
+        required_url = reverse('production:get_required_parts', args=[self.aircraft.id])
+        self.client.force_login(self.user)
+        etags = {url: self.client.get(url)['ETag'] for url in (summary_url, other_url, required_url)}
+        for url, etag in etags.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AircraftPart.objects.create(aircraft=self.aircraft, part=self.part, added_by=self.user)
+
+        self.assertEqual(self.client.get(summary_url, HTTP_IF_NONE_MATCH=etags[summary_url]).status_code, 200)
+        self.assertEqual(self.client.get(required_url, HTTP_IF_NONE_MATCH=etags[required_url]).status_code, 200)
+        # Stok değiştiği için katalog damgası da yenilendi; diğer uçak yeni doğrulayıcıyı bir kez alır
+        etag = self.client.get(other_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.aircraft.save()
+        self.assertEqual(self.client.get(other_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class RequiredPartsTests(FixtureMixin, TestCase):
+    """get_required_parts görünümünün tek sorgulu ve kısa yanıtlarını test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Modal Assembly', 'ASSEMBLY', username='modal')
+        self.aircraft = Aircraft.objects.create(aircraft_type='TB2', assembly_team=self.team, created_by=self.user)
+        for team_type in ('WING', 'TAIL'):
+            part = Part.objects.create(team_type=team_type, aircraft_type='TB2', stock=1)
+            add_part_to_aircraft(self.aircraft, part, self.user)
+        self.url = reverse('production:get_required_parts', args=[self.aircraft.id])
+        self.client.force_login(self.user)
+        # Oturum, takım üyeliği ve sürüm damgaları ısıtılır
+        self.client.get(self.url)
+
+    def test_full_response_uses_one_parts_query(self):
+        """Tam yanıt parça listesi ve sayılar için tek gruplu sorgu çalıştırmalı"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        data = response.json()
+        self.assertEqual(data['required_parts']['WING']['current'], 1)
+        self.assertEqual(len(data['required_parts']['TAIL']['parts']), 1)
+        self.assertEqual(data['missing_parts'], {'BODY': 1, 'AVIONICS': 1})
+        self.assertEqual(sum('production_aircraftpart' in query['sql'] for query in queries.captured_queries), 1)
+
+    def test_compact_response_reads_counters(self):
+        """Kısa biçim yalnızca sayıları döndürmeli ve parça tablosunu okumamalı"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'format': 'compact'})
+        data = response.json()
+        self.assertEqual(set(data), {'counts', 'is_complete'})
+        self.assertEqual(data['counts']['WING'], {'required': 1, 'current': 1})
+        self.assertFalse(any('production_aircraftpart' in query['sql'] for query in queries.captured_queries))
+
+
+class AvailablePartsTests(FixtureMixin, APITestCase):
+    """Kullanılabilir parçaların SQL tarafında süzüldüğünü ve çoklu uçak sorgusunu test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Picker Assembly', 'ASSEMBLY', username='picker')
+        self.client.force_authenticate(user=self.user)
+        self.parts = self.create_parts(stock=5)
+        Part.objects.create(team_type='WING', aircraft_type='TB2', stock=0)
+        Part.objects.create(team_type='WING', aircraft_type='AKINCI', stock=5)
+        self.first = Aircraft.objects.create(aircraft_type='TB2', assembly_team=self.team, created_by=self.user)
+        self.second = Aircraft.objects.create(aircraft_type='TB2', assembly_team=self.team, created_by=self.user)
+        add_part_to_aircraft(self.first, self.parts['WING'], self.user)
+
+    def test_full_team_types_are_filtered_in_sql(self):
+        """Dolu takım tipleri ve stoksuz parçalar veritabanından dönmemeli"""
+        rows = available_parts([self.first])[self.first.pk]
+        self.assertEqual({row['team_type'] for row in rows}, {'AVIONICS', 'BODY', 'TAIL'})
+
+        response = self.client.get(reverse('api:aircraft-available-parts', args=[self.first.id]))
+        part = next(item for item in response.data['parts'] if item['team_type'] == 'BODY')
+        self.assertEqual(part['get_team_type_display'], self.parts['BODY'].get_team_type_display())
+        self.assertEqual(part['stock'], 5)
+
+    def test_batch_returns_all_aircraft_in_two_queries(self):
+        """Çoklu uçak isteği uçakları ve parçaları birer sorguda okumalı"""
+        url = reverse('api:aircraft-available-parts-batch')
+        self.client.get(url, {'ids': f'{self.first.id}'})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'ids': f'{self.first.id},{self.second.id},999999'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(len(response.data['aircraft'][self.first.id]['parts']), 3)
+        self.assertEqual(len(response.data['aircraft'][self.second.id]['parts']), 4)
+        self.assertEqual(response.data['missing'], [999999])
+
+        response = self.client.get(url, {'ids': 'a,b'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PartsSummaryBatchTests(FixtureMixin, APITestCase):
+    """Çoklu uçak parça özeti endpoint'ini test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Summary Assembly', 'ASSEMBLY', username='summary')
+        self.client.force_authenticate(user=self.user)
+        self.aircraft = [
+            Aircraft.objects.create(aircraft_type='TB2', assembly_team=self.team, created_by=self.user)
+            for _ in range(3)
+        ]
+        for team_type in ('WING', 'TAIL'):
+            part = Part.objects.create(team_type=team_type, aircraft_type='TB2', stock=5)
+            add_part_to_aircraft(self.aircraft[0], part, self.user)
+        self.url = reverse('api:aircraft-parts-summary-batch')
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_batch_matches_single_summary(self):
+        """Toplu özet tekil endpoint ile aynı içeriği döndürmeli"""
+        ids = ','.join(str(aircraft.id) for aircraft in self.aircraft)
+        data = self.read(self.client.get(self.url, {'ids': f'{ids},999999'}))
+        self.assertEqual(data['missing'], [999999])
+        self.assertEqual(len(data['aircraft']), 3)
+
+        single = self.client.get(reverse('api:aircraft-parts-summary', args=[self.aircraft[0].id])).data
+        self.assertEqual(data['aircraft'][str(self.aircraft[0].id)], json.loads(json.dumps(single)))
+        self.assertEqual(len(data['aircraft'][str(self.aircraft[1].id)]['current_parts']), 0)
+
+    def test_post_uses_fixed_number_of_queries(self):
+        """POST varyantı uçak sayısından bağımsız olarak iki sorgu çalıştırmalı"""
+        more = [Aircraft.objects.create(aircraft_type='TB2', assembly_team=self.team) for _ in range(5)]
+        self.read(self.client.post(self.url, {'ids': [self.aircraft[0].id]}, format='json'))
+        with CaptureQueriesContext(connection) as queries:
+            data = self.read(self.client.post(
+                self.url, {'ids': [aircraft.id for aircraft in self.aircraft + more]}, format='json'
+            ))
+        self.assertEqual(len(data['aircraft']), 8)
+        self.assertEqual(len(queries), 2)
+
+        response = self.client.post(self.url, {'ids': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PartUsageTests(FixtureMixin, APITestCase):
+    """Parça kullanım endpoint'inin sayfalamasını ve özetini test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Usage Assembly', 'ASSEMBLY', username='usage')
+        self.other_team = Team.objects.create(name='Usage Assembly 2', team_type='ASSEMBLY')
+        self.client.force_authenticate(user=self.user)
+        self.part = Part.objects.create(team_type='WING', aircraft_type='TB2', stock=10)
+        self.aircraft = [
+            Aircraft.objects.create(aircraft_type='TB2', assembly_team=team, created_by=self.user)
+            for team in (self.team, self.team, self.other_team)
+        ]
+        for aircraft in self.aircraft:
+            add_part_to_aircraft(aircraft, self.part, self.user)
+        Aircraft.objects.filter(pk=self.aircraft[0].pk).update(completed_at=timezone.now())
+        self.url = reverse('api:part-usage', args=[self.part.id])
+
+    def test_usage_is_paginated_with_team_names(self):
+        """Kullanımlar sayfalanmalı ve montaj takımının adı dönmeli"""
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['usage_count'], 3)
+        self.assertEqual(len(response.data['usage']), 2)
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(response.data['usage'][0]['assembly_team'], 'Usage Assembly 2')
+
+        rest = self.client.get(response.data['next'])
+        self.assertEqual([row['aircraft_id'] for row in rest.data['usage']], [self.aircraft[0].id])
+        self.assertEqual(rest.data['usage'][0]['status'], 'Tamamlandı')
+        self.assertIsNone(rest.data['next'])
+        self.assertNotIn('summary', rest.data)
+
+        rest = self.client.get(response.data['next'], {'summary': '1'})
+        self.assertEqual(rest.data['summary']['total'], 3)
+
+    def test_stock_is_live(self):
+        """Stok alanı katlanmamış hareketleri de içeren anlık stok olmalı"""
+        self.part.refresh_from_db()
+        StockMovement.objects.create(part=self.part, delta=5, reason='PRODUCTION')
+        response = self.client.get(self.url, {'summary_only': '1'})
+        self.assertEqual(response.data['stock'], Part.objects.with_live_stock().get(pk=self.part.pk).live_stock)
+        self.assertEqual(response.data['stock'], self.part.stock + 5)
+
+    def test_summary_groups_usage(self):
+        """Özet durum, takım ve aya göre gruplanmalı; summary_only listeyi atlamalı"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'summary_only': '1'})
+        self.assertNotIn('usage', response.data)
+        summary = response.data['summary']
+        self.assertEqual(summary['total'], 3)
+        self.assertEqual(summary['by_status'], {'completed': 1, 'in_progress': 2})
+        self.assertEqual(
+            [(row['team_name'], row['count']) for row in summary['by_assembly_team']],
+            [('Usage Assembly', 2), ('Usage Assembly 2', 1)]
+        )
+        self.assertEqual(summary['by_month'], [{'month': timezone.now().strftime('%Y-%m'), 'count': 3}])
+        usage_queries = [query for query in queries if 'production_aircraftpart' in query['sql']]
+        self.assertEqual(len(usage_queries), 3)
+
+    def test_range_applies_to_summary(self):
+        """since aralığı hem listeye hem özete uygulanmalı"""
+        future = (timezone.now() + timedelta(days=1)).isoformat()
+        response = self.client.get(self.url, {'since': future})
+        self.assertEqual(response.data['usage_count'], 0)
+        self.assertEqual(response.data['usage'], [])
+
+
+class DisassemblyTests(FixtureMixin, TestCase):
+    """Uçak silinirken parçaların küme tabanlı olarak stoğa döndüğünü test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('disassembler', superuser=True)
+        self.team = Team.objects.create(name='Disassembly Team', team_type='ASSEMBLY')
+        self.parts = list(self.create_parts(stock=4, minimum_stock=3).values())
+        self.aircraft = [
+            Aircraft.objects.create(aircraft_type='TB2', assembly_team=self.team) for _ in range(2)
+        ]
+        for aircraft in self.aircraft:
+            for part in self.parts:
+                aircraft.add_part(part, self.user)
+
+    def test_delete_returns_stock_with_grouped_updates(self):
+        """Uçak silme parça başına tek stok UPDATE'i ve tek AircraftPart DELETE'i çalıştırmalı"""
+        aircraft = self.aircraft[0]
+        with CaptureQueriesContext(connection) as queries:
+            aircraft.delete()
+        stock_updates = [query for query in queries if query['sql'].startswith('UPDATE "production_part"')]
+        deletes = [query for query in queries if query['sql'].startswith('DELETE FROM "production_aircraftpart"')]
+        self.assertEqual(len(stock_updates), len(self.parts))
+        # Toplu DELETE ve uçak silinirken Django'nun (artık boş) kademeli DELETE'i
+        self.assertEqual(len(deletes), 2)
+
+        for part in self.parts:
+            part.refresh_from_db()
+            self.assertEqual(part.stock, 3)
+            self.assertFalse(part.is_low_stock)
+            self.assertEqual(part.movements.filter(reason='DISASSEMBLY').count(), 1)
+        self.assertEqual(AircraftPart.objects.count(), len(self.parts))
+
+    def test_failed_stock_return_keeps_parts(self):
+        """Stok geri döndürülemezse uçak parçaları silinmemeli"""
+        with patch('production.services.assembly._apply_deltas', return_value=[self.parts[0].pk]):
+            with self.assertRaises(Part.DoesNotExist):
+                self.aircraft[0].delete()
+        self.assertEqual(self.aircraft[0].aircraft_parts.count(), len(self.parts))
+        self.assertTrue(Aircraft.objects.filter(pk=self.aircraft[0].pk).exists())
+
+    def test_admin_bulk_delete_returns_stock(self):
+        """Admin toplu silme parçaları stoğa döndürmeli"""
+        client = Client()
+        client.force_login(self.user)
+        response = client.post(reverse('admin:production_aircraft_changelist'), {
+            'action': 'delete_selected',
+            '_selected_action': [aircraft.pk for aircraft in self.aircraft],
+            'post': 'yes',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Aircraft.objects.exists())
+        self.assertFalse(AircraftPart.objects.exists())
+        for part in self.parts:
+            part.refresh_from_db()
+            self.assertEqual(part.stock, 4)
+
+
+class AssembleKitTests(FixtureMixin, APITestCase):
+    """Kit montajı endpoint'ini test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Kit Assembly', 'ASSEMBLY', username='kit')
+        self.parts = self.create_parts(stock=2, minimum_stock=0)
+        self.aircraft = Aircraft.objects.create(aircraft_type='TB2', assembly_team=self.team)
+        self.client.force_authenticate(user=self.user)
+        self.url = f'/api/aircraft/{self.aircraft.id}/assemble_kit/'
+
+    def test_assemble_kit_completes_aircraft(self):
+        """Kit montajı eksik tüm parçaları eklemeli ve uçağı tamamlamalı"""
+        self.aircraft.add_part(self.parts['BODY'], self.user)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['parts']), 3)
+
+        self.aircraft.refresh_from_db()
+        self.assertTrue(self.aircraft.is_complete)
+        self.assertIsNotNone(self.aircraft.completed_at)
+        self.assertEqual(self.aircraft.aircraft_parts.count(), 4)
+        for part in self.parts.values():
+            part.refresh_from_db()
+            self.assertEqual(part.stock, 1)
+
+    def test_assemble_kit_notifies_once(self):
+        """Kit montajı, montaja hazır bildirimini tek bir kez kuyruğa eklemeli"""
+        User.objects.filter(pk=self.user.pk).update(email='kit@example.com')
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(OutboxEmail.objects.filter(subject__startswith='Uçak Montaja Hazır').count(), 1)
+
+    def test_shortage_writes_nothing(self):
+        """Stok yetmezse eksik raporu dönmeli ve hiçbir değişiklik yazılmamalı"""
+        Part.objects.filter(pk=self.parts['WING'].pk).update(stock=0)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['shortages'], {'WING': {'required': 1, 'available': 0}})
+
+        self.aircraft.refresh_from_db()
+        self.assertFalse(self.aircraft.is_complete)
+        self.assertFalse(AircraftPart.objects.exists())
+        self.assertEqual(Part.objects.filter(stock=2).count(), 3)
+
+    def test_assemble_kit_query_count_is_fixed(self):
+        """Kit montajının sorgu sayısı parça sayısından bağımsız olmalı"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(queries), 24)
+
+
+class AircraftBulkCreateTests(FixtureMixin, APITestCase):
+    """Toplu uçak oluşturma endpoint'ini test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Plan Assembly', 'ASSEMBLY', username='planner')
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/aircraft/bulk-create/'
+
+    def test_bulk_create_uses_constant_queries(self):
+        """Uçaklar tek INSERT ile oluşturulmalı ve kullanıcının takımına atanmalı"""
+        payload = {'aircraft': [{'aircraft_type': 'TB2', 'count': 30}, {'aircraft_type': 'AKINCI', 'count': 20}]}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['aircraft_ids']), 50)
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "production_aircraft"')]
+        self.assertEqual(len(inserts), 1)
+
+        created = Aircraft.objects.filter(id__in=response.data['aircraft_ids'])
+        self.assertEqual(created.filter(assembly_team=self.team, created_by=self.user).count(), 50)
+        self.assertEqual(created.filter(aircraft_type='AKINCI').count(), 20)
+
+    def test_invalid_entry_creates_nothing(self):
+        """Geçersiz bir kayıt varsa hiçbir uçak oluşturulmamalı"""
+        other = Team.objects.create(name='Other Assembly', team_type='ASSEMBLY')
+        payload = {'aircraft': [
+            {'aircraft_type': 'TB2', 'count': 2},
+            {'aircraft_type': 'XYZ', 'count': 1},
+            {'aircraft_type': 'TB3', 'count': 1, 'assembly_team': other.id},
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertFalse(Aircraft.objects.exists())
+
+    def test_non_assembly_team_is_rejected(self):
+        """Montaj takımı dışındaki kullanıcılar uçak oluşturamamalı"""
+        self.team.team_type = 'WING'
+        self.team.save()
+        response = self.client.post(self.url, {'aircraft': [{'aircraft_type': 'TB2', 'count': 1}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ProduceBatchTests(FixtureMixin, APITestCase):
+    """Toplu üretim endpoint'ini test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Tail Team', 'TAIL')
+        self.client.force_authenticate(user=self.user)
+        self.tb2_tail = Part.objects.create(team_type='TAIL', aircraft_type='TB2', stock=0)
+        self.tb3_tail = Part.objects.create(team_type='TAIL', aircraft_type='TB3', stock=1)
+        self.url = reverse('api:team-produce-batch', args=[self.team.id])
+
+    def test_batch_creates_productions_and_groups_stock_updates(self):
+        """Kayıtlar tek istekte oluşturulmalı, stok parça başına toplanmalı"""
+        entries = [{'part': self.tb2_tail.id, 'quantity': 2} for _ in range(50)]
+        entries.append({'part': self.tb3_tail.id, 'quantity': 3, 'created_at': '2025-03-01T08:30:00+03:00'})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'productions': entries}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['production_ids']), 51)
+        self.assertLess(len(queries), 16)
+
+        self.tb2_tail.refresh_from_db()
+        self.tb3_tail.refresh_from_db()
+        self.assertEqual(self.tb2_tail.stock, 100)
+        self.assertEqual(self.tb3_tail.stock, 4)
+        self.assertEqual(response.data['new_stock'][self.tb2_tail.id], 100)
+
+        production = Production.objects.get(part=self.tb3_tail)
+        self.assertEqual(production.created_at.date().isoformat(), '2025-03-01')
+
+    def test_batch_is_rejected_as_a_whole(self):
+        """Geçersiz tek bir kayıt tüm partiyi reddetmeli"""
+        wrong_part = Part.objects.create(team_type='WING', aircraft_type='TB2', stock=0)
+        entries = [
+            {'part': self.tb2_tail.id, 'quantity': 1},
+            {'part': wrong_part.id, 'quantity': 1},
+            {'part': self.tb2_tail.id, 'quantity': 0},
+        ]
+        response = self.client.post(self.url, entries, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertFalse(Production.objects.exists())
+        self.tb2_tail.refresh_from_db()
+        self.assertEqual(self.tb2_tail.stock, 0)
+
+
+class IdempotencyTests(FixtureMixin, APITestCase):
+    """Idempotency-Key başlığı ile tekrarlanan isteklerin yeniden işlenmediğini test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Body Team', 'BODY')
+        self.part = Part.objects.create(team_type='BODY', aircraft_type='TB2', stock=0)
+
+    def test_api_retry_returns_stored_response(self):
+        """Aynı anahtarla tekrarlanan API isteği ikinci üretim kaydı oluşturmamalı"""
+        self.client.force_authenticate(user=self.user)
+        url = reverse('api:team-produce-part', args=[self.team.id])
+        data = {'part': self.part.id, 'quantity': 3}
+
+        first = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='retry-1')
+        with self.assertNumQueries(0):
+            second = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Production.objects.count(), 1)
+
+        self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='retry-2')
+        self.assertEqual(Production.objects.count(), 2)
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.stock, 6)
+
+    def test_key_reused_with_different_body_is_rejected(self):
+        """Aynı anahtar farklı gövdeyle kullanılırsa eski yanıt döndürülmemeli, 422 dönmeli"""
+        self.client.force_authenticate(user=self.user)
+        url = reverse('api:team-produce-part', args=[self.team.id])
+        self.client.post(url, {'part': self.part.id, 'quantity': 3}, format='json', HTTP_IDEMPOTENCY_KEY='reuse-1')
+        response = self.client.post(url, {'part': self.part.id, 'quantity': 5}, format='json', HTTP_IDEMPOTENCY_KEY='reuse-1')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Production.objects.count(), 1)
+
+    def test_form_retry_returns_stored_response(self):
+        """Aynı anahtarla tekrarlanan form isteği ikinci üretim kaydı oluşturmamalı"""
+        client = Client()
+        client.login(username='producer', password='producer')
+        url = reverse('production:user_add_production')
+        data = {'part': self.part.id, 'quantity': 2}
+
+        first = client.post(url, data, HTTP_IDEMPOTENCY_KEY='form-1')
+        second = client.post(url, data, HTTP_IDEMPOTENCY_KEY='form-1')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(Production.objects.count(), 1)
+
+    def test_key_in_progress_is_rejected(self):
+        """İşlenmekte olan anahtarla gelen istek 409 almalı"""
+        self.client.force_authenticate(user=self.user)
+        url = reverse('api:team-produce-part', args=[self.team.id])
+        with patch('production.idempotency._cache_key', return_value='idempotency:busy'):
+            cache.set('idempotency:busy', 'in-progress')
+            response = self.client.post(url, {'part': self.part.id, 'quantity': 1}, format='json', HTTP_IDEMPOTENCY_KEY='busy')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Production.objects.exists())
+
+
+class OutboxTests(FixtureMixin, TestCase):
+    """Bildirimlerin kuyruğa yazılmasını ve işçinin kuyruğu boşaltmasını test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Tail Team', 'TAIL', email='producer@example.com')
+        OutboxEmail.objects.all().delete()
+
+    def test_signals_enqueue_instead_of_sending(self):
+        """Sinyaller istek içinde e-posta göndermemeli, kuyruğa yazmalı"""
+        Part.objects.create(team_type='TAIL', aircraft_type='TB2', stock=0, minimum_stock=5)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.filter(status='PENDING').count(), 1)
+        self.assertEqual(OutboxEmail.objects.get().recipients, ['producer@example.com'])
+
+    def test_worker_sends_batch_over_one_connection(self):
+        """İşçi kuyruğu tek bağlantıyla göndermeli"""
+        for i in range(3):
+            enqueue_mail(f'Konu {i}', 'İçerik', ['producer@example.com'])
+
+        with patch('django.core.mail.backends.locmem.EmailBackend.open') as open_connection:
+            call_command('send_outbox', stdout=StringIO())
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboxEmail.objects.exclude(status='SENT').exists())
+
+    def test_failed_send_is_retried_with_backoff(self):
+        """Gönderilemeyen e-posta geri çekilme ile yeniden denenmeli"""
+        email = enqueue_mail('Konu', 'İçerik', ['producer@example.com'])
+        with patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('SMTP kapalı')):
+            self.assertEqual(send_pending(max_attempts=2, backoff=60), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'PENDING')
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        # Geri çekilme süresi dolmadan yeniden denenmemeli
+        self.assertEqual(send_pending(), (0, 0))
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        with patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('SMTP kapalı')):
+            send_pending(max_attempts=2)
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'FAILED')
+
+
+    def test_connection_failure_records_attempt_and_releases_lease(self):
+        """SMTP bağlantısı açılamazsa işçi çökmemeli; deneme kaydedilip kira geri çekilmeyle değişmeli"""
+        emails = [enqueue_mail(f'Konu {i}', 'İçerik', ['producer@example.com']) for i in range(2)]
+        out = StringIO()
+        with patch('django.core.mail.backends.locmem.EmailBackend.open', side_effect=OSError('SMTP kapalı')):
+            call_command('send_outbox', batch_size=2, backoff=10, stdout=out)
+        self.assertIn('2 gönderim başarısız', out.getvalue())
+
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts, email.last_error), ('PENDING', 1, 'SMTP kapalı'))
+            # Kira (5 dakika) yerine geri çekilme süresi kadar ertelenmeli
+            self.assertLess(email.next_attempt_at, timezone.now() + timedelta(seconds=11))
+
+
+class LowStockAlertTests(FixtureMixin, TestCase):
+    """Düşük stok uyarılarının yalnızca geçişte ve bir kez tetiklendiğini test eder."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.team = self.create_member('Body Team', 'BODY', email='producer@example.com')
+        self.part = Part.objects.create(team_type='BODY', aircraft_type='TB2', stock=20, minimum_stock=10)
+
+    def alerts(self):
+        return OutboxEmail.objects.filter(subject__startswith='Düşük Stok').count()
+
+    def test_alert_fires_once_per_transition(self):
+        """Düşük stokta kalan parça her işlemde yeniden uyarı üretmemeli"""
+        for _ in range(15):
+            self.part.decrease_stock(1)
+        self.assertEqual(self.alerts(), 1)
+
+        # Uyarı verilmiş düşük stoklu parçada azaltma ek sorgu çalıştırmamalı
+        with self.assertNumQueries(3):
+            self.part.decrease_stock(1)
+
+    @override_settings(LOW_STOCK_ALERT_COOLDOWN=0)
+    def test_alert_rearms_after_recovery(self):
+        """Stok toparlanıp yeniden düşünce yeni uyarı tetiklenmeli"""
+        self.part.decrease_stock(15)
+        record_production(self.team, self.part, 10, self.user)
+        self.part.decrease_stock(10)
+        self.assertEqual(self.alerts(), 2)
+
+    @override_settings(LOW_STOCK_ALERT_COOLDOWN=3600)
+    def test_cooldown_suppresses_flapping(self):
+        """Bekleme süresi içinde ikinci geçiş uyarı üretmemeli"""
+        self.part.decrease_stock(15)
+        record_production(self.team, self.part, 10, self.user)
+        self.part.decrease_stock(10)
+        self.assertEqual(self.alerts(), 1)
+
+    @override_settings(LOW_STOCK_ALERT_MODE='digest')
+    def test_digest_mode(self):
+        """Özet modunda uyarılar takım tipi başına tek e-postada toplanmalı"""
+        other = Part.objects.create(team_type='BODY', aircraft_type='TB3', stock=20, minimum_stock=10)
+        self.part.decrease_stock(15)
+        other.decrease_stock(15)
+        self.assertEqual(self.alerts(), 0)
+
+        call_command('send_low_stock_digest', stdout=StringIO())
+        digest = OutboxEmail.objects.get(subject__startswith='Düşük Stok Özeti')
+        self.assertIn(self.part.name, digest.body)
+        self.assertIn(other.name, digest.body)
+        self.assertFalse(Part.objects.filter(low_stock_digest_pending=True).exists())
+
+    def test_recipients_cache_invalidated_on_membership_change(self):
+        """Takıma üye eklenince alıcı listesi yenilenmeli"""
+        self.assertEqual(low_stock_recipients('BODY'), ('Body Team', ['producer@example.com']))
+        with self.assertNumQueries(0):
+            low_stock_recipients('BODY')
+
+        newcomer = User.objects.create_user(username='newcomer', email='newcomer@example.com')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.members.add(newcomer)
+        self.assertCountEqual(low_stock_recipients('BODY')[1], ['producer@example.com', 'newcomer@example.com'])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Eşzamanlı yazma testi PostgreSQL gerektirir')
+class StockConcurrencyTests(TransactionTestCase):
+    """Eşzamanlı üretimlerde kayıp veya çift stok artışı olmamalı."""
+
+    def test_concurrent_productions(self):
+        user = User.objects.create_user(username='producer')
+        team = Team.objects.create(name='Wing Team', team_type='WING')
+        part = Part.objects.create(team_type='WING', aircraft_type='TB2', stock=0)
+        workers, per_worker = 20, 10
+        barrier = threading.Barrier(workers)
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(per_worker):
+                    record_production(Team(pk=team.pk), Part(pk=part.pk), 1, user)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        part.refresh_from_db()
+        self.assertEqual(part.stock, workers * per_worker)
+        self.assertEqual(Production.objects.filter(part=part).count(), workers * per_worker)
@@ -1,10 +1,11 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.urls import path, include
 from django.db import transaction
 from django.db.models import Q, Count, Sum, F
+from django.db.models.functions import TruncMonth
 from django.contrib.auth.views import LoginView
 from django.core.exceptions import ValidationError
 from rest_framework import viewsets, status, permissions
@@ -12,26 +13,73 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
-from .models import Team, Part, Aircraft, AircraftPart, TEAM_TYPES, AIRCRAFT_TYPES, REQUIRED_PARTS, Production
+from .models import Team, Part, Aircraft, AircraftPart, TEAM_TYPES, AIRCRAFT_TYPES, REQUIRED_PARTS, PART_COUNT_FIELDS, Production, ProductionDailyRollup
 from .serializers import (
     PartSerializer, TeamSerializer, AircraftSerializer,
-    ProductionSerializer, AircraftPartSerializer, UserSerializer
+    ProductionSerializer, AircraftPartSerializer, UserSerializer,
+    StockMovementSerializer
 )
+from .services.stock import (
+    decrease_stock, increase_stock, lock_live_stock, record_production, record_productions, stock_at,
+)
+from .services.assembly import PartShortage, assemble_kit, available_parts
+from .services.dashboard import dashboard_snapshot, invalidate_dashboard
+from .services.membership import get_user_team, refresh_team_check, session_has_team, team_membership
+from .idempotency import idempotent
+from .conditional import conditional
+from .services.versions import CATALOG
+from .datatables import DataTablesMixin
+from .pagination import KEYSET_PARAMETERS, KeysetPagination
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from datetime import timedelta
 from django.contrib import messages
 from django.core.exceptions import ValidationError
-from django.db.models.functions import TruncDate
 import json
+from itertools import groupby
+from operator import attrgetter
 from rest_framework.permissions import IsAuthenticated
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiExample
 from django.template.response import TemplateResponse
+from django.core.paginator import Paginator
 from django.contrib import admin
 from django.contrib.auth import login as auth_login
 from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib.auth import authenticate
 from django.db import transaction
 
+# Toplu üretim isteğinde kabul edilen en fazla kayıt sayısı
+PRODUCTION_BATCH_LIMIT = 1000
+
+# Toplu uçak oluşturma isteğinde kabul edilen en fazla uçak sayısı
+AIRCRAFT_BATCH_LIMIT = 1000
+
+# Çoklu uçak sorgularında (?ids=) kabul edilen en fazla uçak sayısı;
+# available-parts ve parts-summary toplu uçlarında ortak tek sınırdır
+AIRCRAFT_IDS_LIMIT = 500
+
+# Uçak listesi sayfasında gösterilen uçak sayısı
+AIRCRAFT_LIST_PAGE_SIZE = 25
+
+# Takım listesi sayfasında ilk yüklemede gösterilen takım sayısı
+TEAM_LIST_PAGE_SIZE = 25
+
+# Görüntülenen adlar (get_*_display) serializer çalıştırmadan sözlükten okunur
+TEAM_TYPE_NAMES = dict(TEAM_TYPES)
+AIRCRAFT_TYPE_NAMES = dict(AIRCRAFT_TYPES)
+
+# Stok geçmişinde döndürülen en fazla hareket sayısı
+STOCK_HISTORY_LIMIT = 50
+
+# Stok değiştiren aksiyonlarda yeniden denemeler için başlık
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    name="Idempotency-Key",
+    location=OpenApiParameter.HEADER,
+    description="Aynı anahtarla tekrarlanan istekler yeniden işlenmez, ilk yanıt döndürülür",
+    required=False,
+    type=str,
+)
+
 # Template views
 @login_required
 def home(request):
@@ -39,65 +87,14 @@ def home(request):
     context = {}
     
     if request.user.is_authenticated:
-        # Get counts
-        context['teams_count'] = Team.objects.count()
-        context['parts_count'] = Part.objects.count()
-        context['aircraft_count'] = Aircraft.objects.count()
-        context['production_count'] = Production.objects.count()
-        
-        # Get low stock parts
-        context['low_stock_parts'] = Part.objects.filter(
-            stock__lt=F('minimum_stock')
-        ).order_by('stock')[:5]
-        
-        # Get recent productions
-        context['recent_productions'] = Production.objects.select_related(
-            'part', 'team'
-        ).order_by('-created_at')[:5]
-        
-        # Get daily production data for chart
-        # Get production data for the last 30 days
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        daily_production = Production.objects.filter(
-            created_at__gte=thirty_days_ago
-        ).annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(
-            total=Sum('quantity')
-        ).order_by('date')
-        
-        # Create a dictionary with all dates in the last 30 days
-        all_dates = {}
-        current_date = thirty_days_ago.date()
-        today = timezone.now().date()
-        
-        while current_date <= today:
-            all_dates[current_date.strftime('%Y-%m-%d')] = 0
-            current_date += timedelta(days=1)
-        
-        # Fill in the production data
-        for item in daily_production:
-            date_str = item['date'].strftime('%Y-%m-%d')
-            all_dates[date_str] = item['total']
-        
-        # Convert to list of dicts for JSON serialization
-        daily_production_data = []
-        for date_str, total in all_dates.items():
-            daily_production_data.append({
-                'created_at__date': date_str,
-                'total': total
-            })
-        
-        # Sort by date
-        daily_production_data.sort(key=lambda x: x['created_at__date'])
-        
-        context['daily_production'] = json.dumps(daily_production_data, cls=DjangoJSONEncoder)
+        # Sayılar, düşük stok, son üretimler ve 30 günlük grafik önbellekteki görüntüden okunur
+        context.update(dashboard_snapshot())
     
     return render(request, 'home.html', context)
 
 @login_required
 def profile(request):
-    user_team = request.user.team_members.first()
+    user_team = get_user_team(request)
     context = {
         'user_team': user_team,
     }
@@ -112,8 +109,8 @@ def profile(request):
         else:
             context.update({
                 'recent_productions': Production.objects.filter(team=user_team).order_by('-created_at')[:10],
-                'total_production': Production.objects.filter(team=user_team).aggregate(total=Sum('quantity'))['total'] or 0,
-                'parts_produced': Production.objects.filter(team=user_team).values('part__name').annotate(total=Sum('quantity')),
+                'total_production': ProductionDailyRollup.objects.filter(team=user_team).aggregate(total=Sum('quantity'))['total'] or 0,
+                'parts_produced': ProductionDailyRollup.objects.filter(team=user_team).values('part__name').annotate(total=Sum('quantity')).order_by('part__name'),
             })
     
     return render(request, 'profile.html', context)
@@ -121,7 +118,7 @@ def profile(request):
 @login_required
 def parts_list(request):
     parts = Part.objects.all()
-    user_team = request.user.team_members.first()
+    user_team = get_user_team(request)
     
     # Filtreleme
     team_type = request.GET.get('team_type')
@@ -147,17 +144,20 @@ def parts_list(request):
 
 @login_required
 def teams_list(request):
-    teams = Team.objects.annotate(
-        members_count=Count('members')
-    )
+    teams = Team.objects.with_stats()
     
     # Filtreleme
     team_type = request.GET.get('team_type')
     if team_type:
         teams = teams.filter(team_type=team_type)
     
+    # Yalnızca ilk sayfa HTML ile gönderilir; sonraki sayfalar DataTables tarafından
+    # TeamViewSet.datatable aksiyonundan okunur
+    page_obj = Paginator(teams, TEAM_LIST_PAGE_SIZE).get_page(1)
+    
     context = {
-        'teams': teams,
+        'teams': page_obj,
+        'page_obj': page_obj,
         'team_types': TEAM_TYPES,
     }
     return render(request, 'teams/list.html', context)
@@ -165,7 +165,7 @@ def teams_list(request):
 @login_required
 def aircraft_list(request):
     # Sadece montaj takımı üyeleri ve süper kullanıcılar erişebilir
-    user_team = request.user.team_members.first()
+    user_team = get_user_team(request)
     
     # Süper kullanıcı değilse ve montaj takımında değilse erişimi engelle
     if not request.user.is_superuser and (not user_team or user_team.team_type != 'ASSEMBLY'):
@@ -175,7 +175,7 @@ def aircraft_list(request):
         )
         return redirect('production:home')
     
-    aircraft = Aircraft.objects.all()
+    aircraft = Aircraft.objects.with_completion().select_related('assembly_team')
     
     # Filtreleme
     aircraft_type = request.GET.get('aircraft_type')
@@ -191,18 +191,16 @@ def aircraft_list(request):
     if assembly_team:
         aircraft = aircraft.filter(assembly_team_id=assembly_team)
     
-    # Montaj takımı kendi uçaklarını ve henüz bir takıma atanmamış uçakları görebilir
-    if user_team and user_team.team_type == 'ASSEMBLY':
-        aircraft = aircraft.filter(Q(assembly_team=user_team) | Q(assembly_team__isnull=True))
+    # Görünürlük kuralı AircraftViewSet ile ortaktır; sonraki sayfalar aynı satırları gösterir
+    aircraft = aircraft.visible_to(request.user, user_team)
     
-    # Calculate completion percentage for each aircraft
-    for a in aircraft:
-        required_parts_count = sum(REQUIRED_PARTS[a.aircraft_type].values())
-        current_parts_count = a.parts.count()
-        a.completion_percentage = int((current_parts_count / required_parts_count) * 100) if required_parts_count > 0 else 0
+    # Tamamlanma yüzdesi SQL'de hesaplanır; yalnızca istenen sayfa (?page=, varsayılan ilk sayfa)
+    # HTML ile gönderilir, diğer sayfalar DataTables tarafından AircraftViewSet.datatable aksiyonundan okunur
+    page_obj = Paginator(aircraft, AIRCRAFT_LIST_PAGE_SIZE).get_page(request.GET.get('page'))
     
     context = {
-        'aircraft': aircraft,
+        'aircraft': page_obj,
+        'page_obj': page_obj,
         'aircraft_types': AIRCRAFT_TYPES,
         'team_types': TEAM_TYPES,
         'assembly_teams': Team.objects.filter(team_type='ASSEMBLY'),
@@ -211,6 +209,7 @@ def aircraft_list(request):
     return render(request, 'aircraft/list.html', context)
 
 @login_required
+@idempotent
 def add_production(request):
     if request.method != 'POST':
         return JsonResponse({'error': 'Invalid request method'}, status=400)
@@ -227,9 +226,6 @@ def add_production(request):
                 team = Team.objects.get(id=team_id)
                 quantity = int(quantity)
                 
-                # Mevcut stok değerini saklayalım
-                old_stock = part.stock
-                
                 if quantity <= 0:
                     return JsonResponse({'error': 'Quantity must be positive'}, status=400)
                 
@@ -245,32 +241,13 @@ def add_production(request):
                 if team.team_type != part.team_type:
                     return JsonResponse({'error': f'{team.get_team_type_display()} team cannot produce {part.get_team_type_display()} parts'}, status=403)
                 
-                # Create production record
-                production = Production.objects.create(
-                    team=team,
-                    part=part,
-                    quantity=quantity,
-                    created_by=request.user
-                )
-                
-                # Güncel stok değerini al
-                part.refresh_from_db()
-                
-                # Stok değişmediyse direkt SQL ile güncelleyelim
-                if part.stock == old_stock:
-                    # SQL direkt güncelleme yap
-                    from django.db import connection
-                    cursor = connection.cursor()
-                    cursor.execute(
-                        f"UPDATE {part._meta.db_table} SET stock = stock + %s, is_low_stock = CASE WHEN (stock + %s) < minimum_stock THEN True ELSE False END WHERE id = %s",
-                        [quantity, quantity, part.id]
-                    )
-                    part.refresh_from_db()
+                # Üretim kaydı ve stok artışı tek servis çağrısıyla yapılır
+                production = record_production(team, part, quantity, request.user)
             
             return JsonResponse({
                 'success': True,
                 'message': f'Successfully produced {quantity} {part.name}',
-                'new_stock': part.stock
+                'new_stock': part.available_stock
             })
             
         except Part.DoesNotExist:
@@ -285,6 +262,7 @@ def add_production(request):
             return JsonResponse({'error': f'An error occurred: {str(e)}'}, status=500)
 
 @login_required
+@idempotent
 def add_aircraft_part(request):
     if request.method != 'POST':
         return JsonResponse({'error': 'Invalid request method'}, status=400)
@@ -320,7 +298,7 @@ def add_aircraft_part(request):
             return JsonResponse({'error': str(e)}, status=400)
     
     # Check if user is in an assembly team
-    user_team = request.user.team_members.first()
+    user_team = get_user_team(request)
     if not user_team:
         return JsonResponse({'error': 'User is not assigned to a team'}, status=403)
     
@@ -368,9 +346,10 @@ def add_aircraft_part(request):
         return JsonResponse({'error': str(e)}, status=400)
 
 @login_required
+@conditional(CATALOG, aircraft_kwarg='aircraft_id')
 def get_required_parts(request, aircraft_id):
     # Sadece montaj takımı üyeleri ve süper kullanıcılar erişebilir
-    user_team = request.user.team_members.first()
+    user_team = get_user_team(request)
     
     # Süper kullanıcı değilse ve montaj takımında değilse erişimi engelle
     if not request.user.is_superuser and (not user_team or user_team.team_type != 'ASSEMBLY'):
@@ -385,52 +364,54 @@ def get_required_parts(request, aircraft_id):
     # Kullanıcının takımına göre erişimi kontrol et (süper kullanıcı için erişim serbest)
     if (not request.user.is_superuser and 
         user_team and 
-        aircraft.assembly_team is not None and 
-        aircraft.assembly_team != user_team):
+        aircraft.assembly_team_id is not None and 
+        aircraft.assembly_team_id != user_team.pk):
         return JsonResponse({'error': 'Bu uçağa erişim yetkiniz bulunmamaktadır.'}, status=403)
     
     required = REQUIRED_PARTS[aircraft.aircraft_type]
     
-    # Get current parts by team type
-    current_parts = {}
-    for team_type in required:
-        current_parts[team_type] = aircraft.parts.filter(team_type=team_type).count()
-    
-    # Build required_parts dictionary for the template
-    required_parts = {}
-    for team_type, required_count in required.items():
-        current_count = current_parts.get(team_type, 0)
-        required_parts[team_type] = {
-            'required': required_count,
-            'current': current_count,
-            'parts': []
-        }
-        
-        # Add part details if needed
-        for part in aircraft.parts.filter(team_type=team_type):
-            required_parts[team_type]['parts'].append({
-                'id': part.id,
-                'name': part.name
-            })
+    # Kısa biçim: yalnızca takım tipi başına sayılar, uçak satırındaki sayaçlardan (ek sorgu yok)
+    if request.GET.get('format') == 'compact':
+        counts = aircraft.part_counts
+        return JsonResponse({
+            'counts': {
+                team_type: {'required': required_count, 'current': counts.get(team_type, 0)}
+                for team_type, required_count in required.items()
+            },
+            'is_complete': aircraft.is_complete
+        })
     
-    # Build parts_info list for backward compatibility
+    # Takılı parçalar ve takım tipi başına sayılar tek gruplu sorguyla okunur
+    required_parts = {
+        team_type: {'required': required_count, 'current': 0, 'parts': []}
+        for team_type, required_count in required.items()
+    }
+    installed = (
+        AircraftPart.objects.filter(aircraft=aircraft)
+        .values('part__team_type', 'part_id', 'part__name')
+        .annotate(count=Count('id'))
+        .order_by('part__team_type', 'part__name')
+    )
+    for row in installed:
+        info = required_parts.get(row['part__team_type'])
+        if info is not None:
+            info['current'] += row['count']
+            info['parts'].append({'id': row['part_id'], 'name': row['part__name']})
+    
+    # Eski istemciler için özet listeler aynı sayılardan türetilir
     parts_info = []
-    for team_type, required_count in required.items():
-        current_count = current_parts.get(team_type, 0)
+    missing_parts = {}
+    for team_type, info in required_parts.items():
+        remaining = info['required'] - info['current']
         parts_info.append({
             'team_type': team_type,
-            'team_type_display': dict(TEAM_TYPES)[team_type],
-            'required': required_count,
-            'current': current_count,
-            'remaining': required_count - current_count
+            'team_type_display': TEAM_TYPE_NAMES[team_type],
+            'required': info['required'],
+            'current': info['current'],
+            'remaining': remaining
         })
-    
-    # Calculate missing parts
-    missing_parts = {}
-    for team_type, required_count in required.items():
-        current_count = current_parts.get(team_type, 0)
-        if current_count < required_count:
-            missing_parts[team_type] = required_count - current_count
+        if remaining > 0:
+            missing_parts[team_type] = remaining
     
     return JsonResponse({
         'aircraft_type': aircraft.get_aircraft_type_display(),
@@ -475,7 +456,7 @@ class PartViewSet(viewsets.ModelViewSet):
     Parçaların listelenmesi, oluşturulması, güncellenmesi ve silinmesi işlemlerini sağlar.
     Takım tipine, uçak tipine ve stok durumuna göre filtreleme yapılabilir.
     """
-    queryset = Part.objects.all().select_related()
+    queryset = Part.objects.with_live_stock()
     serializer_class = PartSerializer
     permission_classes = [IsAuthenticated]
     
@@ -501,21 +482,29 @@ class PartViewSet(viewsets.ModelViewSet):
         # Stok durumuna göre filtrele
         stock_status = self.request.query_params.get('stock_status')
         if stock_status == 'low':
-            queryset = queryset.filter(is_low_stock=True)
+            queryset = queryset.filter(live_stock__lt=F('minimum_stock'))
         elif stock_status == 'ok':
-            queryset = queryset.filter(is_low_stock=False)
+            queryset = queryset.filter(live_stock__gte=F('minimum_stock'))
         
         # Süper kullanıcı ise tüm parçaları görebilir
         if self.request.user.is_superuser:
             return queryset
             
         # Kullanıcının takımına göre filtrele
-        user_team = Team.objects.filter(members=self.request.user).first()
+        user_team = get_user_team(self.request)
         if user_team and user_team.team_type != 'ASSEMBLY':
             queryset = queryset.filter(team_type=user_team.team_type)
         
         return queryset
     
+    @conditional(CATALOG)
+    def list(self, request, *args, **kwargs):
+        """
+        Parçaları listeler.
+        Katalog değişmediyse yanıt ETag ile 304 olarak döner; sorgu çalışmaz.
+        """
+        return super().list(request, *args, **kwargs)
+    
     def create(self, request, *args, **kwargs):
         """
         Parça oluşturma işlemini gerçekleştirir.
@@ -542,7 +531,7 @@ class PartViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
         
         # Get user's team
-        user_team = request.user.team_members.first()
+        user_team = get_user_team(request)
         
         # Check if user has a team
         if not user_team:
@@ -589,7 +578,6 @@ class PartViewSet(viewsets.ModelViewSet):
         
         # Get the instance before it's updated
         instance = self.get_object()
-        old_stock = instance.stock
         
         # Süper kullanıcı için kontrol yapma
         if request.user.is_superuser:
@@ -613,31 +601,12 @@ class PartViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            serializer = self.get_serializer(instance, data=request_data, partial=True)
-            serializer.is_valid(raise_exception=True)
-            self.perform_update(serializer)
-            
-            # Check if stock has increased
-            new_stock = serializer.instance.stock
-            stock_increase = new_stock - old_stock
-            
-            # If stock has increased, create a Production record
-            if stock_increase > 0:
-                # Find the team associated with the current user
-                user_team = Team.objects.filter(members=request.user).first()
-                if user_team:
-                    # Create a Production record to track this increase
-                    Production.objects.create(
-                        team=user_team,
-                        part=serializer.instance,
-                        quantity=stock_increase,
-                        created_by=request.user
-                    )
-            
-            return Response(serializer.data)
+            # Find the team associated with the current user
+            user_team = get_user_team(request)
+            return self._update_stock_with_production(request, instance, request_data, user_team)
         
         # Get user's team
-        user_team = request.user.team_members.first()
+        user_team = get_user_team(request)
         
         # Check if user has a team
         if not user_team and not request.user.is_staff:
@@ -673,23 +642,35 @@ class PartViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        return self._update_stock_with_production(request, instance, request_data, user_team)
+
+    def _update_stock_with_production(self, request, instance, request_data, user_team):
+        """
+        Parçayı günceller; stok artışı varsa bunu üretim kaydı olarak işler.
+
+        Stok serializer üzerinden doğrudan yazılmaz. İstenen değer, yanıtta
+        gösterilen anlık stoğa (``live_stock``) göre kilit altında farka
+        çevrilir; artış üretim kaydı olarak, diğer değişiklikler stok düzeltmesi
+        olarak stok servisine verilir.
+        """
         serializer = self.get_serializer(instance, data=request_data, partial=True)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
-        
-        # Check if stock has increased
-        new_stock = serializer.instance.stock
-        stock_increase = new_stock - old_stock
-        
-        # If stock has increased, create a Production record
-        if stock_increase > 0:
-            # Create a Production record to track this increase
-            Production.objects.create(
-                team=user_team,
-                part=serializer.instance,
-                quantity=stock_increase,
-                created_by=request.user
-            )
+        stock = serializer.validated_data.pop('stock', None)
+        
+        with transaction.atomic():
+            if stock is not None:
+                # Fark okumalarla aynı stok tanımına göre hesaplanır
+                stock_change = stock - lock_live_stock(instance)
+                
+                # If stock has increased, create a Production record
+                if stock_change > 0 and user_team:
+                    record_production(user_team, instance, stock_change, request.user)
+                elif stock_change > 0:
+                    increase_stock(instance, stock_change, reason='ADJUSTMENT', refresh=True)
+                elif stock_change < 0:
+                    decrease_stock(instance, -stock_change, reason='ADJUSTMENT', refresh=True)
+            
+            self.perform_update(serializer)
         
         return Response(serializer.data)
     
@@ -704,50 +685,109 @@ class PartViewSet(viewsets.ModelViewSet):
         
         Stok miktarı minimum stok seviyesinin altında olan parçaları döndürür.
         """
-        parts = Part.objects.filter(stock__lt=F('minimum_stock'))
+        parts = Part.objects.with_live_stock().filter(live_stock__lt=F('minimum_stock'))
         serializer = self.get_serializer(parts, many=True)
         return Response(serializer.data)
 
     @extend_schema(
         summary="Parça kullanım bilgisi",
-        description="Bir parçanın hangi uçaklarda kullanıldığını gösterir."
+        description="Bir parçanın hangi uçaklarda kullanıldığını yeniden eskiye, imleç (cursor) ile sayfalayarak gösterir. "
+                    "\"summary\" bloğu uçak durumu, montaj takımı ve aya göre kullanım sayılarını içerir ve yalnızca "
+                    "ilk sayfada (cursor olmadan) ya da summary=1 ile döndürülür; "
+                    "summary_only=1 ile yalnızca özet döndürülür. \"stock\" anlık stoktur.",
+        parameters=KEYSET_PARAMETERS + [
+            OpenApiParameter(name="summary", description="1 ise özet sonraki sayfalarda da döndürülür", required=False, type=str),
+            OpenApiParameter(name="summary_only", description="1 ise kullanım listesi döndürülmez", required=False, type=str),
+        ]
     )
     @action(detail=True, methods=['get'], url_path='usage')
     def usage(self, request, pk=None):
         """
         Parça kullanım bilgisini gösterir.
         
-        Bir parçanın hangi uçaklarda kullanıldığını, ne zaman ve kim tarafından eklendiğini gösterir.
+        Kullanımlar (added_at, id) üzerinde anahtar kümesi sayfalamasıyla
+        döndürülür. Özet sayılar SQL'de gruplanarak hesaplanır; sonraki
+        sayfalarda tekrar hesaplanmaması için yalnızca ilk sayfada ya da açıkça
+        istendiğinde eklenir. ``since`` ve ``until`` hem listeye hem özete uygulanır.
         """
         part = self.get_object()
+        paginator = KeysetPagination('added_at')
+        aircraft_parts = AircraftPart.objects.filter(part=part)
+        flags = ('1', 'true', 'True')
+        summary_only = request.query_params.get('summary_only') in flags
+        with_summary = (
+            summary_only
+            or request.query_params.get('summary') in flags
+            or not request.query_params.get(paginator.cursor_query_param)
+        )
         
-        # Get all aircraft that use this part
-        aircraft_parts = AircraftPart.objects.filter(part=part).select_related('aircraft', 'added_by')
-        
-        usage_data = []
-        for aircraft_part in aircraft_parts:
-            aircraft = aircraft_part.aircraft
-            usage_data.append({
-                'aircraft_id': aircraft.id,
-                'aircraft_type': aircraft.aircraft_type,
-                'aircraft_name': dict(AIRCRAFT_TYPES).get(aircraft.aircraft_type, ''),
-                'assembly_team': dict(TEAM_TYPES).get(aircraft.assembly_team, ''),
-                'status': 'Tamamlandı' if aircraft.completed_at else 'Devam Ediyor',
-                'added_at': aircraft_part.added_at.strftime('%Y-%m-%d %H:%M'),
-                'added_by': aircraft_part.added_by.get_full_name() if aircraft_part.added_by else 'Sistem'
-            })
-        
-        return Response({
+        data = {
             'part_id': part.id,
             'part_name': part.name,
             'team_type': part.team_type,
-            'team_name': dict(TEAM_TYPES).get(part.team_type, ''),
+            'team_name': TEAM_TYPE_NAMES.get(part.team_type, ''),
             'aircraft_type': part.aircraft_type,
-            'aircraft_name': dict(AIRCRAFT_TYPES).get(part.aircraft_type, ''),
-            'stock': part.stock,
+            'aircraft_name': AIRCRAFT_TYPE_NAMES.get(part.aircraft_type, ''),
+            'stock': part.live_stock,
             'minimum_stock': part.minimum_stock,
-            'usage_count': len(usage_data),
-            'usage': usage_data
+        }
+        if with_summary:
+            data['summary'] = _usage_summary(paginator.filter_range(aircraft_parts, request))
+            data['usage_count'] = data['summary']['total']
+        if summary_only:
+            return Response(data)
+        
+        page = paginator.paginate_queryset(
+            aircraft_parts.select_related('aircraft__assembly_team', 'added_by'), request, self
+        )
+        data['usage'] = [
+            {
+                'aircraft_id': aircraft_part.aircraft_id,
+                'aircraft_type': aircraft_part.aircraft.aircraft_type,
+                'aircraft_name': AIRCRAFT_TYPE_NAMES.get(aircraft_part.aircraft.aircraft_type, ''),
+                'assembly_team': aircraft_part.aircraft.assembly_team.name if aircraft_part.aircraft.assembly_team else '',
+                'status': 'Tamamlandı' if aircraft_part.aircraft.completed_at else 'Devam Ediyor',
+                'added_at': aircraft_part.added_at.strftime('%Y-%m-%d %H:%M'),
+                'added_by': aircraft_part.added_by.get_full_name() if aircraft_part.added_by else 'Sistem'
+            }
+            for aircraft_part in page
+        ]
+        data['next'] = paginator.get_next_link()
+        return Response(data)
+
+    @extend_schema(
+        summary="Stok geçmişi",
+        description="Parçanın verilen andaki stoğunu ve o ana kadarki son stok hareketlerini gösterir.",
+        parameters=[
+            OpenApiParameter(name="at", description="Stoğun hesaplanacağı an (ISO 8601, varsayılan: şimdi)", required=False, type=str),
+        ]
+    )
+    @action(detail=True, methods=['get'], url_path='stock-history')
+    def stock_history(self, request, pk=None):
+        """
+        Stok geçmişini gösterir.
+        
+        Stok hareket defterinden parçanın istenen andaki stoğunu hesaplar.
+        """
+        part = self.get_object()
+        
+        moment = timezone.now()
+        if request.query_params.get('at'):
+            moment = parse_datetime(request.query_params['at'])
+            if moment is None:
+                return Response(
+                    {'detail': 'Geçersiz tarih.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+        
+        movements = part.movements.filter(created_at__lte=moment)[:STOCK_HISTORY_LIMIT]
+        return Response({
+            'part_id': part.id,
+            'at': moment,
+            'stock': stock_at(part, moment),
+            'movements': StockMovementSerializer(movements, many=True).data
         })
 
 @extend_schema_view(
@@ -775,15 +815,19 @@ class PartViewSet(viewsets.ModelViewSet):
         description="Bir takımı siler."
     ),
 )
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(DataTablesMixin, viewsets.ModelViewSet):
     """
     Takım yönetimi için API endpoint'leri.
     
     Takımların listelenmesi, oluşturulması, güncellenmesi ve silinmesi işlemlerini sağlar.
-    Takım tipine göre filtreleme yapılabilir.
+    Takım tipine göre filtreleme yapılabilir. Takım listesi sayfası ``datatable``
+    aksiyonu ile sunucu tarafında sayfalanır.
     """
     queryset = Team.objects.all()
     serializer_class = TeamSerializer
+    datatables_order_fields = {'name': 'name', 'get_team_type_display': 'team_type', 'created_at': 'created_at'}
+    datatables_search_fields = ('name',)
+    datatables_default_order = ('name',)
     
     def get_queryset(self):
         """
@@ -791,10 +835,7 @@ class TeamViewSet(viewsets.ModelViewSet):
         
         Takım tipine göre filtreleme yapar ve her takım için üye sayısı ve toplam üretim miktarı bilgilerini ekler.
         """
-        queryset = Team.objects.annotate(
-            member_count=Count('members'),
-            total_production=Sum('productions__quantity', default=0)
-        )
+        queryset = Team.objects.with_stats()
         
         team_type = self.request.query_params.get('team_type')
         if team_type:
@@ -918,9 +959,11 @@ class TeamViewSet(viewsets.ModelViewSet):
                 },
                 'required': ['part', 'quantity']
             }
-        }
+        },
+        parameters=[IDEMPOTENCY_KEY_PARAMETER]
     )
     @action(detail=True, methods=['post'])
+    @idempotent
     def produce_part(self, request, pk=None):
         """
         Parça üretimi yapar.
@@ -949,7 +992,7 @@ class TeamViewSet(viewsets.ModelViewSet):
             part = Part.objects.get(id=part_id)
             
             # Mevcut stok değerini al (başlangıç değeri)
-            old_stock = part.stock
+            old_stock = part.available_stock
             
             # Check if team can produce this part type
             if not team.can_produce_part(part):
@@ -958,41 +1001,12 @@ class TeamViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Create production record
-            with transaction.atomic():
-                # 1. Üretim kaydı oluştur (stok artışı yapılmadan)
-                production = Production.objects.create(
-                    team=team,
-                    part=part,
-                    quantity=quantity,
-                    created_by=request.user
-                )
-                
-                # 2. Güncel stok değerini al ve artışı kontrol et
-                part.refresh_from_db()
-                
-                # 3. Eğer stok değişmediyse, direkt SQL ile güncelle
-                if part.stock == old_stock:
-                    # SQL direkt güncelleme yap
-                    from django.db import connection
-                    cursor = connection.cursor()
-                    table_name = part._meta.db_table
-                    
-                    # Stok artırıp low stock durumunu güncelleyen SQL sorgusu
-                    query = f"""
-                        UPDATE {table_name}
-                        SET stock = stock + %s,
-                            is_low_stock = CASE WHEN (stock + %s) < minimum_stock THEN True ELSE False END
-                        WHERE id = %s
-                    """
-                    cursor.execute(query, [quantity, quantity, part_id])
-                    
-                    # Parça nesnesini yenile
-                    part.refresh_from_db()
+            # Üretim kaydı oluştur; stok artışı stok servisi tarafından tek UPDATE ile yapılır
+            production = record_production(team, part, quantity, request.user)
             
             return Response({
                 'detail': 'Parça başarıyla üretildi.',
-                'new_stock': part.stock,
+                'new_stock': part.available_stock,
                 'old_stock': old_stock,
                 'production_id': production.id
             })
@@ -1008,21 +1022,157 @@ class TeamViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @extend_schema(
+        summary="Toplu parça üret",
+        description="Takım adına birden fazla üretim kaydını tek istekte oluşturur. "
+                    "Kayıtlar birlikte doğrulanır; biri bile geçersizse hiçbiri kaydedilmez.",
+        request={
+            'application/json': {
+                'type': 'object',
+                'properties': {
+                    'productions': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'part': {'type': 'integer', 'description': 'Üretilen parçanın ID\'si'},
+                                'quantity': {'type': 'integer', 'description': 'Üretilen miktar'},
+                                'created_at': {'type': 'string', 'format': 'date-time', 'description': 'İstemcideki üretim zamanı (isteğe bağlı)'}
+                            },
+                            'required': ['part', 'quantity']
+                        }
+                    }
+                },
+                'required': ['productions']
+            }
+        },
+        parameters=[IDEMPOTENCY_KEY_PARAMETER]
+    )
+    @action(detail=True, methods=['post'])
+    @idempotent
+    def produce_batch(self, request, pk=None):
+        """
+        Toplu parça üretimi yapar.
+        
+        Vardiya sonu yüklemeleri için tüm kayıtları birlikte doğrular, tek sorguyla
+        ekler ve her parçanın stoğunu toplam miktarla bir kez artırır.
+        """
+        team = self.get_object()
+        entries = request.data.get('productions') if isinstance(request.data, dict) else request.data
+        
+        if not isinstance(entries, list) or not entries:
+            return Response(
+                {'detail': 'En az bir üretim kaydı gönderilmelidir.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if len(entries) > PRODUCTION_BATCH_LIMIT:
+            return Response(
+                {'detail': f'Tek istekte en fazla {PRODUCTION_BATCH_LIMIT} üretim kaydı gönderilebilir.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Takım kontrolleri tüm parti için bir kez yapılır
+        if team.team_type == 'ASSEMBLY':
+            return Response(
+                {'detail': 'Montaj takımları parça üretemez.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        if not team.members.exists():
+            return Response(
+                {'detail': 'Takımda üye bulunmamaktadır. Takıma üye ekleyin.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        if not request.user.is_superuser and not team.members.filter(id=request.user.id).exists():
+            return Response(
+                {'detail': 'Bu takımda değilsiniz ve bu takım adına üretim yapamazsınız.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # Parçaları tek sorguyla al ve kayıtları birlikte doğrula
+        part_ids = {entry.get('part') for entry in entries if isinstance(entry, dict)}
+        parts = Part.objects.in_bulk([part_id for part_id in part_ids if str(part_id).isdigit()])
+        now = timezone.now()
+        
+        cleaned, errors = [], []
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                errors.append({'index': index, 'detail': 'Geçersiz kayıt.'})
+                continue
+            
+            try:
+                part = parts.get(int(entry.get('part')))
+                quantity = int(entry.get('quantity', 1))
+            except (TypeError, ValueError):
+                errors.append({'index': index, 'detail': 'Parça ve miktar tam sayı olmalıdır.'})
+                continue
+            
+            if part is None:
+                errors.append({'index': index, 'detail': 'Parça bulunamadı.'})
+                continue
+            if not team.can_produce_part(part):
+                errors.append({'index': index, 'detail': 'Bu takım bu parçayı üretemez.'})
+                continue
+            if quantity <= 0:
+                errors.append({'index': index, 'detail': 'Üretim miktarı pozitif olmalıdır.'})
+                continue
+            
+            created_at = entry.get('created_at')
+            if created_at:
+                created_at = parse_datetime(str(created_at))
+                if created_at is None:
+                    errors.append({'index': index, 'detail': 'Geçersiz üretim zamanı.'})
+                    continue
+                if timezone.is_naive(created_at):
+                    created_at = timezone.make_aware(created_at)
+                if created_at > now:
+                    errors.append({'index': index, 'detail': 'Üretim zamanı gelecekte olamaz.'})
+                    continue
+            
+            cleaned.append({'part': part, 'quantity': quantity, 'created_at': created_at})
+        
+        if errors:
+            return Response(
+                {'detail': 'Geçersiz üretim kayıtları var, hiçbir kayıt oluşturulmadı.', 'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        productions = record_productions(team, cleaned, request.user)
+        
+        stocks = dict(
+            Part.objects.with_live_stock()
+            .filter(id__in={production.part_id for production in productions})
+            .values_list('id', 'live_stock')
+        )
+        return Response({
+            'detail': f'{len(productions)} üretim kaydı oluşturuldu.',
+            'production_ids': [production.id for production in productions],
+            'new_stock': stocks
+        }, status=status.HTTP_201_CREATED)
+
     @extend_schema(
         summary="Üretim geçmişi",
-        description="Takımın üretim geçmişini listeler."
+        description="Takımın üretim geçmişini yeniden eskiye, imleç (cursor) ile sayfalayarak listeler. "
+                    "Sonraki sayfa yanıttaki \"next\" bağlantısıyla alınır.",
+        parameters=KEYSET_PARAMETERS
     )
     @action(detail=True, methods=['get'], url_path='production-history')
     def production_history(self, request, pk=None):
         """
         Üretim geçmişini listeler.
         
-        Takımın tüm üretim kayıtlarını döndürür.
+        Kayıtlar (created_at, id) üzerinde anahtar kümesi sayfalamasıyla döndürülür;
+        derin sayfalar da ilk sayfa kadar ucuzdur.
         """
         team = self.get_object()
-        productions = team.productions.all()
+        paginator = KeysetPagination('created_at')
+        productions = paginator.paginate_queryset(
+            Production.objects.filter(team=team).select_related('team', 'part', 'created_by'), request, self
+        )
         serializer = ProductionSerializer(productions, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
 
 @extend_schema_view(
     list=extend_schema(
@@ -1050,15 +1200,23 @@ class TeamViewSet(viewsets.ModelViewSet):
         description="Bir uçağı siler. Sadece montaj takımları uçak silebilir."
     ),
 )
-class AircraftViewSet(viewsets.ModelViewSet):
+class AircraftViewSet(DataTablesMixin, viewsets.ModelViewSet):
     """
     Uçak yönetimi için API endpoint'leri.
     
     Uçakların listelenmesi, oluşturulması, güncellenmesi ve silinmesi işlemlerini sağlar.
-    Uçak tipine, duruma ve montaj takımına göre filtreleme yapılabilir.
+    Uçak tipine, duruma ve montaj takımına göre filtreleme yapılabilir. Uçak listesi
+    sayfası ``datatable`` aksiyonu ile sunucu tarafında sayfalanır.
     """
-    queryset = Aircraft.objects.all()
+    queryset = Aircraft.objects.with_completion().select_related('assembly_team')
     serializer_class = AircraftSerializer
+    datatables_order_fields = {
+        'get_aircraft_type_display': 'aircraft_type',
+        'created_at': 'created_at',
+        'completed_at': 'completed_at',
+    }
+    datatables_search_fields = ('aircraft_type', 'assembly_team__name')
+    datatables_default_order = ('-created_at',)
     
     def get_permissions(self):
         """
@@ -1085,20 +1243,19 @@ class AircraftViewSet(viewsets.ModelViewSet):
         if aircraft_type:
             queryset = queryset.filter(aircraft_type=aircraft_type)
         
-        # Filter by status
+        # Filter by status (uçak listesi sayfasındaki değerler de kabul edilir)
         status = self.request.query_params.get('status')
-        if status == 'in_production':
+        if status in ('in_production', 'incomplete'):
             queryset = queryset.filter(completed_at__isnull=True)
-        elif status == 'completed':
+        elif status in ('completed', 'complete'):
             queryset = queryset.filter(completed_at__isnull=False)
+        
+        assembly_team = self.request.query_params.get('assembly_team')
+        if assembly_team and assembly_team.isdigit():
+            queryset = queryset.filter(assembly_team_id=assembly_team)
             
         # Filter by assembly team
-        if not self.request.user.is_staff and not self.request.user.is_superuser:
-            user_team = self.request.user.team_members.first()
-            if user_team and user_team.team_type == 'ASSEMBLY':
-                queryset = queryset.filter(Q(assembly_team=user_team) | Q(assembly_team__isnull=True))
-            
-        return queryset
+        return queryset.visible_to(self.request.user, get_user_team(self.request))
     
     def create(self, request, *args, **kwargs):
         """
@@ -1110,7 +1267,7 @@ class AircraftViewSet(viewsets.ModelViewSet):
             return super().create(request, *args, **kwargs)
             
         # Get user's team
-        user_team = request.user.team_members.first()
+        user_team = get_user_team(request)
         
         # Check if user has a team
         if not user_team:
@@ -1133,16 +1290,146 @@ class AircraftViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Set assembly team to user's team
-        request.data['assembly_team'] = user_team.id
+        # Set assembly team to user's team (form verisi değiştirilemez; kopyası kullanılır)
+        data = request.data.copy()
+        data['assembly_team'] = user_team.id
         
-        return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    @extend_schema(
+        summary="Toplu uçak oluştur",
+        description="Üretim planındaki uçakları tek istekte oluşturur. "
+                    "Kayıtlar birlikte doğrulanır; biri bile geçersizse hiçbiri oluşturulmaz. "
+                    "Montaj takımı verilmezse kullanıcının takımı atanır.",
+        request={
+            'application/json': {
+                'type': 'object',
+                'properties': {
+                    'aircraft': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'aircraft_type': {'type': 'string', 'description': 'Uçak tipi'},
+                                'count': {'type': 'integer', 'description': 'Oluşturulacak uçak sayısı'},
+                                'assembly_team': {'type': 'integer', 'description': 'Montaj takımının ID\'si (isteğe bağlı)'}
+                            },
+                            'required': ['aircraft_type', 'count']
+                        }
+                    }
+                },
+                'required': ['aircraft']
+            }
+        },
+        parameters=[IDEMPOTENCY_KEY_PARAMETER]
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-create')
+    @idempotent
+    def bulk_create(self, request):
+        """
+        Toplu uçak oluşturur.
+        
+        Takım kontrolleri tüm plan için bir kez yapılır ve uçaklar tek sorguyla eklenir.
+        """
+        entries = request.data.get('aircraft') if isinstance(request.data, dict) else request.data
+        
+        if not isinstance(entries, list) or not entries:
+            return Response(
+                {'detail': 'En az bir uçak kaydı gönderilmelidir.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Takım kontrolleri tüm plan için bir kez yapılır
+        user_team = get_user_team(request)
+        if not request.user.is_superuser:
+            if not user_team:
+                return Response(
+                    {'detail': 'Kullanıcı bir takıma atanmamış.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            if user_team.team_type != 'ASSEMBLY' and not request.user.is_staff:
+                return Response(
+                    {'detail': 'Sadece montaj takımları uçak oluşturabilir.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+        
+        # Montaj takımlarını tek sorguyla al ve kayıtları birlikte doğrula
+        team_ids = {entry.get('assembly_team') for entry in entries if isinstance(entry, dict)}
+        teams = Team.objects.filter(team_type='ASSEMBLY').in_bulk(
+            [team_id for team_id in team_ids if str(team_id).isdigit()]
+        )
+        aircraft_types = dict(AIRCRAFT_TYPES)
+        
+        cleaned, errors = [], []
+        total = 0
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                errors.append({'index': index, 'detail': 'Geçersiz kayıt.'})
+                continue
+            
+            aircraft_type = entry.get('aircraft_type')
+            if aircraft_type not in aircraft_types:
+                errors.append({'index': index, 'detail': 'Geçersiz uçak tipi.'})
+                continue
+            
+            try:
+                count = int(entry.get('count', 1))
+            except (TypeError, ValueError):
+                errors.append({'index': index, 'detail': 'Uçak sayısı tam sayı olmalıdır.'})
+                continue
+            if count <= 0:
+                errors.append({'index': index, 'detail': 'Uçak sayısı pozitif olmalıdır.'})
+                continue
+            
+            team = user_team if user_team and user_team.team_type == 'ASSEMBLY' else None
+            if entry.get('assembly_team') is not None:
+                try:
+                    team = teams.get(int(entry['assembly_team']))
+                except (TypeError, ValueError):
+                    team = None
+                if team is None:
+                    errors.append({'index': index, 'detail': 'Montaj takımı bulunamadı.'})
+                    continue
+                if team != user_team and not request.user.is_staff and not request.user.is_superuser:
+                    errors.append({'index': index, 'detail': 'Sadece kendi takımınız adına uçak oluşturabilirsiniz.'})
+                    continue
+            
+            total += count
+            cleaned.append((aircraft_type, count, team))
+        
+        if total > AIRCRAFT_BATCH_LIMIT:
+            return Response(
+                {'detail': f'Tek istekte en fazla {AIRCRAFT_BATCH_LIMIT} uçak oluşturulabilir.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if errors:
+            return Response(
+                {'detail': 'Geçersiz uçak kayıtları var, hiçbir uçak oluşturulmadı.', 'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # bulk_create Aircraft.save() ve sinyalleri çağırmaz; yeni uçakların parçası ve tamamlanma durumu yoktur
+        aircraft = Aircraft.objects.bulk_create([
+            Aircraft(aircraft_type=aircraft_type, assembly_team=team, created_by=request.user)
+            for aircraft_type, count, team in cleaned
+            for _ in range(count)
+        ])
+        invalidate_dashboard()
+        return Response({
+            'detail': f'{len(aircraft)} uçak oluşturuldu.',
+            'aircraft_ids': [item.id for item in aircraft]
+        }, status=status.HTTP_201_CREATED)
 
     def destroy(self, request, *args, **kwargs):
         aircraft = self.get_object()
         
         # Get user's team
-        user_team = request.user.team_members.first()
+        user_team = get_user_team(request)
         
         # Check if user has a team
         if not user_team and not request.user.is_staff:
@@ -1179,7 +1466,7 @@ class AircraftViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Delete aircraft (this will return parts to stock via the model's delete method)
+        # Parçalar model delete() metodunda küme tabanlı olarak stoğa döndürülür
         return super().destroy(request, *args, **kwargs)
 
     @extend_schema(
@@ -1193,9 +1480,11 @@ class AircraftViewSet(viewsets.ModelViewSet):
                 },
                 'required': ['part']
             }
-        }
+        },
+        parameters=[IDEMPOTENCY_KEY_PARAMETER]
     )
     @action(detail=True, methods=['post'])
+    @idempotent
     def add_part(self, request, pk=None):
         """
         Uçağa parça ekler.
@@ -1206,7 +1495,7 @@ class AircraftViewSet(viewsets.ModelViewSet):
         part_id = request.data.get('part')
 
         # Get user's team
-        user_team = request.user.team_members.first()
+        user_team = get_user_team(request)
         
         # Check if user has a team
         if not user_team:
@@ -1262,6 +1551,73 @@ class AircraftViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+    @extend_schema(
+        summary="Uçağı kit olarak monte et",
+        description=(
+            "Uçak tipinin gerektirdiği eksik tüm parçaları tek işlemde stoktan düşer, "
+            "uçağa ekler ve uçağı tamamlar. Herhangi bir takım tipinde stok yetmezse "
+            "hiçbir değişiklik yapılmaz ve takım tipi bazında eksik raporu döner."
+        ),
+        request=None,
+        parameters=[IDEMPOTENCY_KEY_PARAMETER]
+    )
+    @action(detail=True, methods=['post'])
+    @idempotent
+    def assemble_kit(self, request, pk=None):
+        """
+        Uçağın eksik tüm parçalarını tek istekte ekler.
+        
+        Sadece uçağa atanmış montaj takımı kit montajı yapabilir.
+        """
+        aircraft = self.get_object()
+
+        # Get user's team
+        user_team = get_user_team(request)
+        
+        # Check if user has a team
+        if not user_team:
+            return Response(
+                {'detail': 'Kullanıcı bir takıma atanmamış.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # Only assembly teams can add parts to aircraft
+        if user_team.team_type != 'ASSEMBLY' and not request.user.is_staff:
+            return Response(
+                {'detail': 'Sadece montaj takımları uçağa parça ekleyebilir.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # Check if user's team is assigned to this aircraft
+        if aircraft.assembly_team != user_team and not request.user.is_staff:
+            return Response(
+                {'detail': 'Sadece atanmış montaj takımı uçağa parça ekleyebilir.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            aircraft_parts = assemble_kit(aircraft, request.user)
+        except PartShortage as e:
+            return Response(
+                {'detail': e.message, 'shortages': e.shortages},
+                status=status.HTTP_409_CONFLICT
+            )
+        except ValidationError as e:
+            return Response(
+                {'detail': e.message},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'detail': f'{len(aircraft_parts)} parça eklendi, uçak tamamlandı.',
+            'is_complete': aircraft.is_complete,
+            'completed_at': aircraft.completed_at,
+            'parts': [
+                {'id': aircraft_part.part_id, 'team_type': aircraft_part.part.team_type}
+                for aircraft_part in aircraft_parts
+            ]
+        })
+
     @extend_schema(
         summary="Üretimi tamamla",
         description="Uçak üretimini tamamlar."
@@ -1276,7 +1632,7 @@ class AircraftViewSet(viewsets.ModelViewSet):
         aircraft = self.get_object()
         
         # Get user's team
-        user_team = request.user.team_members.first()
+        user_team = get_user_team(request)
         
         # Check if user has a team
         if not user_team:
@@ -1324,6 +1680,7 @@ class AircraftViewSet(viewsets.ModelViewSet):
         description="Uçağın parça özetini gösterir."
     )
     @action(detail=True, methods=['get'], url_path='parts-summary')
+    @conditional(CATALOG, aircraft_kwarg='pk')
     def parts_summary(self, request, pk=None):
         """
         Parça özetini gösterir.
@@ -1331,65 +1688,76 @@ class AircraftViewSet(viewsets.ModelViewSet):
         Uçağın mevcut parçalarını, eksik parçalarını ve tamamlanma durumunu gösterir.
         """
         aircraft = self.get_object()
+        aircraft_parts = aircraft.aircraft_parts.select_related('part', 'added_by').all()
+        return Response(_parts_summary_data(aircraft, aircraft_parts))
+
+    @extend_schema(
+        summary="Çoklu uçak parça özeti",
+        description=f"Virgülle ayrılmış uçak ID'leri (GET ?ids=1,2,3) ya da {{\"ids\": [1, 2, 3]}} gövdesi (POST) için "
+                    f"parça özetlerini tek JSON belgesi olarak akışla döndürür (en fazla {AIRCRAFT_IDS_LIMIT} uçak). "
+                    "Bulunamayan ya da erişilemeyen ID'ler \"missing\" listesindedir.",
+        parameters=[
+            OpenApiParameter(name="ids", description="Uçak ID'leri (GET için, ör. 1,2,3)", required=False, type=str),
+        ],
+        request={
+            'application/json': {
+                'type': 'object',
+                'properties': {'ids': {'type': 'array', 'items': {'type': 'integer'}}},
+            }
+        }
+    )
+    @action(detail=False, methods=['get', 'post'], url_path='parts-summary', url_name='parts-summary-batch')
+    def parts_summary_batch(self, request):
+        """
+        Birden fazla uçağın parça özetini gösterir.
         
-        # Get required parts based on aircraft type
-        required_parts = {}
-        for team_type, team_name in TEAM_TYPES:
-            if team_type != 'ASSEMBLY':  # Assembly team doesn't produce parts
-                required_parts[team_type] = {
-                    'team': team_name,
-                    'required': REQUIRED_PARTS[aircraft.aircraft_type][team_type],
-                    'current': 0,
-                    'remaining': REQUIRED_PARTS[aircraft.aircraft_type][team_type],
-                    'completion': 0
-                }
-        
-        # Get current parts
-        current_parts = []
-        for aircraft_part in aircraft.aircraft_parts.select_related('part', 'added_by').all():
-            part = aircraft_part.part
-            team_type = part.team_type
-            
-            if team_type in required_parts:
-                required_parts[team_type]['current'] += 1
-                required_parts[team_type]['remaining'] = max(0, required_parts[team_type]['required'] - required_parts[team_type]['current'])
-                required_parts[team_type]['completion'] = int((required_parts[team_type]['current'] / required_parts[team_type]['required']) * 100)
-            
-            current_parts.append({
-                'id': part.id,
-                'name': part.name,
-                'team_type': part.team_type,
-                'team_name': dict(TEAM_TYPES).get(part.team_type, ''),
-                'added_at': aircraft_part.added_at.strftime('%Y-%m-%d %H:%M'),
-                'added_by': aircraft_part.added_by.get_full_name() if aircraft_part.added_by else 'Sistem'
-            })
-        
-        # Check if all required parts are complete
-        is_complete = all(part_info['current'] >= part_info['required'] for part_info in required_parts.values())
-        
-        return Response({
-            'required_parts': list(required_parts.values()),
-            'current_parts': current_parts,
-            'missing_parts': sum(part_info['remaining'] for part_info in required_parts.values()),
-            'is_complete': is_complete
-        })
+        Uçaklar tek sorguda, tüm uçakların parçaları tek sorguda okunur;
+        yanıt uçak uçak yazılarak akışla gönderilir.
+        """
+        raw_ids = request.data.get('ids') if request.method == 'POST' else request.query_params.get('ids')
+        ids, error = _aircraft_ids_param(raw_ids)
+        if error:
+            return Response({'detail': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Gerekli ve mevcut parça sayıları uçak satırındaki sayaçlardan okunur
+        aircraft = {
+            item.pk: item
+            for item in self.get_queryset().select_related(None).filter(pk__in=ids)
+            .only('id', 'aircraft_type', *PART_COUNT_FIELDS.values())
+        }
+        aircraft_parts = (
+            AircraftPart.objects.filter(aircraft_id__in=list(aircraft))
+            .select_related('part', 'added_by')
+            .order_by('aircraft_id', 'added_at', 'id')
+        )
+        missing = [aircraft_id for aircraft_id in ids if aircraft_id not in aircraft]
+        return StreamingHttpResponse(
+            _stream_parts_summaries(aircraft, aircraft_parts, missing), content_type='application/json'
+        )
 
     @extend_schema(
         summary="Üretim geçmişi",
-        description="Uçağın üretim geçmişini gösterir."
+        description="Uçağın üretim geçmişini yeniden eskiye, imleç (cursor) ile sayfalayarak gösterir. "
+                    "Sonraki sayfa yanıttaki \"next\" bağlantısıyla alınır.",
+        parameters=KEYSET_PARAMETERS
     )
     @action(detail=True, methods=['get'], url_path='production-history')
     def production_history(self, request, pk=None):
         """
         Üretim geçmişini gösterir.
         
-        Uçağa eklenen tüm parçaların geçmişini gösterir.
+        Uçağa eklenen parçaların geçmişi (added_at, id) üzerinde anahtar kümesi
+        sayfalamasıyla döndürülür.
         """
         aircraft = self.get_object()
+        paginator = KeysetPagination('added_at')
+        aircraft_parts = paginator.paginate_queryset(
+            aircraft.aircraft_parts.select_related('part', 'added_by'), request, self
+        )
         
-        # Get all parts added to this aircraft with timestamp and user info
+        # Get parts added to this aircraft with timestamp and user info
         history = []
-        for aircraft_part in aircraft.aircraft_parts.select_related('part', 'added_by').order_by('-added_at'):
+        for aircraft_part in aircraft_parts:
             part = aircraft_part.part
             history.append({
                 'part_id': part.id,
@@ -1407,7 +1775,8 @@ class AircraftViewSet(viewsets.ModelViewSet):
             'aircraft_id': aircraft.id,
             'aircraft_type': aircraft.aircraft_type,
             'aircraft_name': dict(AIRCRAFT_TYPES).get(aircraft.aircraft_type, ''),
-            'history': history
+            'history': history,
+            'next': paginator.get_next_link()
         })
 
     @extend_schema(
@@ -1415,42 +1784,171 @@ class AircraftViewSet(viewsets.ModelViewSet):
         description="Uçağa eklenebilecek parçaları listeler."
     )
     @action(detail=True, methods=['get'], url_path='available-parts')
+    @conditional(CATALOG, aircraft_kwarg='pk')
     def available_parts(self, request, pk=None):
         """
         Kullanılabilir parçaları listeler.
         
         Uçağa eklenebilecek, stokta bulunan ve uyumlu parçaları listeler.
+        Dolu takım tipleri sorguda elenir; yalnızca uygun satırlar okunur.
         """
         aircraft = self.get_object()
+        rows = available_parts([aircraft])[aircraft.pk]
+        return Response({'parts': [_available_part_data(row) for row in rows]})
+
+    @extend_schema(
+        summary="Çoklu uçak için kullanılabilir parçalar",
+        description=f"Virgülle ayrılmış uçak ID'leri (en fazla {AIRCRAFT_IDS_LIMIT}) için eklenebilecek "
+                    "parçaları tek yanıtta döndürür. Bulunamayan ya da erişilemeyen ID'ler \"missing\" listesindedir.",
+        parameters=[
+            OpenApiParameter(name="ids", description="Uçak ID'leri (ör. 1,2,3)", required=True, type=str),
+        ]
+    )
+    @action(detail=False, methods=['get'], url_path='available-parts', url_name='available-parts-batch')
+    def available_parts_batch(self, request):
+        """
+        Birden fazla uçak için kullanılabilir parçaları listeler.
         
-        # Get parts that are compatible with this aircraft and have stock
-        available_parts = Part.objects.filter(
-            aircraft_type=aircraft.aircraft_type,
-            stock__gt=0
+        Uçaklar tek sorguda, tüm uçakların parçaları tek sorguda okunur.
+        """
+        ids, error = _aircraft_ids_param(request.query_params.get('ids'))
+        if error:
+            return Response({'detail': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Uygunluk yalnızca uçak tipinden ve parça sayaçlarından hesaplanır
+        aircraft = list(
+            self.get_queryset().select_related(None).filter(pk__in=ids)
+            .only('id', 'aircraft_type', *PART_COUNT_FIELDS.values())
         )
-        
-        # Get current parts by team type
-        current_parts = {}
-        for team_type in REQUIRED_PARTS[aircraft.aircraft_type]:
-            current_parts[team_type] = aircraft.parts.filter(team_type=team_type).count()
-        
-        # Filter out parts that have reached their limit
-        filtered_parts = []
-        for part in available_parts:
-            team_type = part.team_type
-            required = REQUIRED_PARTS[aircraft.aircraft_type][team_type]
-            current = current_parts.get(team_type, 0)
-            
-            if current < required:
-                filtered_parts.append(part)
-        
-        serializer = PartSerializer(filtered_parts, many=True)
-        return Response({'parts': serializer.data})
+        parts = available_parts(aircraft)
+        return Response({
+            'aircraft': {
+                aircraft_id: {'parts': [_available_part_data(row) for row in rows]}
+                for aircraft_id, rows in parts.items()
+            },
+            'missing': [aircraft_id for aircraft_id in ids if aircraft_id not in parts]
+        })
+
+def _aircraft_ids_param(value):
+    """Virgülle ayrılmış (ya da liste olarak gelen) uçak ID'lerini sırayı koruyarak ayrıştırır; ``(ids, hata)`` döndürür"""
+    if not value:
+        return None, 'ids parametresi gereklidir.'
+    items = value if isinstance(value, (list, tuple)) else str(value).split(',')
+    try:
+        ids = list(dict.fromkeys(int(item) for item in items if str(item).strip()))
+    except (TypeError, ValueError):
+        return None, "ids yalnızca virgülle ayrılmış uçak ID'lerinden oluşmalıdır."
+    if not ids:
+        return None, 'ids parametresi gereklidir.'
+    if len(ids) > AIRCRAFT_IDS_LIMIT:
+        return None, f'Tek istekte en fazla {AIRCRAFT_IDS_LIMIT} uçak sorgulanabilir.'
+    return ids, None
+
+def _parts_summary_data(aircraft, aircraft_parts):
+    """Uçağın parça özetini sayaçlardan ve verilen ``AircraftPart`` kayıtlarından oluşturur"""
+    required_parts = []
+    for team_type, team_name in TEAM_TYPES:
+        if team_type == 'ASSEMBLY':  # Montaj takımı parça üretmez
+            continue
+        required = REQUIRED_PARTS[aircraft.aircraft_type][team_type]
+        current = aircraft.part_count(team_type)
+        required_parts.append({
+            'team': team_name,
+            'required': required,
+            'current': current,
+            'remaining': max(0, required - current),
+            'completion': int((current / required) * 100) if required else 0
+        })
+    
+    current_parts = []
+    for aircraft_part in aircraft_parts:
+        part = aircraft_part.part
+        current_parts.append({
+            'id': part.id,
+            'name': part.name,
+            'team_type': part.team_type,
+            'team_name': TEAM_TYPE_NAMES.get(part.team_type, ''),
+            'added_at': aircraft_part.added_at.strftime('%Y-%m-%d %H:%M'),
+            'added_by': aircraft_part.added_by.get_full_name() if aircraft_part.added_by else 'Sistem'
+        })
+    
+    return {
+        'required_parts': required_parts,
+        'current_parts': current_parts,
+        'missing_parts': sum(part_info['remaining'] for part_info in required_parts),
+        'is_complete': aircraft.check_completion_status()
+    }
+
+def _stream_parts_summaries(aircraft, aircraft_parts, missing):
+    """
+    Parça özetlerini tek bir JSON belgesi olarak parça parça üretir.
+
+    ``aircraft_parts`` uçak ID'sine göre sıralı olmalıdır; kayıtlar
+    ``iterator()`` ile okunur ve her uçağın özeti parçaları bitince yazılır.
+    """
+    yield '{"aircraft": {'
+    groups = groupby(aircraft_parts.iterator(chunk_size=2000), key=attrgetter('aircraft_id'))
+    pending = next(groups, None)
+    for index, aircraft_id in enumerate(sorted(aircraft)):
+        rows = []
+        if pending is not None and pending[0] == aircraft_id:
+            rows = list(pending[1])
+            pending = next(groups, None)
+        summary = json.dumps(_parts_summary_data(aircraft[aircraft_id], rows), cls=DjangoJSONEncoder)
+        yield f'{", " if index else ""}"{aircraft_id}": {summary}'
+    yield '}, "missing": ' + json.dumps(missing) + '}'
+
+def _usage_summary(aircraft_parts):
+    """Parça kullanımlarını uçak durumu, montaj takımı ve aya göre SQL'de gruplar"""
+    by_status = aircraft_parts.aggregate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(aircraft__completed_at__isnull=False)),
+        in_progress=Count('id', filter=Q(aircraft__completed_at__isnull=True)),
+    )
+    by_team = (
+        aircraft_parts.order_by()
+        .values('aircraft__assembly_team_id', 'aircraft__assembly_team__name')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'aircraft__assembly_team__name')
+    )
+    by_month = (
+        aircraft_parts.annotate(month=TruncMonth('added_at'))
+        .order_by().values('month')
+        .annotate(count=Count('id'))
+        .order_by('month')
+    )
+    return {
+        'total': by_status['total'],
+        'by_status': {'completed': by_status['completed'], 'in_progress': by_status['in_progress']},
+        'by_assembly_team': [
+            {
+                'team_id': row['aircraft__assembly_team_id'],
+                'team_name': row['aircraft__assembly_team__name'] or '',
+                'count': row['count'],
+            }
+            for row in by_team
+        ],
+        'by_month': [{'month': row['month'].strftime('%Y-%m'), 'count': row['count']} for row in by_month],
+    }
+
+def _available_part_data(row):
+    """Parça satırını PartSerializer ile aynı biçimde, serializer çalıştırmadan döndürür"""
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'team_type': row['team_type'],
+        'get_team_type_display': TEAM_TYPE_NAMES.get(row['team_type'], row['team_type']),
+        'aircraft_type': row['aircraft_type'],
+        'get_aircraft_type_display': AIRCRAFT_TYPE_NAMES.get(row['aircraft_type'], row['aircraft_type']),
+        'stock': row['live_stock'],
+        'minimum_stock': row['minimum_stock'],
+        'is_low_stock': row['live_stock'] < row['minimum_stock'],
+    }
 
 @login_required
 def dashboard(request):
     """Ana dashboard görünümü."""
-    user_team = Team.objects.filter(members=request.user).first()
+    user_team = get_user_team(request)
     
     # Kullanıcı süper kullanıcı değilse ve takıma atanmamışsa uyarı göster
     if not request.user.is_superuser and not user_team:
@@ -1465,11 +1963,14 @@ def dashboard(request):
     # Kullanıcının takımına göre verileri filtrele
     context = {
         'user_team': user_team,
-        'total_parts': Part.objects.count(),
-        'total_aircraft': Aircraft.objects.count(),
-        'completed_aircraft': Aircraft.objects.filter(is_complete=True).count(),
-        'low_stock_parts': Part.objects.filter(is_low_stock=True).count(),
     }
+    snapshot = dashboard_snapshot()
+    context.update({
+        'total_parts': snapshot['parts_count'],
+        'total_aircraft': snapshot['aircraft_count'],
+        'completed_aircraft': snapshot['completed_aircraft_count'],
+        'low_stock_parts': snapshot['low_stock_count'],
+    })
     
     if user_team:
         if user_team.team_type == 'ASSEMBLY':
@@ -1488,7 +1989,7 @@ def dashboard(request):
             # Üretim takımları için parça verileri
             context.update({
                 'team_parts': Part.objects.filter(team_type=user_team.team_type).count(),
-                'team_production': Production.objects.filter(team=user_team).aggregate(
+                'team_production': ProductionDailyRollup.objects.filter(team=user_team).aggregate(
                     total=Sum('quantity')
                 )['total'] or 0,
                 'recent_production': Production.objects.filter(
@@ -1502,7 +2003,7 @@ def dashboard(request):
 def part_list(request):
     """Parça listesi görünümü."""
     # Kullanıcı süper kullanıcı değilse ve takıma atanmamışsa uyarı göster
-    user_team = Team.objects.filter(members=request.user).first()
+    user_team = get_user_team(request)
     if not request.user.is_superuser and not user_team:
         messages.warning(
             request, 
@@ -1528,7 +2029,7 @@ def part_list(request):
 def aircraft_detail(request, pk):
     """Uçak detay görünümü."""
     # Sadece montaj takımı üyeleri ve süper kullanıcılar erişebilir
-    user_team = Team.objects.filter(members=request.user).first()
+    user_team = get_user_team(request)
     
     # Süper kullanıcı değilse ve montaj takımında değilse erişimi engelle
     if not request.user.is_superuser and (not user_team or user_team.team_type != 'ASSEMBLY'):
@@ -1570,7 +2071,7 @@ class IsTeamMemberOrReadOnly(permissions.BasePermission):
             return True
         
         # Kullanıcının bir takımı var mı kontrol et
-        return Team.objects.filter(members=request.user).exists()
+        return get_user_team(request) is not None
     
     def has_object_permission(self, request, view, obj):
         # GET, HEAD, OPTIONS isteklerine izin ver
@@ -1587,13 +2088,13 @@ class IsTeamMemberOrReadOnly(permissions.BasePermission):
         
         # Parça nesnesi için, sadece ilgili takım tipindeki takım üyeleri değişiklik yapabilir
         if isinstance(obj, Part):
-            user_team = Team.objects.filter(members=request.user).first()
+            user_team = get_user_team(request)
             return user_team and user_team.team_type == obj.team_type
         
         # Uçak nesnesi için, sadece montaj takımı üyeleri değişiklik yapabilir
         if isinstance(obj, Aircraft):
-            user_team = Team.objects.filter(members=request.user).first()
-            return user_team and user_team.team_type == 'ASSEMBLY' and obj.assembly_team == user_team
+            user_team = get_user_team(request)
+            return user_team and user_team.team_type == 'ASSEMBLY' and obj.assembly_team_id == user_team.pk
         
         # Üretim nesnesi için, sadece ilgili takım üyeleri değişiklik yapabilir
         if isinstance(obj, Production):
@@ -1601,8 +2102,8 @@ class IsTeamMemberOrReadOnly(permissions.BasePermission):
         
         # AircraftPart nesnesi için, sadece montaj takımı üyeleri değişiklik yapabilir
         if isinstance(obj, AircraftPart):
-            user_team = Team.objects.filter(members=request.user).first()
-            return user_team and user_team.team_type == 'ASSEMBLY' and obj.aircraft.assembly_team == user_team
+            user_team = get_user_team(request)
+            return user_team and user_team.team_type == 'ASSEMBLY' and obj.aircraft.assembly_team_id == user_team.pk
         
         return False 
 
@@ -1616,7 +2117,7 @@ class IsAssemblyTeamMember(permissions.BasePermission):
             return True
         
         # Kullanıcının bir takımı var mı kontrol et
-        user_team = Team.objects.filter(members=request.user).first()
+        user_team = get_user_team(request)
         
         # Sadece montaj takımı üyelerine izin ver
         return user_team and user_team.team_type == 'ASSEMBLY'
@@ -1627,7 +2128,7 @@ class IsAssemblyTeamMember(permissions.BasePermission):
             return True
         
         # Kullanıcının bir takımı var mı kontrol et
-        user_team = Team.objects.filter(members=request.user).first()
+        user_team = get_user_team(request)
         
         # Sadece montaj takımı üyelerine izin ver
         if not user_team or user_team.team_type != 'ASSEMBLY':
@@ -1635,7 +2136,7 @@ class IsAssemblyTeamMember(permissions.BasePermission):
         
         # Uçak nesnesi için, sadece kendi takımının uçaklarını ve atanmamış uçakları görebilir
         if isinstance(obj, Aircraft):
-            return obj.assembly_team is None or obj.assembly_team == user_team
+            return obj.assembly_team_id is None or obj.assembly_team_id == user_team.pk
         
         return True
 
@@ -1649,9 +2150,8 @@ class TeamCheckMiddleware:
         if request.user.is_authenticated and not request.user.is_superuser:
             # Admin sayfasına erişim için kontrol yapma
             if not request.path.startswith('/admin/'):
-                # Kullanıcının bir takımı var mı kontrol et
-                user_team = Team.objects.filter(members=request.user).first()
-                if not user_team:
+                # Takım durumu oturumdaki imzalı bayraktan okunur; üyelik değişmedikçe sorgu çalışmaz
+                if not session_has_team(request):
                     # Takımı olmayan kullanıcıyı çıkış yaptır
                     from django.contrib.auth import logout
                     from django.contrib import messages
@@ -1684,13 +2184,16 @@ class CustomLoginView(LoginView):
         # Eğer kullanıcı admin değilse takım kontrolü yap
         if not user.is_superuser:
             # Kullanıcının takımını kontrol et
-            if not Team.objects.filter(members=user).exists():
+            if team_membership(user)[0] is None:
                 form.add_error(None, 'Sisteme giriş yapabilmek için bir takıma atanmış olmanız gerekmektedir. '
                                    'Lütfen sistem yöneticisi (admin) ile iletişime geçiniz.')
                 return self.form_invalid(form)
         
         # Eğer buraya kadar geldiyse, ya admin ya da takımı olan bir kullanıcı
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        # Takım kontrolü bayrağı oturuma yazılır; middleware sonraki isteklerde sorgu çalıştırmaz
+        refresh_team_check(self.request)
+        return response
 
     def get_form(self, form_class=None):
         """
@@ -1700,7 +2203,7 @@ class CustomLoginView(LoginView):
         
         # Eğer kullanıcı zaten giriş yapmışsa ve takımı yoksa, giriş yapmasını engelle
         if self.request.user.is_authenticated and not self.request.user.is_superuser:
-            if not Team.objects.filter(members=self.request.user).exists():
+            if get_user_team(self.request) is None:
                 form.add_error(None, 'Sisteme giriş yapabilmek için bir takıma atanmış olmanız gerekmektedir. '
                                    'Lütfen sistem yöneticisi (admin) ile iletişime geçiniz.')
                 return form
@@ -1713,7 +2216,7 @@ class CustomLoginView(LoginView):
         """
         # Eğer kullanıcı zaten giriş yapmışsa ve takımı yoksa, çıkış yaptır
         if request.user.is_authenticated and not request.user.is_superuser:
-            if not Team.objects.filter(members=request.user).exists():
+            if get_user_team(request) is None:
                 from django.contrib.auth import logout
                 logout(request)
                 messages.error(request, 'Sisteme giriş yapabilmek için bir takıma atanmış olmanız gerekmektedir. '
@@ -1735,7 +2238,7 @@ def claim_aircraft(request, pk):
         return JsonResponse({'error': 'Bu uçak zaten bir takıma atanmış.'}, status=400)
     
     # Kullanıcının takımını kontrol et
-    user_team = request.user.team_members.first()
+    user_team = get_user_team(request)
     if not user_team:
         return JsonResponse({'error': 'Kullanıcı bir takıma atanmamış.'}, status=403)
     
@@ -1757,6 +2260,7 @@ def claim_aircraft(request, pk):
     })
 
 @login_required
+@idempotent
 def user_add_production(request):
     """Normal kullanıcılar için üretim kaydı oluşturma fonksiyonu"""
     if request.method != 'POST':
@@ -1767,7 +2271,7 @@ def user_add_production(request):
         return JsonResponse({'error': 'Süper kullanıcılar için farklı bir endpoint kullanılmalıdır.'}, status=400)
     
     # Kullanıcının takımını kontrol et
-    user_team = request.user.team_members.first()
+    user_team = get_user_team(request)
     if not user_team:
         return JsonResponse({'error': 'User is not assigned to a team'}, status=403)
     
@@ -1787,9 +2291,6 @@ def user_add_production(request):
             part = Part.objects.get(id=part_id)
             quantity = int(quantity)
             
-            # Mevcut stok değerini saklayalım
-            old_stock = part.stock
-            
             if quantity <= 0:
                 return JsonResponse({'error': 'Quantity must be positive'}, status=400)
             
@@ -1801,32 +2302,13 @@ def user_add_production(request):
             if part.team_type not in REQUIRED_PARTS[part.aircraft_type]:
                 return JsonResponse({'error': 'Invalid part type for this aircraft type'}, status=400)
             
-            # Create production record
-            production = Production.objects.create(
-                team=user_team,
-                part=part,
-                quantity=quantity,
-                created_by=request.user
-            )
-            
-            # Güncel stok değerini al
-            part.refresh_from_db()
-            
-            # Stok değişmediyse direkt SQL ile güncelleyelim
-            if part.stock == old_stock:
-                # SQL direkt güncelleme yap
-                from django.db import connection
-                cursor = connection.cursor()
-                cursor.execute(
-                    f"UPDATE {part._meta.db_table} SET stock = stock + %s, is_low_stock = CASE WHEN (stock + %s) < minimum_stock THEN True ELSE False END WHERE id = %s",
-                    [quantity, quantity, part_id]
-                )
-                part.refresh_from_db()
+            # Üretim kaydı ve stok artışı tek servis çağrısıyla yapılır
+            production = record_production(user_team, part, quantity, request.user)
         
         return JsonResponse({
             'success': True,
             'message': f'Successfully produced {quantity} {part.name}',
-            'new_stock': part.stock
+            'new_stock': part.available_stock
         })
         
     except Part.DoesNotExist: